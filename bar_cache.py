@@ -0,0 +1,110 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+BAR_CACHE_BYTES = int(float(os.getenv("DJ_BAR_CACHE_MB", "64")) * 1024 * 1024)
+
+_default_cache = {}
+_default_lock = threading.Lock()
+
+
+def new_bar_cache(max_bytes=BAR_CACHE_BYTES):
+    return {
+        "max_bytes": int(max_bytes),
+        "entries": OrderedDict(),
+        "pinned": set(),
+        "newest": {},
+        "bytes": 0,
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+        "lock": threading.Lock(),
+    }
+
+
+def get_default_bar_cache():
+    with _default_lock:
+        cache = _default_cache.get("stock")
+        if cache is None:
+            cache = new_bar_cache()
+            _default_cache["stock"] = cache
+    return cache
+
+
+def bars_nbytes(bars):
+    return int(sum(v.nbytes for v in bars.values() if isinstance(v, np.ndarray)))
+
+
+def is_protected(cache, key):
+    # a pinned symbol keeps only its newest key of each shape resident; superseded ranges and versions age out
+    return key[0] in cache["pinned"] and cache["newest"].get((key[0], len(key))) == key
+
+
+def evict_to_budget(cache):
+    entries = cache["entries"]
+    for key in list(entries.keys()):
+        if cache["bytes"] <= cache["max_bytes"]:
+            break
+        if is_protected(cache, key):
+            continue
+        _, nbytes = entries.pop(key)
+        cache["bytes"] -= nbytes
+        cache["evictions"] += 1
+
+
+def bar_cache_get(cache, key):
+    with cache["lock"]:
+        hit = cache["entries"].get(key)
+        if hit is None:
+            cache["misses"] += 1
+            return None
+        cache["entries"].move_to_end(key)
+        cache["hits"] += 1
+        return hit[0]
+
+
+def bar_cache_put(cache, key, bars):
+    nbytes = bars_nbytes(bars)
+    with cache["lock"]:
+        old = cache["entries"].pop(key, None)
+        if old is not None:
+            cache["bytes"] -= old[1]
+        cache["entries"][key] = (bars, nbytes)
+        cache["bytes"] += nbytes
+        cache["newest"][(key[0], len(key))] = key
+        evict_to_budget(cache)
+    return bars
+
+
+def bar_cache_fetch(cache, key, loader):
+    bars = bar_cache_get(cache, key)
+    if bars is None:
+        bars = bar_cache_put(cache, key, loader())
+    return bars
+
+
+def bar_cache_pin(cache, symbol, pinned=True):
+    with cache["lock"]:
+        if pinned:
+            cache["pinned"].add(symbol)
+        else:
+            cache["pinned"].discard(symbol)
+            evict_to_budget(cache)
+
+
+def bar_cache_stats(cache):
+    with cache["lock"]:
+        total = cache["hits"] + cache["misses"]
+        return {
+            "entries": len(cache["entries"]),
+            "bytes": cache["bytes"],
+            "max_bytes": cache["max_bytes"],
+            "pinned": len(cache["pinned"]),
+            "pinned_bytes": sum(n for k, (_, n) in cache["entries"].items() if is_protected(cache, k)),
+            "hits": cache["hits"],
+            "misses": cache["misses"],
+            "evictions": cache["evictions"],
+            "hit_rate": round(cache["hits"] * 100.0 / total, 1) if total else 0.0,
+        }
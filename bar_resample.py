@@ -0,0 +1,138 @@
+from datetime import date
+
+import numpy as np
+
+from bar_store import BAR_FIELDS, slice_bars, sync_bars
+
+MORNING_OPEN = 9 * 60 + 30
+MORNING_CLOSE = 11 * 60 + 30
+AFTERNOON_OPEN = 13 * 60
+AFTERNOON_CLOSE = 15 * 60
+CALENDAR_PERIODS = {"周线": "week", "月线": "month"}
+
+
+def session_slots(minutes, step):
+    # same labels as get_trading_minutes_of_day: a bar is stamped with the end of its window,
+    # the 09:30 call auction folds into the first bar and stray lunch/after-close ticks clamp to the session
+    m = np.asarray(minutes, dtype=np.int64)
+    morning = m <= (MORNING_CLOSE + AFTERNOON_OPEN) // 2
+    base = np.where(morning, MORNING_OPEN, AFTERNOON_OPEN)
+    close = np.where(morning, MORNING_CLOSE, AFTERNOON_CLOSE)
+    offset = np.maximum(m - base, 1)
+    return np.minimum(base + (offset + step - 1) // step * step, close)
+
+
+def reduce_bars(bars, keys, ts, label_last=False):
+    n = len(keys)
+    if not n:
+        return {"ts": ts[:0], **{k: bars[k][:0] for k in BAR_FIELDS}}
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    ends = np.append(starts[1:], n)
+    return {
+        "ts": ts[ends - 1] if label_last else ts[starts],
+        "open": bars["open"][starts],
+        "high": np.fmax.reduceat(bars["high"], starts),
+        "low": np.fmin.reduceat(bars["low"], starts),
+        "close": bars["close"][ends - 1],
+        "volume": np.add.reduceat(np.nan_to_num(bars["volume"]), starts),
+    }
+
+
+def resample_minute_bars(bars, step):
+    step = max(1, int(step or 1))
+    if step == 1:
+        return {k: bars[k] for k in ("ts",) + BAR_FIELDS}
+    ts = bars["ts"].astype("datetime64[m]")
+    day = ts.astype("datetime64[D]")
+    minute = (ts - day).astype(np.int64)
+    slot_ts = day.astype("datetime64[m]") + session_slots(minute, step).astype("timedelta64[m]")
+    return reduce_bars(bars, slot_ts.astype(np.int64), slot_ts)
+
+
+def resample_daily_bars(bars):
+    day = bars["ts"].astype("datetime64[D]")
+    return reduce_bars(bars, day.astype(np.int64), day)
+
+
+def resample_calendar_bars(bars, freq):
+    # weeks run Monday..Sunday (1970-01-01 was a Thursday) and are labelled by their last trading day
+    day = bars["ts"].astype("datetime64[D]")
+    if freq == "month":
+        keys = day.astype("datetime64[M]").astype(np.int64)
+    else:
+        keys = (day.astype(np.int64) + 3) // 7
+    return reduce_bars(bars, keys, day, label_last=True)
+
+
+def bars_to_rows(bars, expected_code=None):
+    ts = bars["ts"]
+    cols = [bars[k].tolist() for k in BAR_FIELDS]
+    if ts.dtype == np.dtype("datetime64[D]"):
+        labels = [{"tradeDate": t.replace("-", "")} for t in np.datetime_as_string(ts, unit="D").tolist()]
+    else:
+        labels = [{"time": t.replace("T", " ") + ":00"} for t in np.datetime_as_string(ts, unit="m").tolist()]
+    rows = []
+    for label, *values in zip(labels, *cols):
+        label.update(zip(BAR_FIELDS, values))
+        if expected_code:
+            label["code"] = expected_code
+        rows.append(label)
+    return rows
+
+
+def load_minute_bars(fetch_index_min_list, exponent_id, start_dt, end_dt, expected_code=None):
+    bars = sync_bars(fetch_index_min_list, exponent_id, "1m", start_dt, end_dt, expected_code=expected_code)
+    return slice_bars(bars, start_dt, end_dt)
+
+
+def fetch_period_rows(fetch_index_min_list, exponent_id, start_dt, end_dt, period_minutes, field_list, expected_code=None):
+    # only I/O failures (network or local store) fall back to the upstream period request; any other error is a
+    # local-path bug and reaches the caller
+    try:
+        bars = load_minute_bars(fetch_index_min_list, exponent_id, start_dt, end_dt, expected_code=expected_code)
+    except OSError:
+        return fetch_index_min_list(start_dt.isoformat(), end_dt.isoformat(), exponent_id, period_minutes, field_list)
+    return bars_to_rows(resample_minute_bars(bars, period_minutes))
+
+
+def today_day_bars(fetch_index_min_list, exponent_id, expected_code=None, today=None):
+    today = today or date.today()
+    bars = load_minute_bars(fetch_index_min_list, exponent_id, today, today, expected_code=expected_code)
+    return resample_daily_bars(bars)
+
+
+def load_day_bars(
+    fetch_index_day_list, fetch_index_min_list, exponent_id, start_dt, end_dt, expected_code=None, with_today=True
+):
+    bars = sync_bars(fetch_index_day_list, exponent_id, "day", start_dt, end_dt, expected_code=expected_code)
+    bars = slice_bars(bars, start_dt, end_dt)
+    today = date.today()
+    if not with_today or end_dt < today or today.weekday() >= 5:
+        return bars
+    if len(bars["ts"]) and bars["ts"][-1] >= np.datetime64(today):
+        return bars
+    # the day list only gains today's candle after the close; build the partial one from minute bars
+    try:
+        partial = today_day_bars(fetch_index_min_list, exponent_id, expected_code=expected_code, today=today)
+    except Exception:
+        partial = None
+    if partial is not None and len(partial["ts"]):
+        bars = {k: np.concatenate([bars[k], partial[k].astype(bars[k].dtype)]) for k in ("ts",) + BAR_FIELDS}
+    return bars
+
+
+def load_day_rows(
+    fetch_index_day_list, fetch_index_min_list, exponent_id, start_dt, end_dt, expected_code=None, with_today=True
+):
+    bars = load_day_bars(
+        fetch_index_day_list, fetch_index_min_list, exponent_id, start_dt, end_dt, expected_code, with_today
+    )
+    return bars_to_rows(bars, expected_code=expected_code)
+
+
+def load_calendar_bars(
+    fetch_index_day_list, fetch_index_min_list, exponent_id, freq, start_dt, end_dt, expected_code=None
+):
+    bars = load_day_bars(fetch_index_day_list, fetch_index_min_list, exponent_id, start_dt, end_dt, expected_code)
+    return resample_calendar_bars(bars, freq)
+
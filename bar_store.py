@@ -0,0 +1,220 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from local_store import get_store_path, path_lock, write_npz
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+TIME_UNITS = {"1m": "datetime64[m]", "day": "datetime64[D]"}
+
+
+def bar_store_path(exponent_id, freq):
+    return get_store_path("bars", f"{exponent_id}_{freq}.npz")
+
+
+def empty_bars(freq):
+    bars = {"ts": np.array([], dtype=TIME_UNITS[freq])}
+    for k in BAR_FIELDS:
+        bars[k] = np.array([], dtype=np.float64)
+    bars["checked"] = np.array([], dtype="datetime64[D]")
+    return bars
+
+
+def load_bars(exponent_id, freq):
+    try:
+        with np.load(bar_store_path(exponent_id, freq)) as f:
+            bars = {k: f[k] for k in f.files}
+    except FileNotFoundError:
+        return empty_bars(freq)
+    except Exception:
+        return empty_bars(freq)
+    for k, v in empty_bars(freq).items():
+        bars.setdefault(k, v)
+    return bars
+
+
+def save_bars(exponent_id, freq, bars):
+    # stores only ever grow, so folding in what another writer saved meanwhile keeps both writers' bars
+    path = bar_store_path(exponent_id, freq)
+    with path_lock(path):
+        bars = merge_bars(load_bars(exponent_id, freq), bars)
+        write_npz(path, bars)
+    return bars
+
+
+def merge_bars(old, new):
+    ts = np.concatenate([old["ts"], new["ts"]])
+    if not len(ts):
+        out = dict(old)
+        out["checked"] = np.union1d(old["checked"], new.get("checked", old["checked"][:0]))
+        return out
+    # np.unique keeps the first occurrence, so reverse to let new bars win
+    rev_ts = ts[::-1]
+    _, first = np.unique(rev_ts, return_index=True)
+    keep = len(ts) - 1 - first
+    out = {"ts": ts[keep]}
+    for k in BAR_FIELDS:
+        out[k] = np.concatenate([old[k], new[k]])[keep]
+    out["checked"] = np.union1d(old["checked"], new.get("checked", old["checked"][:0]))
+    return out
+
+
+def slice_bars(bars, start_dt=None, end_dt=None):
+    ts = bars["ts"]
+    lo = 0
+    hi = len(ts)
+    if start_dt is not None:
+        lo = int(np.searchsorted(ts, np.datetime64(start_dt.isoformat()).astype(ts.dtype), side="left"))
+    if end_dt is not None:
+        end_next = np.datetime64((end_dt + timedelta(days=1)).isoformat()).astype(ts.dtype)
+        hi = int(np.searchsorted(ts, end_next, side="left"))
+    out = {"ts": ts[lo:hi]}
+    for k in BAR_FIELDS:
+        out[k] = bars[k][lo:hi]
+    return out
+
+
+def get_first_value(d, keys):
+    if not isinstance(d, dict):
+        return None
+    for k in keys:
+        if k in d and d.get(k) is not None:
+            return d.get(k)
+    return None
+
+
+def to_float(v):
+    if v is None:
+        return None
+    try:
+        return float(v)
+    except Exception:
+        return None
+
+
+def normalize_date_text(v):
+    if v is None:
+        return None
+    text = str(v).strip()
+    if "T" in text:
+        text = text.split("T", 1)[0]
+    if " " in text:
+        text = text.split(" ", 1)[0]
+    if len(text) == 8 and text.isdigit():
+        return f"{text[:4]}-{text[4:6]}-{text[6:]}"
+    if len(text) == 10 and text[4] in "-/" and text[7] in "-/":
+        return text.replace("/", "-")
+    return None
+
+
+def parse_minute_timestamp(item):
+    x_val = get_first_value(
+        item, ["time", "dateTime", "datetime", "tradeDateTime", "tradeDatetime", "tradeTime"]
+    )
+    if x_val is None:
+        return None
+    text = str(x_val).strip().replace("T", " ").split(".", 1)[0]
+    if " " in text:
+        d, t = text.split(" ", 1)
+        d = normalize_date_text(d)
+        t = t.strip()[:5]
+    else:
+        d = normalize_date_text(get_first_value(item, ["tradeDate", "trade_date", "date"]))
+        if len(text) in (4, 6) and text.isdigit():
+            t = f"{text[:2]}:{text[2:4]}"
+        elif ":" in text:
+            t = text[:5]
+        else:
+            return None
+    if not d or len(t) != 5:
+        return None
+    return f"{d}T{t}"
+
+
+def parse_bar_rows(data_list, freq, expected_code=None):
+    ts = []
+    cols = {k: [] for k in BAR_FIELDS}
+    for item in data_list or []:
+        if not isinstance(item, dict):
+            continue
+        if expected_code:
+            item_code = item.get("code")
+            if item_code and str(item_code) != str(expected_code):
+                continue
+        if freq == "day":
+            t = normalize_date_text(
+                get_first_value(item, ["tradeDate", "trade_date", "date", "datetime", "dateTime", "time"])
+            )
+        else:
+            t = parse_minute_timestamp(item)
+        c = to_float(get_first_value(item, ["close", "closePrice", "close_price", "price", "last"]))
+        if t is None or c is None:
+            continue
+        o = to_float(get_first_value(item, ["open", "openPrice", "open_price"]))
+        h = to_float(get_first_value(item, ["high", "highPrice", "high_price"]))
+        l = to_float(get_first_value(item, ["low", "lowPrice", "low_price"]))
+        v = to_float(get_first_value(item, ["volume", "vol"]))
+        o = c if o is None else o
+        ts.append(t)
+        cols["open"].append(o)
+        cols["high"].append(max(x for x in (o, c, h) if x is not None))
+        cols["low"].append(min(x for x in (o, c, l) if x is not None))
+        cols["close"].append(c)
+        cols["volume"].append(0.0 if v is None else max(0.0, v))
+    bars = {"ts": np.array(ts, dtype=TIME_UNITS[freq])}
+    for k in BAR_FIELDS:
+        bars[k] = np.array(cols[k], dtype=np.float64)
+    order = np.argsort(bars["ts"], kind="stable")
+    for k in list(bars.keys()):
+        bars[k] = bars[k][order]
+    bars["checked"] = np.array([], dtype="datetime64[D]")
+    return bars
+
+
+def iter_missing_ranges(checked, start_dt, end_dt, chunk_days):
+    today = date.today()
+    checked_set = set(checked.astype("datetime64[D]").astype(str).tolist())
+    run = []
+    current = start_dt
+    while current <= end_dt:
+        if current.weekday() < 5 and (current >= today or current.isoformat() not in checked_set):
+            run.append(current)
+        elif current.weekday() < 5 and run:
+            yield run[0], run[-1]
+            run = []
+        if run and (run[-1] - run[0]).days + 1 >= chunk_days:
+            yield run[0], run[-1]
+            run = []
+        current = current + timedelta(days=1)
+    if run:
+        yield run[0], run[-1]
+
+
+def sync_bars(fetch_func, exponent_id, freq, start_dt, end_dt, chunk_days=None, expected_code=None, progress=None):
+    if chunk_days is None:
+        chunk_days = 7 if freq == "1m" else 366
+    bars = load_bars(exponent_id, freq)
+    ranges = list(iter_missing_ranges(bars["checked"], start_dt, end_dt, chunk_days))
+    if not ranges:
+        return bars
+    checked_count = len(bars["checked"])
+    today = date.today()
+    for i, (a, b) in enumerate(ranges):
+        if freq == "1m":
+            data_list = fetch_func(a.isoformat(), b.isoformat(), exponent_id, 1, "time,open,high,low,close,volume")
+        else:
+            data_list = fetch_func(a.isoformat(), b.isoformat(), str(exponent_id), "open,high,low,close,volume")
+        new = parse_bar_rows(data_list, freq, expected_code=expected_code)
+        done = []
+        d = a
+        while d <= b and d < today:
+            done.append(d.isoformat())
+            d = d + timedelta(days=1)
+        new["checked"] = np.array(done, dtype="datetime64[D]")
+        bars = merge_bars(bars, new)
+        if progress is not None:
+            progress((i + 1) / len(ranges))
+    # today is refetched on every call, so the file is only rewritten once a settled day has been checked
+    if len(bars["checked"]) != checked_count:
+        bars = save_bars(exponent_id, freq, bars)
+    return bars
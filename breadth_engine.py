@@ -0,0 +1,256 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+from security_master import build_security_master, get_security_master, lookup_ids
+
+BREADTH_CATEGORIES = [
+    ">30%",
+    "30%",
+    "20%",
+    "10%",
+    "7%",
+    "4%",
+    "2%",
+    "0%",
+    "-2%",
+    "-4%",
+    "-7%",
+    "-10%",
+    "-20%",
+    "-30%",
+    "<-30%",
+]
+UP_BUCKETS = {">30%", "30%", "20%", "10%", "7%", "4%", "2%"}
+DOWN_BUCKETS = {"-2%", "-4%", "-7%", "-10%", "-20%", "-30%", "<-30%"}
+FLAT_BUCKET = "0%"
+
+# bucket edges in cents of |pct|, right-closed on both sides of zero
+BUCKET_EDGES_CENTS = np.array([200, 400, 700, 1000, 2000, 3000], dtype=np.int64)
+PCT_CLAMP_CENTS = 3000
+BREADTH_INPUT_FIELDS = ("close", "pre_close", "limit_up", "limit_down", "volume")
+
+
+def bucket_colors(categories=None):
+    colors = []
+    for name in categories or BREADTH_CATEGORIES:
+        if name in UP_BUCKETS:
+            colors.append("#E94B3C")
+        elif name in DOWN_BUCKETS:
+            colors.append("#2EBD85")
+        else:
+            colors.append("#999999")
+    return colors
+
+
+def get_first_value(d, keys):
+    if not isinstance(d, dict):
+        return None
+    for k in keys:
+        if k in d and d.get(k) is not None:
+            return d.get(k)
+    return None
+
+
+def numeric_values(values):
+    try:
+        return np.array(values, dtype=np.float64), np.zeros(len(values), dtype=bool)
+    except (TypeError, ValueError):
+        pass
+    out = np.full(len(values), np.nan)
+    bad = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        if v is None:
+            continue
+        try:
+            out[i] = float(v)
+        except Exception:
+            bad[i] = True
+    return out, bad
+
+
+def decimal_cents(text):
+    try:
+        return int(Decimal(str(text)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+    except Exception:
+        return None
+
+
+def to_cents(values):
+    # ROUND_HALF_UP of each value's shortest decimal repr, exact Decimal only near ties
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    scaled = np.abs(np.where(valid, values, 0.0)) * 100.0
+    cents = np.floor(scaled + 0.5)
+    tie = valid & (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    cents = np.where(valid, np.sign(np.where(valid, values, 0.0)) * cents, 0.0).astype(np.int64)
+    for i in np.flatnonzero(tie):
+        exact = decimal_cents(float(values[i]))
+        if exact is not None:
+            cents[i] = exact
+    return cents, valid
+
+
+def bucket_index_of_cents(pct_cents):
+    k = np.searchsorted(BUCKET_EDGES_CENTS, np.abs(pct_cents), side="left")
+    return np.where(pct_cents > 0, 6 - k, np.where(pct_cents < 0, 8 + k, 7))
+
+
+def median_of_cents(pct_cents):
+    n = len(pct_cents)
+    if not n:
+        return None
+    if n % 2 == 1:
+        return float(np.partition(pct_cents, n // 2)[n // 2]) / 100.0
+    part = np.partition(pct_cents, [n // 2 - 1, n // 2])
+    return (float(part[n // 2 - 1]) / 100.0 + float(part[n // 2]) / 100.0) / 2.0
+
+
+SNAPSHOT_NUMERIC_FIELDS = {
+    "close": ["close", "closePrice", "price"],
+    "pre_close": ["preClose", "pre_close", "lastClose", "prevClose"],
+    "limit_up": ["limitUpPrice"],
+    "limit_down": ["limitDownPrice"],
+    "volume": ["volume", "vol"],
+    "amount": ["amount", "turnover"],
+    "open": ["open", "openPrice"],
+    "high": ["high", "highPrice"],
+    "low": ["low", "lowPrice"],
+}
+
+
+def extract_column(rows, keys):
+    values = [item.get(keys[0]) for item in rows]
+    missing = [i for i, v in enumerate(values) if v is None]
+    for k in keys[1:]:
+        if not missing:
+            break
+        still = []
+        for i in missing:
+            v = rows[i].get(k)
+            if v is None:
+                still.append(i)
+            else:
+                values[i] = v
+        missing = still
+    return values
+
+
+def snapshot_columns(data_list, fields=None):
+    rows = [item for item in (data_list or []) if isinstance(item, dict)]
+    code_text = np.array(
+        ["" if v is None else str(v).strip() for v in extract_column(rows, ["stockCode", "code"])], dtype=object
+    )
+    cols = {
+        "code": code_text,
+        "valid_code": np.array([c.isdigit() for c in code_text], dtype=bool),
+        "name": np.array(
+            ["" if v is None else str(v).strip() for v in extract_column(rows, ["stockName", "name"])], dtype=object
+        ),
+        "rows": rows,
+    }
+    for key, keys in SNAPSHOT_NUMERIC_FIELDS.items():
+        if fields is not None and key not in fields:
+            continue
+        cols[key], cols[f"{key}_bad"] = numeric_values(extract_column(rows, keys))
+    return cols
+
+
+def sample_rows(cols, master):
+    ids = lookup_ids(master, cols["code"])
+    valid = cols["valid_code"] & (ids >= 0)
+    is_bshare = valid & master["is_b_share"][ids]
+    candidates = np.flatnonzero(valid & ~is_bshare)
+    _, first_pos = np.unique(ids[candidates], return_index=True)
+    rows = np.sort(candidates[first_pos])
+    return rows, ids[rows], int(np.count_nonzero(is_bshare))
+
+
+def row_breadth(cols, rows, row_ids, master):
+    active = cols["volume"][rows] > 0
+
+    close = cols["close"][rows]
+    pre_close = cols["pre_close"][rows]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        raw = (close / pre_close - 1.0) * 100.0
+    has_raw = ~np.isnan(close) & ~np.isnan(pre_close) & (pre_close > 0)
+    pct_cents, _ = to_cents(np.where(has_raw, raw, np.nan))
+    has_pct = has_raw.copy()
+    for i in np.flatnonzero(active & ~has_raw):
+        text = get_first_value(cols["rows"][rows[i]], ["changePercent", "pct_chg", "change_percent"])
+        if text is None or str(text).strip() == "":
+            continue
+        cents = decimal_cents(text)
+        if cents is not None:
+            pct_cents[i] = cents
+            has_pct[i] = True
+    has_pct &= active
+    pct_cents = np.clip(pct_cents, -PCT_CLAMP_CENTS, PCT_CLAMP_CENTS)
+    bucket = np.where(has_pct, bucket_index_of_cents(pct_cents), -1)
+
+    parse_ok = ~(cols["close_bad"][rows] | cols["limit_up_bad"][rows] | cols["limit_down_bad"][rows])
+    limit_eligible = master["is_a_share"][row_ids] & ~master["is_new"][row_ids]
+    close_cents, close_ok = to_cents(close)
+    up_cents, up_ok = to_cents(cols["limit_up"][rows])
+    dn_cents, dn_ok = to_cents(cols["limit_down"][rows])
+    base = active & parse_ok & limit_eligible & close_ok
+    return {
+        "active": active,
+        "has_pct": has_pct,
+        "pct_cents": pct_cents,
+        "bucket": bucket,
+        "limit_up": base & up_ok & (close_cents == up_cents),
+        "limit_down": base & dn_ok & (close_cents == dn_cents),
+    }
+
+
+def compute_breadth(data_list, master=None, trade_date=None):
+    cols = snapshot_columns(data_list, BREADTH_INPUT_FIELDS)
+    if master is None and trade_date is not None:
+        master = get_security_master(trade_date, cols["code"], cols["name"])
+    elif master is None:
+        master = build_security_master(cols["code"], cols["name"])
+    rows, row_ids, bshare_filtered = sample_rows(cols, master)
+
+    actual_date_text = None
+    for i in rows:
+        v = get_first_value(cols["rows"][i], ["dealDate", "tradeDate", "date"])
+        if v is not None:
+            actual_date_text = v
+            break
+
+    attrs = row_breadth(cols, rows, row_ids, master)
+    pct_cents = attrs["pct_cents"][attrs["has_pct"]]
+    values = np.bincount(attrs["bucket"][attrs["has_pct"]], minlength=len(BREADTH_CATEGORIES))
+    median_val = median_of_cents(pct_cents)
+    return {
+        "categories": list(BREADTH_CATEGORIES),
+        "values": [int(v) for v in values],
+        "limit_up_count": int(np.count_nonzero(attrs["limit_up"])),
+        "limit_down_count": int(np.count_nonzero(attrs["limit_down"])),
+        "halt_count": int(np.count_nonzero(~attrs["active"])),
+        "median": 0.0 if median_val is None else median_val,
+        "actual_date_text": actual_date_text,
+        "sample_count": int(len(rows)),
+        "bshare_filtered": bshare_filtered,
+    }
+
+
+def summarize_breadth(breadth):
+    categories = breadth.get("categories") or BREADTH_CATEGORIES
+    values = breadth.get("values") or []
+    up_count = sum(v for c, v in zip(categories, values) if c in UP_BUCKETS)
+    down_count = sum(v for c, v in zip(categories, values) if c in DOWN_BUCKETS)
+    flat_count = sum(v for c, v in zip(categories, values) if c == FLAT_BUCKET)
+    halt = breadth.get("halt_count") or 0
+    total_all = max(up_count + down_count + flat_count + halt, 1)
+    return {
+        "up": up_count,
+        "down": down_count,
+        "flat": flat_count,
+        "halt": halt,
+        "limit_up": breadth.get("limit_up_count") or 0,
+        "limit_down": breadth.get("limit_down_count") or 0,
+        "median": breadth.get("median") or 0.0,
+        "strength": round((up_count - down_count) * 100.0 / total_all, 2),
+    }
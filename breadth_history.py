@@ -0,0 +1,121 @@
+import threading
+from datetime import date, datetime, timedelta
+
+from breadth_engine import compute_breadth, summarize_breadth
+from fetch_pool import map_limited
+from local_store import get_store_path, read_json, write_json
+
+BREADTH_FIELD_LIST = "stockCode,stockName,close,preClose,limitUpPrice,limitDownPrice,volume"
+SESSION_CLOSE_MINUTE = 15 * 60
+
+_written_records = {}
+_written_lock = threading.Lock()
+
+
+def breadth_history_path():
+    return get_store_path("breadth", "daily.json")
+
+
+def load_breadth_history():
+    payload = read_json(breadth_history_path(), default=None)
+    if not isinstance(payload, dict):
+        payload = {}
+    payload.setdefault("records", {})
+    payload.setdefault("checked", [])
+    return payload
+
+
+def save_breadth_history(payload):
+    payload["checked"] = sorted(set(payload.get("checked") or []))
+    write_json(breadth_history_path(), payload)
+
+
+def normalize_record_date(text, fallback):
+    t = str(text or "").strip()
+    if len(t) == 8 and t.isdigit():
+        return f"{t[:4]}-{t[4:6]}-{t[6:]}"
+    if len(t) >= 10 and t[4] in "-/" and t[7] in "-/":
+        return t[:10].replace("/", "-")
+    return fallback
+
+
+def breadth_record(breadth, deal_date_str):
+    record = summarize_breadth(breadth)
+    record["date"] = normalize_record_date(breadth.get("actual_date_text"), deal_date_str)
+    record["sample"] = breadth.get("sample_count") or 0
+    return record
+
+
+def list_weekdays(end_dt, days):
+    out = []
+    current = end_dt
+    while len(out) < days:
+        if current.weekday() < 5:
+            out.append(current.isoformat())
+        current = current - timedelta(days=1)
+    return out[::-1]
+
+
+def missing_dates(payload, dates):
+    today = date.today().isoformat()
+    checked = set(payload.get("checked") or [])
+    return [d for d in dates if d >= today or d not in checked]
+
+
+def backfill_breadth_history(request_stock_list, dates, max_workers=4, rate_per_sec=2.0, on_progress=None):
+    payload = load_breadth_history()
+    todo = missing_dates(payload, dates)
+    if not todo:
+        return payload, []
+
+    def fetch_one(deal_date_str):
+        data_list = request_stock_list(deal_date_str, BREADTH_FIELD_LIST, "1")
+        if not data_list:
+            return None
+        return breadth_record(compute_breadth(data_list, trade_date=deal_date_str), deal_date_str)
+
+    def on_done(done, total, deal_date_str, record, error):
+        if on_progress is not None:
+            on_progress(done, total, deal_date_str)
+
+    results, errors = map_limited(fetch_one, todo, max_workers=max_workers, rate_per_sec=rate_per_sec, on_done=on_done)
+    today = date.today().isoformat()
+    failed = []
+    for deal_date_str, record, error in zip(todo, results, errors):
+        if error is not None:
+            failed.append((deal_date_str, error))
+            continue
+        if record is not None and record["date"] <= deal_date_str:
+            payload["records"][record["date"]] = record
+        if deal_date_str < today:
+            payload["checked"].append(deal_date_str)
+    save_breadth_history(payload)
+    return payload, failed
+
+
+def breadth_series(payload, start_key=None, end_key=None):
+    records = payload.get("records") or {}
+    keys = sorted(k for k in records if (start_key is None or k >= start_key) and (end_key is None or k <= end_key))
+    return keys, [records[k] for k in keys]
+
+
+def is_settled(date_key, now=None):
+    now = now or datetime.now()
+    return date_key < now.date().isoformat() or now.hour * 60 + now.minute >= SESSION_CLOSE_MINUTE
+
+
+def upsert_breadth_record(record):
+    # today's record moves with every render until the close, so only settled days are written, and each once
+    key = record["date"]
+    if not is_settled(key):
+        return None
+    with _written_lock:
+        if _written_records.get(key) == record:
+            return None
+    payload = load_breadth_history()
+    if payload["records"].get(key) != record:
+        payload["records"][key] = record
+        save_breadth_history(payload)
+    with _written_lock:
+        _written_records[key] = record
+    return payload
@@ -0,0 +1,198 @@
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from breadth_engine import (
+    BREADTH_CATEGORIES,
+    BREADTH_INPUT_FIELDS,
+    PCT_CLAMP_CENTS,
+    row_breadth,
+    sample_rows,
+    snapshot_columns,
+    summarize_breadth,
+)
+from breadth_history import BREADTH_FIELD_LIST
+from local_store import get_store_path, read_json, write_json
+from security_master import get_security_master
+
+BREADTH_POLL_SECONDS = 60
+POLLER_CACHE_DAYS = 3
+TRADING_WINDOWS = ((9 * 60 + 15, 11 * 60 + 31), (12 * 60 + 59, 15 * 60 + 1))
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+def intraday_curve_path(trade_date):
+    return get_store_path("breadth", f"intraday_{trade_date}.json")
+
+
+def is_trading_time(now=None):
+    now = now or datetime.now()
+    if now.weekday() >= 5:
+        return False
+    minute = now.hour * 60 + now.minute
+    return any(lo <= minute <= hi for lo, hi in TRADING_WINDOWS)
+
+
+def new_poller_state(trade_date):
+    return {
+        "date": str(trade_date),
+        "master": None,
+        "lock": threading.Lock(),
+        "last_poll": 0.0,
+        "last_poll_text": None,
+        "last_changed": 0,
+        "curve": read_json(intraday_curve_path(trade_date), default={}) or {},
+    }
+
+
+def get_breadth_poller(trade_date):
+    key = str(trade_date)
+    with _pollers_lock:
+        state = _pollers.get(key)
+        if state is None:
+            state = new_poller_state(key)
+            _pollers[key] = state
+            for old_key in sorted(_pollers.keys())[:-POLLER_CACHE_DAYS]:
+                _pollers.pop(old_key, None)
+    return state
+
+
+def reset_poller_arrays(state, master):
+    m = len(master["codes"])
+    state["master"] = master
+    state["inputs"] = {k: np.full(m, np.nan) for k in BREADTH_INPUT_FIELDS}
+    state["bad"] = np.zeros(m, dtype=np.int8)
+    state["present"] = np.zeros(m, dtype=bool)
+    state["active"] = np.zeros(m, dtype=bool)
+    state["has_pct"] = np.zeros(m, dtype=bool)
+    state["pct_cents"] = np.zeros(m, dtype=np.int64)
+    state["bucket"] = np.full(m, -1, dtype=np.int64)
+    state["limit_up"] = np.zeros(m, dtype=bool)
+    state["limit_down"] = np.zeros(m, dtype=bool)
+    state["values"] = np.zeros(len(BREADTH_CATEGORIES), dtype=np.int64)
+    state["hist"] = np.zeros(2 * PCT_CLAMP_CENTS + 1, dtype=np.int64)
+    state["limit_up_count"] = 0
+    state["limit_down_count"] = 0
+    state["halt_count"] = 0
+    state["sample_count"] = 0
+    state["bshare_filtered"] = 0
+
+
+def apply_contribution(state, ids, sign):
+    present = ids[state["present"][ids]]
+    if not len(present):
+        return
+    scored = present[state["has_pct"][present]]
+    state["values"] += sign * np.bincount(state["bucket"][scored], minlength=len(BREADTH_CATEGORIES))
+    state["hist"] += sign * np.bincount(state["pct_cents"][scored] + PCT_CLAMP_CENTS, minlength=len(state["hist"]))
+    state["limit_up_count"] += sign * int(np.count_nonzero(state["limit_up"][present]))
+    state["limit_down_count"] += sign * int(np.count_nonzero(state["limit_down"][present]))
+    state["halt_count"] += sign * int(np.count_nonzero(~state["active"][present]))
+
+
+def apply_snapshot(state, data_list):
+    cols = snapshot_columns(data_list, BREADTH_INPUT_FIELDS)
+    master = get_security_master(state["date"], cols["code"], cols["name"])
+    if master is not state["master"]:
+        reset_poller_arrays(state, master)
+    rows, row_ids, bshare_filtered = sample_rows(cols, master)
+
+    m = len(master["codes"])
+    present = np.zeros(m, dtype=bool)
+    present[row_ids] = True
+    bad = np.zeros(m, dtype=np.int8)
+    bad[row_ids] = (
+        cols["close_bad"][rows].astype(np.int8)
+        | (cols["limit_up_bad"][rows].astype(np.int8) << 1)
+        | (cols["limit_down_bad"][rows].astype(np.int8) << 2)
+    )
+    changed = (present != state["present"]) | (bad != state["bad"])
+    inputs = {}
+    for k in BREADTH_INPUT_FIELDS:
+        values = np.full(m, np.nan)
+        values[row_ids] = cols[k][rows]
+        old = state["inputs"][k]
+        changed |= ~((values == old) | (np.isnan(values) & np.isnan(old)))
+        inputs[k] = values
+    # rows without close/preClose fall back to changePercent, which is not diffed
+    changed |= present & (np.isnan(inputs["close"]) | np.isnan(inputs["pre_close"]))
+    changed_ids = np.flatnonzero(changed)
+
+    apply_contribution(state, changed_ids, -1)
+
+    pos_of_id = np.full(m, -1, dtype=np.int64)
+    pos_of_id[row_ids] = np.arange(len(rows))
+    sel = pos_of_id[changed_ids]
+    sel = sel[sel >= 0]
+    attrs = row_breadth(cols, rows[sel], row_ids[sel], master)
+    target = row_ids[sel]
+    for k in ("active", "has_pct", "pct_cents", "bucket", "limit_up", "limit_down"):
+        state[k][target] = attrs[k]
+    state["present"] = present
+    state["bad"] = bad
+    state["inputs"] = inputs
+
+    apply_contribution(state, changed_ids, 1)
+    state["sample_count"] = int(len(rows))
+    state["bshare_filtered"] = bshare_filtered
+    state["last_changed"] = int(len(changed_ids))
+    return len(changed_ids)
+
+
+def median_from_hist(hist):
+    n = int(hist.sum())
+    if not n:
+        return None
+    cum = np.cumsum(hist)
+    lo = int(np.searchsorted(cum, (n - 1) // 2 + 1)) - PCT_CLAMP_CENTS
+    if n % 2 == 1:
+        return float(lo) / 100.0
+    hi = int(np.searchsorted(cum, n // 2 + 1)) - PCT_CLAMP_CENTS
+    return (float(lo) / 100.0 + float(hi) / 100.0) / 2.0
+
+
+def poller_breadth(state):
+    median_val = median_from_hist(state["hist"])
+    return {
+        "categories": list(BREADTH_CATEGORIES),
+        "values": [int(v) for v in state["values"]],
+        "limit_up_count": int(state["limit_up_count"]),
+        "limit_down_count": int(state["limit_down_count"]),
+        "halt_count": int(state["halt_count"]),
+        "median": 0.0 if median_val is None else median_val,
+        "actual_date_text": state["date"],
+        "sample_count": int(state["sample_count"]),
+        "bshare_filtered": int(state["bshare_filtered"]),
+    }
+
+
+def poll_breadth(state, request_stock_list, cadence_seconds=BREADTH_POLL_SECONDS, force=False):
+    if not force and time.monotonic() - state["last_poll"] < cadence_seconds:
+        return False
+    if not state["lock"].acquire(blocking=False):
+        return False
+    try:
+        if not force and time.monotonic() - state["last_poll"] < cadence_seconds:
+            return False
+        data_list = request_stock_list(state["date"], BREADTH_FIELD_LIST, "1")
+        state["last_poll"] = time.monotonic()
+        if not data_list:
+            return False
+        apply_snapshot(state, data_list)
+        now = datetime.now()
+        state["last_poll_text"] = now.strftime("%H:%M:%S")
+        record = summarize_breadth(poller_breadth(state))
+        state["curve"][now.strftime("%H:%M")] = record
+        write_json(intraday_curve_path(state["date"]), state["curve"])
+        return True
+    finally:
+        state["lock"].release()
+
+
+def intraday_curve_series(state):
+    keys = sorted(state.get("curve") or {})
+    return keys, [state["curve"][k] for k in keys]
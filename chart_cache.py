@@ -0,0 +1,76 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+OPTION_CACHE_SIZE = 256
+
+_option_cache = OrderedDict()
+_latest_by_chart = {}
+_option_lock = threading.Lock()
+
+
+def part_bytes(part):
+    if isinstance(part, np.ndarray) and part.dtype.kind == "O":
+        # object buffers hold pointers, so hash the values themselves
+        return str(part.shape).encode() + repr(part.tolist()).encode()
+    if isinstance(part, np.ndarray):
+        return str((part.dtype, part.shape)).encode() + np.ascontiguousarray(part).tobytes()
+    if isinstance(part, (list, tuple)) and part:
+        # numeric and label lists are the bulk of chart inputs; hash their buffers instead of repr()
+        if all(isinstance(p, str) for p in part):
+            return "\x1f".join(part).encode()
+        try:
+            arr = np.asarray(part, dtype=np.float64)
+            return str(arr.shape).encode() + arr.tobytes()
+        except (TypeError, ValueError):
+            pass
+    return repr(part).encode()
+
+
+def data_digest(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part_bytes(part))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def serialize_option(option):
+    return json.dumps(option, ensure_ascii=False, separators=(",", ":"))
+
+
+def cached_option(chart_id, builder, *args, version=None, **kwargs):
+    # the returned option is shared process-wide across sessions and reruns: treat it as read-only
+    # (copy before changing anything) so a hit costs only the key digest
+    names = sorted(kwargs)
+    if version is None:
+        version = data_digest(*args)
+    key = (chart_id, version, data_digest(names, *[kwargs[k] for k in names]) if kwargs else "")
+    with _option_lock:
+        entry = _option_cache.get(key)
+        if entry is not None:
+            _option_cache.move_to_end(key)
+            entry["hits"] += 1
+            _latest_by_chart[chart_id] = entry
+    if entry is not None:
+        return entry["option"]
+    option = builder(*args, **kwargs)
+    entry = {
+        "option": option,
+        "digest": hashlib.blake2b(serialize_option(option).encode(), digest_size=16).hexdigest(),
+        "hits": 0,
+    }
+    with _option_lock:
+        _option_cache[key] = entry
+        _latest_by_chart[chart_id] = entry
+        while len(_option_cache) > OPTION_CACHE_SIZE:
+            _option_cache.popitem(last=False)
+    return option
+
+
+def latest_option_entry(chart_id):
+    with _option_lock:
+        return _latest_by_chart.get(chart_id)
@@ -0,0 +1,81 @@
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+from streamlit_echarts import st_echarts
+
+CHART_STREAM_ENABLED = os.getenv("DJ_CHART_STREAM", "1").strip() != "0"
+STREAM_COMPONENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "echarts_stream")
+ECHARTS_LOCAL_FILE = "echarts.min.js"
+ECHARTS_CDN_URL = "https://cdn.jsdelivr.net/npm/echarts@5/dist/echarts.min.js"
+STREAM_TAIL_ROWS = 5
+
+
+def default_echarts_src():
+    # a copy shipped next to index.html is served from the component's own path and works offline
+    if os.path.exists(os.path.join(STREAM_COMPONENT_DIR, ECHARTS_LOCAL_FILE)):
+        return ECHARTS_LOCAL_FILE
+    return ECHARTS_CDN_URL
+
+
+ECHARTS_SRC = os.getenv("DJ_ECHARTS_URL", "").strip() or default_echarts_src()
+
+_stream_component = components.declare_component("echarts_stream", path=STREAM_COMPONENT_DIR)
+
+
+def split_dataset(option):
+    dataset = option.get("dataset") if isinstance(option, dict) else None
+    if not isinstance(dataset, dict) or not isinstance(dataset.get("source"), list):
+        return option, None
+    shell = dict(option)
+    shell["dataset"] = {k: v for k, v in dataset.items() if k != "source"}
+    return shell, dataset["source"]
+
+
+def patch_start(old_rows, new_rows, tail=STREAM_TAIL_ROWS):
+    # rows before the returned index are unchanged; None means the history itself moved.
+    # Downsampled histories use fixed buckets anchored at bar 0 (downsample.stable_width), so a new bar only
+    # touches the last few rows; a full resend happens when the bucket width doubles.
+    start = max(0, len(old_rows) - tail)
+    if len(new_rows) < start or new_rows[:start] != old_rows[:start]:
+        return None
+    end = min(len(old_rows), len(new_rows))
+    while start < end and old_rows[start] == new_rows[start]:
+        start += 1
+    return start
+
+
+def stream_payload(state, option, resync=False):
+    shell, rows = split_dataset(option)
+    old_rows = state.get("rows")
+    start = None
+    if not resync and rows is not None and old_rows is not None and shell == state.get("shell"):
+        start = patch_start(old_rows, rows)
+    if start is not None and start == len(rows) == len(old_rows):
+        version = state["version"]
+        return {"mode": "patch", "base": version, "version": version, "start": start, "rows": []}
+    state["seq"] = state.get("seq", 0) + 1
+    version = str(state["seq"])
+    base = state.get("version")
+    state.update({"shell": shell, "rows": rows, "version": version})
+    if start is None:
+        return {"mode": "full", "version": version, "option": option}
+    return {"mode": "patch", "base": base, "version": version, "start": start, "rows": rows[start:]}
+
+
+def st_echarts_stream(option, height="320px", key=None):
+    if not CHART_STREAM_ENABLED or not key:
+        return st_echarts(option, height=height, key=key)
+    states = st.session_state.setdefault("chart_stream_state", {})
+    state = states.setdefault(key, {})
+    request = st.session_state.get(key)
+    if isinstance(request, dict) and request.get("fallback"):
+        # the browser could not load ECharts for the component; the packaged streamlit-echarts bundle still works
+        state["fallback"] = True
+    if state.get("fallback"):
+        return st_echarts(option, height=height, key=f"{key}_static")
+    resync = isinstance(request, dict) and request.get("resync") not in (None, state.get("resync"))
+    if resync:
+        state["resync"] = request.get("resync")
+    payload = stream_payload(state, option, resync=resync)
+    return _stream_component(payload=payload, height=height, echarts_src=ECHARTS_SRC, key=key, default=None)
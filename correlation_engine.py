@@ -0,0 +1,145 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+CORR_WINDOWS = {"1分钟": 60, "5分钟": 48, "30分钟": 40, "60分钟": 40, "日线": 60}
+CORR_LOOKBACK_DAYS = {"1分钟": 3, "5分钟": 10, "30分钟": 45, "60分钟": 90, "日线": 365}
+CORR_MIN_OBS = 5
+CORR_METRICS = {"相关系数": "corr", "贝塔": "beta"}
+
+_matrix_states = {}
+_matrix_lock = threading.Lock()
+
+
+def step_returns(close):
+    out = np.full(close.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[1:] = (close[1:] / close[:-1] - 1.0) * 100.0
+    return out
+
+
+def rolling_moments(returns, window):
+    # window sums of n, r and r r^T via prefix sums; a row counts only when every index has a return
+    t, k = returns.shape
+    ok = ~np.isnan(returns).any(axis=1)
+    r = np.where(ok[:, None], returns, 0.0)
+    c_n = np.concatenate([[0], np.cumsum(ok)])
+    c_1 = np.vstack([np.zeros((1, k)), np.cumsum(r, axis=0)])
+    c_2 = np.concatenate([np.zeros((1, k, k)), np.cumsum(r[:, :, None] * r[:, None, :], axis=0)])
+    lo = np.maximum(np.arange(1, t + 1) - window, 0)
+    return c_n[1:] - c_n[lo], c_1[1:] - c_1[lo], c_2[1:] - c_2[lo]
+
+
+def moments_to_matrices(n, s1, s2):
+    n = np.asarray(n, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = s1 / n[..., None]
+        cov = s2 / n[..., None, None] - mean[..., :, None] * mean[..., None, :]
+        var = np.diagonal(cov, axis1=-2, axis2=-1)
+        corr = cov / np.sqrt(var[..., :, None] * var[..., None, :])
+        # beta[i, j]: sensitivity of index i to index j
+        beta = cov / var[..., None, :]
+    short = n < CORR_MIN_OBS
+    corr[short] = np.nan
+    beta[short] = np.nan
+    return np.clip(corr, -1.0, 1.0), beta
+
+
+def new_matrix_state(window):
+    return {
+        "window": window,
+        "keys": None,
+        "last_close": None,
+        "rows": deque(),
+        "n": 0,
+        "s1": None,
+        "s2": None,
+        "corr": None,
+        "beta": None,
+    }
+
+
+def rebuild_state(state, keys, close):
+    returns = step_returns(close)
+    n, s1, s2 = rolling_moments(returns, state["window"])
+    corr, beta = moments_to_matrices(n, s1, s2)
+    tail = returns[-state["window"] :]
+    state.update(
+        keys=keys,
+        last_close=close[-1] if len(close) else None,
+        rows=deque(r for r in tail),
+        n=int(n[-1]) if len(n) else 0,
+        s1=s1[-1] if len(s1) else np.zeros(close.shape[1]),
+        s2=s2[-1] if len(s2) else np.zeros((close.shape[1], close.shape[1])),
+        corr=corr,
+        beta=beta,
+    )
+
+
+def push_row(state, ret):
+    rows = state["rows"]
+    rows.append(ret)
+    if not np.isnan(ret).any():
+        state["n"] += 1
+        state["s1"] = state["s1"] + ret
+        state["s2"] = state["s2"] + np.outer(ret, ret)
+    if len(rows) > state["window"]:
+        old = rows.popleft()
+        if not np.isnan(old).any():
+            state["n"] -= 1
+            state["s1"] = state["s1"] - old
+            state["s2"] = state["s2"] - np.outer(old, old)
+
+
+def append_rows(state, keys, close, start):
+    corr_rows, beta_rows = [], []
+    prev = state["last_close"]
+    for i in range(start, len(keys)):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = (close[i] / prev - 1.0) * 100.0
+        push_row(state, ret)
+        prev = close[i]
+        corr, beta = moments_to_matrices(state["n"], state["s1"], state["s2"])
+        corr_rows.append(corr)
+        beta_rows.append(beta)
+    state["keys"] = keys
+    state["last_close"] = prev
+    state["corr"] = np.concatenate([state["corr"], corr_rows])
+    state["beta"] = np.concatenate([state["beta"], beta_rows])
+
+
+def matches_prefix(state, keys, close):
+    old = state["keys"]
+    if old is None or not len(old) or len(keys) < len(old) or old.dtype != keys.dtype:
+        return False
+    m = len(old)
+    if keys[0] != old[0] or keys[m - 1] != old[-1]:
+        return False
+    return np.array_equal(close[m - 1], state["last_close"], equal_nan=True)
+
+
+def update_matrix_state(state, keys, close):
+    # history is committed up to the second-to-last bar; the forming last bar is recomputed every call
+    committed = max(len(keys) - 1, 0)
+    if matches_prefix(state, keys[:committed], close[:committed]):
+        if committed > len(state["keys"]):
+            append_rows(state, keys[:committed], close[:committed], len(state["keys"]))
+    else:
+        rebuild_state(state, keys[:committed], close[:committed])
+    if committed == len(keys):
+        return state["corr"], state["beta"]
+    tmp = dict(state, rows=deque(state["rows"]), corr=state["corr"][:0], beta=state["beta"][:0])
+    if tmp["last_close"] is None:
+        tmp["last_close"] = np.full(close.shape[1], np.nan)
+    append_rows(tmp, keys, close, committed)
+    return np.concatenate([state["corr"], tmp["corr"]]), np.concatenate([state["beta"], tmp["beta"]])
+
+
+def rolling_matrices(state_key, window, keys, close):
+    with _matrix_lock:
+        state = _matrix_states.get(state_key)
+        if state is None or state["window"] != window:
+            state = new_matrix_state(window)
+            _matrix_states[state_key] = state
+        return update_matrix_state(state, keys, close)
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import streamlit as st
+
+GRAPH_MAX_NODES = 256
+
+
+def new_graph(max_nodes=GRAPH_MAX_NODES):
+    return {"nodes": {}, "seq": 0, "tick": 0, "max_nodes": int(max_nodes), "lock": threading.RLock()}
+
+
+def session_graph(name):
+    graphs = st.session_state.setdefault("dataflow_graphs", {})
+    graph = graphs.get(name)
+    if graph is None:
+        graph = new_graph()
+        graphs[name] = graph
+    return graph
+
+
+def new_node(name, func=None, deps=()):
+    return {
+        "name": name,
+        "func": func,
+        "deps": tuple(deps),
+        "value": None,
+        "version": None,
+        "input_key": None,
+        "used": 0,
+        "runs": 0,
+        "hits": 0,
+        "last_ms": 0.0,
+        "total_ms": 0.0,
+    }
+
+
+def next_version(graph):
+    graph["seq"] += 1
+    return graph["seq"]
+
+
+def set_input(graph, name, value, version):
+    # sources carry a caller-supplied version; an unchanged version keeps every downstream node clean
+    with graph["lock"]:
+        node = graph["nodes"].get(name)
+        if node is None or node["func"] is not None:
+            node = new_node(name)
+            graph["nodes"][name] = node
+        if node["input_key"] != version or node["version"] is None:
+            node.update(value=value, version=next_version(graph), input_key=version, runs=node["runs"] + 1)
+        else:
+            node["hits"] += 1
+        graph["tick"] += 1
+        node["used"] = graph["tick"]
+    return name
+
+
+def define(graph, name, func, deps):
+    with graph["lock"]:
+        node = graph["nodes"].get(name)
+        if node is None or node["deps"] != tuple(deps):
+            node = new_node(name, func, deps)
+            graph["nodes"][name] = node
+        else:
+            node["func"] = func
+        graph["tick"] += 1
+        node["used"] = graph["tick"]
+    return name
+
+
+def evaluate(graph, name):
+    with graph["lock"]:
+        value = evaluate_node(graph, name)
+        trim_graph(graph, name)
+        return value
+
+
+def evaluate_node(graph, name):
+    with graph["lock"]:
+        node = graph["nodes"][name]
+        graph["tick"] += 1
+        node["used"] = graph["tick"]
+        if node["func"] is None:
+            return node["value"]
+        values = [evaluate_node(graph, dep) for dep in node["deps"]]
+        key = tuple(graph["nodes"][dep]["version"] for dep in node["deps"])
+        if node["version"] is not None and node["input_key"] == key:
+            node["hits"] += 1
+            return node["value"]
+        t0 = time.perf_counter()
+        value = node["func"](*values)
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        node.update(
+            value=value,
+            version=next_version(graph),
+            input_key=key,
+            runs=node["runs"] + 1,
+            last_ms=elapsed,
+            total_ms=node["total_ms"] + elapsed,
+        )
+        return value
+
+
+def trim_graph(graph, keep=None):
+    # only nodes nothing else depends on are evicted; their inputs become evictable on a later pass
+    nodes = graph["nodes"]
+    while len(nodes) > graph["max_nodes"]:
+        needed = {dep for node in nodes.values() for dep in node["deps"]}
+        needed.add(keep)
+        free = sorted((n for n in nodes if n not in needed), key=lambda n: nodes[n]["used"])
+        if not free:
+            return
+        for name in free[: len(nodes) - graph["max_nodes"]]:
+            del nodes[name]
+
+
+def graph_stats(graph):
+    with graph["lock"]:
+        rows = []
+        for node in sorted(graph["nodes"].values(), key=lambda n: -n["used"]):
+            rows.append(
+                {
+                    "节点": node["name"],
+                    "类型": "输入" if node["func"] is None else "计算",
+                    "版本": node["version"],
+                    "计算次数": node["runs"],
+                    "命中次数": node["hits"],
+                    "最近耗时(ms)": round(node["last_ms"], 2),
+                    "累计耗时(ms)": round(node["total_ms"], 2),
+                }
+            )
+        return rows
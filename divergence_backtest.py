@@ -0,0 +1,245 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from local_store import get_store_path, read_json, write_json
+
+SOURCES = ("MACD", "KDJ", "RSI")
+KINDS = ("顶背离", "底背离")
+
+_worker_data = {}
+
+
+def ema_array(values, period):
+    period = max(1, int(period or 1))
+    return pd.Series(values, dtype="float64").ewm(alpha=2.0 / (period + 1.0), adjust=False).mean().to_numpy()
+
+
+def macd_dif_array(close, fast=12, slow=26):
+    return ema_array(close, fast) - ema_array(close, slow)
+
+
+def rsi_array(close, period=14):
+    period = max(1, int(period or 14))
+    n = len(close)
+    out = np.full(n, np.nan)
+    if n < 2:
+        return out
+    change = np.diff(close)
+    gain = pd.Series(np.where(change > 0, change, 0.0))
+    loss = pd.Series(np.where(change < 0, -change, 0.0))
+    avg_gain = gain.ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    avg_loss = loss.ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    out[1:] = rsi
+    out[: min(n, period)] = np.nan
+    return out
+
+
+def kdj_j_array(high, low, close, period=9):
+    period = max(1, int(period or 9))
+    hh = pd.Series(high, dtype="float64").rolling(period, min_periods=1).max().to_numpy()
+    ll = pd.Series(low, dtype="float64").rolling(period, min_periods=1).min().to_numpy()
+    span = hh - ll
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsv = np.where(span == 0, 50.0, (close - ll) / span * 100.0)
+    k = pd.Series(np.concatenate([[50.0], rsv])).ewm(alpha=1.0 / 3.0, adjust=False).mean().to_numpy()
+    d = pd.Series(k).ewm(alpha=1.0 / 3.0, adjust=False).mean().to_numpy()
+    return (3 * k - 2 * d)[1:]
+
+
+def pivot_indices(values, window, kind):
+    window = max(1, int(window or 3))
+    n = len(values)
+    if n < 2 * window + 1:
+        return np.array([], dtype=np.int64)
+    windows = sliding_window_view(values, window)
+    if kind == "high":
+        edge = windows.max(axis=1)
+        center = values[window : n - window]
+        mask = (center > edge[: n - 2 * window]) & (center > edge[window + 1 :])
+    else:
+        edge = windows.min(axis=1)
+        center = values[window : n - window]
+        mask = (center < edge[: n - 2 * window]) & (center < edge[window + 1 :])
+    return np.flatnonzero(mask) + window
+
+
+def divergence_indices(price, indicator, pivot_window=3, max_bars=200):
+    out = {}
+    for pivot_kind, kind in (("high", "顶背离"), ("low", "底背离")):
+        piv = pivot_indices(price, pivot_window, pivot_kind)
+        if len(piv) < 2:
+            out[kind] = np.array([], dtype=np.int64)
+            continue
+        prev = piv[:-1]
+        cur = piv[1:]
+        near = (cur - prev) <= max_bars
+        if kind == "顶背离":
+            hit = (price[cur] > price[prev]) & (indicator[cur] < indicator[prev])
+        else:
+            hit = (price[cur] < price[prev]) & (indicator[cur] > indicator[prev])
+        out[kind] = cur[near & hit]
+    return out
+
+
+def forward_stats(close, signal_idx, kind, pivot_window, horizons):
+    rows = []
+    entry = signal_idx + pivot_window
+    entry = entry[entry < len(close)]
+    sign = -1.0 if kind == "顶背离" else 1.0
+    for h in horizons:
+        valid = entry[entry + h < len(close)]
+        if not len(valid):
+            rows.append({"horizon": int(h), "count": 0, "hits": 0, "ret_sum": 0.0})
+            continue
+        ret = (close[valid + h] / close[valid] - 1.0) * 100.0 * sign
+        rows.append(
+            {
+                "horizon": int(h),
+                "count": int(len(valid)),
+                "hits": int(np.count_nonzero(ret > 0)),
+                "ret_sum": float(ret.sum()),
+            }
+        )
+    return rows
+
+
+def build_param_grid(pivot_windows, max_bars_list, macd_params, kdj_periods, rsi_periods):
+    grid = []
+    for pw, mb, macd, kdj, rsi in itertools.product(
+        pivot_windows, max_bars_list, macd_params, kdj_periods, rsi_periods
+    ):
+        grid.append(
+            {
+                "pivot_window": int(pw),
+                "max_bars": int(mb),
+                "macd": [int(macd[0]), int(macd[1])],
+                "kdj": int(kdj),
+                "rsi": int(rsi),
+            }
+        )
+    return grid
+
+
+def param_label(params):
+    return (
+        f"W{params['pivot_window']}/M{params['max_bars']}"
+        f"/MACD{params['macd'][0]}-{params['macd'][1]}/KDJ{params['kdj']}/RSI{params['rsi']}"
+    )
+
+
+def evaluate_params(params, data_by_index, horizons, indicator_cache=None):
+    if indicator_cache is None:
+        indicator_cache = {}
+    result = []
+    for index_name, bars in data_by_index.items():
+        close = bars["close"]
+        if len(close) < 2 * params["pivot_window"] + 2:
+            continue
+        indicators = {}
+        for source, key in (
+            ("MACD", ("macd", index_name, tuple(params["macd"]))),
+            ("KDJ", ("kdj", index_name, params["kdj"])),
+            ("RSI", ("rsi", index_name, params["rsi"])),
+        ):
+            if key not in indicator_cache:
+                if source == "MACD":
+                    indicator_cache[key] = macd_dif_array(close, *params["macd"])
+                elif source == "KDJ":
+                    indicator_cache[key] = kdj_j_array(bars["high"], bars["low"], close, params["kdj"])
+                else:
+                    indicator_cache[key] = rsi_array(close, params["rsi"])
+            indicators[source] = indicator_cache[key]
+        for source in SOURCES:
+            signals = divergence_indices(close, indicators[source], params["pivot_window"], params["max_bars"])
+            for kind in KINDS:
+                for row in forward_stats(close, signals[kind], kind, params["pivot_window"], horizons):
+                    row.update({"index": index_name, "source": source, "kind": kind})
+                    result.append(row)
+    return {"params": params, "label": param_label(params), "rows": result}
+
+
+def _init_worker(data_by_index, horizons):
+    _worker_data["data"] = data_by_index
+    _worker_data["horizons"] = horizons
+    _worker_data["cache"] = {}
+
+
+def _evaluate_in_worker(params):
+    return evaluate_params(params, _worker_data["data"], _worker_data["horizons"], _worker_data["cache"])
+
+
+def run_backtest(data_by_index, grid, horizons, max_workers=None):
+    data_by_index = {
+        name: {k: np.asarray(bars[k], dtype=np.float64) for k in ("high", "low", "close")}
+        for name, bars in data_by_index.items()
+    }
+    if max_workers is None:
+        max_workers = min(len(grid), os.cpu_count() or 1)
+    if max_workers <= 1 or len(grid) <= 1:
+        cache = {}
+        return [evaluate_params(p, data_by_index, horizons, cache) for p in grid]
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(data_by_index, horizons)
+    ) as pool:
+        return list(pool.map(_evaluate_in_worker, grid))
+
+
+def backtest_result_path(run_id):
+    return get_store_path("backtest", f"{run_id}.json")
+
+
+def save_backtest_result(meta, results):
+    run_id = time.strftime("%Y%m%d_%H%M%S")
+    payload = dict(meta)
+    payload["run_id"] = run_id
+    payload["results"] = results
+    write_json(backtest_result_path(run_id), payload)
+    return run_id
+
+
+def list_backtest_runs():
+    folder = os.path.dirname(backtest_result_path("_"))
+    try:
+        names = [n[:-5] for n in os.listdir(folder) if n.endswith(".json")]
+    except FileNotFoundError:
+        return []
+    return sorted(names, reverse=True)
+
+
+def load_backtest_result(run_id):
+    return read_json(backtest_result_path(run_id))
+
+
+def summarize_backtest(payload, index_name=None):
+    rows = []
+    for res in (payload or {}).get("results") or []:
+        agg = {}
+        for r in res.get("rows") or []:
+            if index_name and r.get("index") != index_name:
+                continue
+            k = (r["source"], r["kind"], r["horizon"])
+            a = agg.setdefault(k, [0, 0, 0.0])
+            a[0] += r["count"]
+            a[1] += r["hits"]
+            a[2] += r["ret_sum"]
+        for (source, kind, horizon), (count, hits, ret_sum) in agg.items():
+            rows.append(
+                {
+                    "参数": res.get("label"),
+                    "来源": source,
+                    "类型": kind,
+                    "持有周期": horizon,
+                    "信号数": count,
+                    "胜率(%)": round(hits * 100.0 / count, 2) if count else None,
+                    "平均收益(%)": round(ret_sum / count, 4) if count else None,
+                }
+            )
+    return rows
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+CHART_POINT_BUDGET = 600
+
+
+def compact_float(v, digits=3):
+    try:
+        v = float(v)
+    except Exception:
+        return None
+    if v != v:
+        return None
+    return round(v, digits)
+
+
+def as_float_array(values):
+    if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+        return values
+    return pd.to_numeric(pd.Series(list(values), dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def stable_width(n, budget):
+    # power-of-two bucket widths anchored at bar 0: a new bar only changes the tail bucket, and the width
+    # (and so every bucket) only moves when the history doubles
+    width = 1
+    while -(-n // width) > budget:
+        width *= 2
+    return width
+
+
+def lttb_indices(values, threshold, keep=None):
+    y = as_float_array(values)
+    n = len(y)
+    threshold = int(threshold or 0)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    threshold = max(threshold, 3)
+    width = stable_width(n - 2, threshold - 2)
+    edges = np.append(np.arange(1, n - 1, width), [n - 1, n])
+    filled = pd.Series(y).ffill().bfill().to_numpy()
+    if np.isnan(filled).all():
+        out = np.concatenate([[0], edges[:-2], [n - 1]])
+    else:
+        x = np.arange(n, dtype=np.float64)
+        buckets = len(edges) - 2
+        out = np.empty(buckets + 2, dtype=np.int64)
+        out[0] = 0
+        out[-1] = n - 1
+        a = 0
+        for i in range(buckets):
+            lo, hi = edges[i], edges[i + 1]
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            avg_x = x[nlo:nhi].mean()
+            avg_y = filled[nlo:nhi].mean()
+            area = np.abs(
+                (x[a] - avg_x) * (filled[lo:hi] - filled[a]) - (x[a] - x[lo:hi]) * (avg_y - filled[a])
+            )
+            a = lo + int(np.argmax(area))
+            out[i + 1] = a
+    if keep is not None and len(keep):
+        keep = np.asarray(keep, dtype=np.int64)
+        out = np.union1d(out, keep[(keep >= 0) & (keep < n)])
+    return out
+
+
+def span_sums(values, idx):
+    # the i-th sum covers the bars after idx[i-1] up to and including idx[i], so each bar ends at its own label
+    values = np.nan_to_num(as_float_array(values))
+    idx = np.asarray(idx, dtype=np.int64)
+    if not len(idx):
+        return values[:0]
+    totals = np.cumsum(values)[idx]
+    return np.diff(totals, prepend=0.0)
+
+
+def ohlc_downsample(open_, high, low, close, volume, threshold):
+    n = len(close)
+    starts = np.arange(0, n, stable_width(n, threshold))
+    ends = np.append(starts[1:], n)
+    return (
+        starts,
+        open_[starts],
+        np.fmax.reduceat(high, starts),
+        np.fmin.reduceat(low, starts),
+        close[ends - 1],
+        np.add.reduceat(np.nan_to_num(volume), starts),
+    )
+
+
+def take(values, idx):
+    return [values[i] for i in idx]
+
+
+def downsample_price_volume(x_data, kind, price_series, candlestick_series, volume_series, max_points):
+    n = len(x_data or [])
+    if not max_points or n <= max_points:
+        return x_data, price_series, candlestick_series, volume_series
+    volume = None
+    if volume_series is not None:
+        volume = as_float_array(list(volume_series)[:n] + [0] * max(0, n - len(volume_series)))
+    if kind == "candlestick":
+        rows = []
+        for row in candlestick_series or []:
+            value = row.get("value") if isinstance(row, dict) else row
+            value = list(value) if isinstance(value, (list, tuple)) else []
+            rows.append((value + [None] * 4)[:4])
+        if len(rows) != n:
+            return x_data, price_series, candlestick_series, volume_series
+        ocl = as_float_array([v for r in rows for v in r]).reshape(-1, 4)
+        starts, o, h, l, c, v = ohlc_downsample(
+            ocl[:, 0], ocl[:, 3], ocl[:, 2], ocl[:, 1], volume if volume is not None else np.zeros(n), max_points
+        )
+        candles = [
+            [None if np.isnan(x) else float(x) for x in row] for row in np.column_stack([o, c, l, h])
+        ]
+        return take(x_data, starts), price_series, candles, (None if volume is None else v.tolist())
+    if price_series is None or len(price_series) != n:
+        return x_data, price_series, candlestick_series, volume_series
+    idx = lttb_indices(price_series, max_points)
+    volume_out = None if volume is None else span_sums(volume, idx).tolist()
+    return take(x_data, idx), take(price_series, idx), candlestick_series, volume_out
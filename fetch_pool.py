@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+def make_rate_limiter(rate_per_sec, burst=1):
+    if not rate_per_sec or rate_per_sec <= 0:
+        return lambda: None
+    interval = 1.0 / float(rate_per_sec)
+    state = {"tokens": float(burst), "last": time.monotonic()}
+    lock = threading.Lock()
+
+    def wait():
+        while True:
+            with lock:
+                now = time.monotonic()
+                state["tokens"] = min(float(burst), state["tokens"] + (now - state["last"]) / interval)
+                state["last"] = now
+                if state["tokens"] >= 1.0:
+                    state["tokens"] -= 1.0
+                    return
+                delay = (1.0 - state["tokens"]) * interval
+            time.sleep(delay)
+
+    return wait
+
+
+def make_thread_pool(max_workers, thread_name_prefix="dj_fetch"):
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def attach_ctx():
+        if ctx is not None:
+            add_script_run_ctx(ctx=ctx)
+
+    return ThreadPoolExecutor(
+        max_workers=max(1, int(max_workers or 1)),
+        thread_name_prefix=thread_name_prefix,
+        initializer=attach_ctx,
+    )
+
+
+def map_limited(func, items, max_workers=4, rate_per_sec=None, on_done=None):
+    items = list(items or [])
+    results = [None] * len(items)
+    errors = [None] * len(items)
+    if not items:
+        return results, errors
+    wait = make_rate_limiter(rate_per_sec)
+
+    def call(item):
+        wait()
+        return func(item)
+
+    done = 0
+    with make_thread_pool(min(max_workers, len(items))) as pool:
+        futures = {pool.submit(call, item): i for i, item in enumerate(items)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as e:
+                errors[i] = e
+            done += 1
+            if on_done is not None:
+                on_done(done, len(items), items[i], results[i], errors[i])
+    return results, errors
+
+
+PREFETCH_RATE_PER_SEC = 2.0
+PREFETCH_FRESH_SECONDS = 120
+
+_prefetch_state = {"queue": deque(), "pending": set(), "recent": {}, "worker": None, "done": 0, "failed": 0}
+_prefetch_lock = threading.Lock()
+
+
+def prefetch_worker(wait):
+    while True:
+        with _prefetch_lock:
+            if not _prefetch_state["queue"]:
+                _prefetch_state["worker"] = None
+                return
+            key, func, args, ctx = _prefetch_state["queue"].popleft()
+        wait()
+        # run under the requesting session's context so token lookups and refreshes hit that user's state
+        add_script_run_ctx(threading.current_thread(), ctx)
+        ok = True
+        try:
+            func(*args)
+        except Exception:
+            ok = False
+        with _prefetch_lock:
+            _prefetch_state["pending"].discard(key)
+            _prefetch_state["recent"][key] = time.monotonic()
+            _prefetch_state["done" if ok else "failed"] += 1
+
+
+def prefetch_later(key, func, *args):
+    # one rate-limited daemon worker warms caches in the background; each job keeps the context it was queued from
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return False
+    now = time.monotonic()
+    with _prefetch_lock:
+        recent = _prefetch_state["recent"]
+        if key in _prefetch_state["pending"] or now - recent.get(key, -PREFETCH_FRESH_SECONDS) < PREFETCH_FRESH_SECONDS:
+            return False
+        for k in [k for k, t in recent.items() if now - t >= PREFETCH_FRESH_SECONDS]:
+            del recent[k]
+        _prefetch_state["pending"].add(key)
+        _prefetch_state["queue"].append((key, func, args, ctx))
+        if _prefetch_state["worker"] is None:
+            worker = threading.Thread(
+                target=prefetch_worker,
+                args=(make_rate_limiter(PREFETCH_RATE_PER_SEC),),
+                name="dj_prefetch",
+                daemon=True,
+            )
+            _prefetch_state["worker"] = worker
+            worker.start()
+    return True
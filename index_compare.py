@@ -1,8 +1,23 @@
 from datetime import date, timedelta
 
+import numpy as np
 import streamlit as st
 from streamlit_echarts import JsCode, st_echarts
-from index_monitor import render_volume_tun_panel
+
+from bar_resample import CALENDAR_PERIODS, fetch_period_rows, load_calendar_bars, load_day_rows, load_minute_bars
+from bar_store import BAR_FIELDS, slice_bars, sync_bars
+from chart_cache import cached_option, data_digest
+from chart_stream import st_echarts_stream
+from downsample import CHART_POINT_BUDGET, compact_float, downsample_price_volume
+from fetch_pool import map_limited
+from index_monitor import render_panel_title, render_volume_tun_panel
+from slot_profile import SLOT_COUNT, SLOT_LABELS, cached_slot_stats, today_slot_row, update_slot_profile
+from yoy_engine import YOY_METRICS, aligned_panel, panel_rows
+
+PRICE_VOLUME_TOOLTIP = JsCode(
+    "function (params) { if (!params || !params.length) { return ''; } var axisLabel = params[0].axisValueLabel || params[0].axisValue || ''; var rows = ['<div style=\"margin:0 0 6px 0;\">' + axisLabel + '</div>']; function fmtPrice(v) { var n = Number(v); if (v == null || !isFinite(n)) return v == null ? '--' : String(v); return n.toFixed(2); } function fmtVol(v) { var n = Number(v); if (v == null || !isFinite(n)) return v == null ? '--' : String(v); return String(Math.round(n)); } function pickValues(p) { var d = p.value != null ? p.value : p.data; if (Array.isArray(d) && p.encode && p.encode.y) { return p.encode.y.map(function (i) { return d[i]; }); } return Array.isArray(d) ? d : [d]; } for (var i = 0; i < params.length; i++) { var p = params[i]; if (!p) continue; var marker = p.marker || ''; var name = p.seriesName || ''; var vals = pickValues(p); if (p.seriesType === 'candlestick' && vals.length >= 4) { rows.push('<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;\">' + '<span>' + marker + name + '</span>' + '<span style=\"font-weight:600;\">K线</span>' + '</div>'); var labels = ['开盘价', '收盘价', '最低价', '最高价']; var order = [0, 1, 3, 2]; for (var j = 0; j < order.length; j++) { rows.push('<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;padding-left:14px;\">' + '<span>' + labels[order[j]] + '</span><span style=\"font-weight:600;\">' + fmtPrice(vals[order[j]]) + '</span></div>'); } continue; } var valueText = (p.seriesType === 'bar' || name === '成交量') ? fmtVol(vals[0]) : fmtPrice(vals[0]); rows.push('<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;\">' + '<span>' + marker + name + '</span>' + '<span style=\"font-weight:600;\">' + valueText + '</span>' + '</div>'); } return rows.join(''); }"
+).js_code
+YOY_VALUE_FORMATTER = JsCode("function (v) { return v == null ? '--' : v.toFixed(2) + '%'; }").js_code
 
 
 def to_float(v):
@@ -87,11 +102,13 @@ def build_synthetic_volume(price_series):
     return out
 
 
-def build_price_volume_option(x_data, kind, price_series=None, candlestick_series=None, volume_series=None):
-    tooltip_formatter = JsCode(
-        "function (params) { if (!params || !params.length) { return ''; } var axisLabel = params[0].axisValueLabel || params[0].axisValue || ''; var rows = ['<div style=\"margin:0 0 6px 0;\">' + axisLabel + '</div>']; function fmtPrice(v) { var n = Number(v); if (!isFinite(n)) return v == null ? '--' : String(v); return n.toFixed(2); } function fmtVol(v) { var n = Number(v); if (!isFinite(n)) return v == null ? '--' : String(v); return String(Math.round(n)); } function pickCandle(p) { if (!p) return null; if (p.seriesType !== 'candlestick') return null; var d = p.data != null ? p.data : p.value; if (!d) return null; if (d && typeof d === 'object' && !Array.isArray(d)) { if (d.open != null || d.close != null || d.low != null || d.high != null) { return { o: d.open, c: d.close, l: d.low, h: d.high }; } if (d.value != null) d = d.value; } if (Array.isArray(d) && d.length >= 4) { return { o: d[0], c: d[1], l: d[2], h: d[3] }; } return null; } for (var i = 0; i < params.length; i++) { var p = params[i]; if (!p) continue; var marker = p.marker || ''; var name = p.seriesName || ''; var candle = pickCandle(p); if (candle) { rows.push('<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;\">' + '<span>' + marker + name + '</span>' + '<span style=\"font-weight:600;\">K线</span>' + '</div>'); rows.push('<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;padding-left:14px;\">' + '<span>开盘价</span><span style=\"font-weight:600;\">' + fmtPrice(candle.o) + '</span></div>'); rows.push('<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;padding-left:14px;\">' + '<span>收盘价</span><span style=\"font-weight:600;\">' + fmtPrice(candle.c) + '</span></div>'); rows.push('<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;padding-left:14px;\">' + '<span>最高价</span><span style=\"font-weight:600;\">' + fmtPrice(candle.h) + '</span></div>'); rows.push('<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;padding-left:14px;\">' + '<span>最低价</span><span style=\"font-weight:600;\">' + fmtPrice(candle.l) + '</span></div>'); continue; } var v = (p.data != null ? p.data : p.value); if (v && typeof v === 'object' && !Array.isArray(v) && v.value != null) { v = v.value; } var valueText = (p.seriesType === 'bar' || name === '成交量') ? fmtVol(v) : fmtPrice(v); rows.push('<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;\">' + '<span>' + marker + name + '</span>' + '<span style=\"font-weight:600;\">' + valueText + '</span>' + '</div>'); } return rows.join(''); }"
-    ).js_code
+def build_price_volume_option(
+    x_data, kind, price_series=None, candlestick_series=None, volume_series=None, max_points=CHART_POINT_BUDGET
+):
 
+    x_data, price_series, candlestick_series, volume_series = downsample_price_volume(
+        x_data or [], kind, price_series, candlestick_series, volume_series, max_points
+    )
     x_data = x_data or []
     volume_series = volume_series or [0] * len(x_data)
     grid = [
@@ -101,7 +118,6 @@ def build_price_volume_option(x_data, kind, price_series=None, candlestick_serie
     x_axis = [
         {
             "type": "category",
-            "data": x_data,
             "boundaryGap": kind == "candlestick",
             "axisLabel": {"show": False},
             "axisTick": {"show": False},
@@ -110,7 +126,6 @@ def build_price_volume_option(x_data, kind, price_series=None, candlestick_serie
         {
             "type": "category",
             "gridIndex": 1,
-            "data": x_data,
             "boundaryGap": True,
             "axisLabel": {"hideOverlap": True, "fontSize": 10},
             "axisTick": {"alignWithLabel": True},
@@ -122,7 +137,7 @@ def build_price_volume_option(x_data, kind, price_series=None, candlestick_serie
     ]
 
     if kind == "candlestick":
-        normalized_candles = []
+        price_rows = []
         price_change_flags = []
         for row in candlestick_series or []:
             value = None
@@ -132,23 +147,23 @@ def build_price_volume_option(x_data, kind, price_series=None, candlestick_serie
                 value = list(row)
 
             if not isinstance(value, (list, tuple)) or len(value) < 2:
-                normalized_candles.append({"value": [None, None, None, None], "open": None, "close": None, "low": None, "high": None})
+                price_rows.append([None, None, None, None])
                 price_change_flags.append(True)
                 continue
 
-            o = to_float(value[0])
-            c = to_float(value[1])
-            l = to_float(value[2]) if len(value) > 2 else None
-            h = to_float(value[3]) if len(value) > 3 else None
+            o = compact_float(value[0])
+            c = compact_float(value[1])
+            l = compact_float(value[2]) if len(value) > 2 else None
+            h = compact_float(value[3]) if len(value) > 3 else None
             if o is None or c is None:
                 price_change_flags.append(True)
             else:
                 price_change_flags.append(c >= o)
-            normalized_candles.append({"value": [o, c, l, h], "open": o, "close": c, "low": l, "high": h})
+            price_rows.append([o, c, l, h])
         price_series_conf = {
             "name": "价格",
             "type": "candlestick",
-            "data": normalized_candles,
+            "encode": {"x": 0, "y": [1, 2, 3, 4]},
             "itemStyle": {
                 "color": "#EF4444",
                 "color0": "#22C55E",
@@ -157,7 +172,7 @@ def build_price_volume_option(x_data, kind, price_series=None, candlestick_serie
             },
         }
     else:
-        price_vals = [to_float(v) for v in (price_series or [])]
+        price_vals = [compact_float(v) for v in (price_series or [])]
         price_change_flags = []
         last = None
         for v in price_vals:
@@ -169,30 +184,33 @@ def build_price_volume_option(x_data, kind, price_series=None, candlestick_serie
             else:
                 price_change_flags.append(v >= last)
             last = v
+        price_rows = [[v] for v in price_vals]
         price_series_conf = {
             "name": "价格",
             "type": "line",
-            "data": price_vals,
+            "encode": {"x": 0, "y": 1},
             "smooth": True,
             "showSymbol": False,
             "lineStyle": {"width": 2, "color": "#2563EB"},
         }
 
-    vol_data = []
-    for idx, v in enumerate(volume_series or []):
+    # one dataset row per bar: [label, *price columns, volume, 1 up / -1 down]
+    width = len(price_rows[0]) if price_rows else (4 if kind == "candlestick" else 1)
+    source = []
+    for idx, x in enumerate(x_data):
         up = True
         if idx < len(price_change_flags):
             up = bool(price_change_flags[idx])
-        color = "#EF4444" if up else "#22C55E"
-        vol_f = to_float(v)
-        vol_val = 0 if vol_f is None else max(0, vol_f) * 100
-        vol_data.append({"value": vol_val, "itemStyle": {"color": color}})
+        vol_f = to_float(volume_series[idx]) if idx < len(volume_series) else None
+        vol_val = 0 if vol_f is None or vol_f != vol_f else round(max(0, vol_f) * 100)
+        price_row = price_rows[idx] if idx < len(price_rows) else [None] * width
+        source.append([x, *price_row, vol_val, 1 if up else -1])
 
     option = {
         "tooltip": {
             "trigger": "axis",
             "axisPointer": {"type": "cross"},
-            "formatter": tooltip_formatter,
+            "formatter": PRICE_VOLUME_TOOLTIP,
             "backgroundColor": "#ffffff",
             "borderColor": "#e5e7eb",
             "borderWidth": 1,
@@ -208,6 +226,13 @@ def build_price_volume_option(x_data, kind, price_series=None, candlestick_serie
                 "color": "#111827",
             },
         },
+        "visualMap": {
+            "show": False,
+            "seriesIndex": 1,
+            "dimension": width + 2,
+            "pieces": [{"value": 1, "color": "#EF4444"}, {"value": -1, "color": "#22C55E"}],
+        },
+        "dataset": {"source": source, "sourceHeader": False},
         "grid": grid,
         "xAxis": x_axis,
         "yAxis": y_axis,
@@ -218,7 +243,7 @@ def build_price_volume_option(x_data, kind, price_series=None, candlestick_serie
                 "type": "bar",
                 "xAxisIndex": 1,
                 "yAxisIndex": 1,
-                "data": vol_data,
+                "encode": {"x": 0, "y": width + 1},
                 "barWidth": "60%",
             },
         ],
@@ -226,6 +251,103 @@ def build_price_volume_option(x_data, kind, price_series=None, candlestick_serie
     return option
 
 
+def build_calendar_candle_option(bars, freq):
+    unit = "M" if freq == "month" else "D"
+    x_data = np.datetime_as_string(bars["ts"].astype(f"datetime64[{unit}]"), unit=unit).tolist()
+    candles = np.column_stack([bars["open"], bars["close"], bars["low"], bars["high"]]).tolist()
+    return build_price_volume_option(
+        x_data, "candlestick", candlestick_series=candles, volume_series=bars["volume"].tolist()
+    )
+
+
+def build_slot_compare_option(rows, avg_days):
+    names = ["今日", "昨日", f"{avg_days}日均值"]
+    colors = ["#EF4444", "#9CA3AF", "#2563EB"]
+    series = []
+    for i, (name, color) in enumerate(zip(names, colors)):
+        line = {"color": color, "width": 2 if i == 0 else 1.2, "type": "dashed" if i == 2 else "solid"}
+        series.append(
+            {"name": name, "type": "line", "encode": {"x": 0, "y": i + 1}, "showSymbol": False, "lineStyle": line, "itemStyle": {"color": color}}
+        )
+        series.append(
+            {
+                "name": name,
+                "type": "line",
+                "xAxisIndex": 1,
+                "yAxisIndex": 1,
+                "encode": {"x": 0, "y": i + 4},
+                "showSymbol": False,
+                "lineStyle": line,
+                "itemStyle": {"color": color},
+            }
+        )
+    return {
+        "animation": False,
+        "dataset": {"source": rows, "sourceHeader": False},
+        "tooltip": {"trigger": "axis", "axisPointer": {"type": "cross"}},
+        "axisPointer": {"link": [{"xAxisIndex": "all"}]},
+        "legend": {"top": 0, "data": names, "textStyle": {"fontSize": 10}},
+        "grid": [
+            {"left": 40, "right": 10, "top": 26, "bottom": "34%", "containLabel": True},
+            {"left": 40, "right": 10, "top": "72%", "bottom": 18, "containLabel": True},
+        ],
+        "xAxis": [
+            {"type": "category", "boundaryGap": False, "axisLabel": {"show": False}, "axisTick": {"show": False}},
+            {"type": "category", "gridIndex": 1, "boundaryGap": False, "axisLabel": {"hideOverlap": True, "fontSize": 10}},
+        ],
+        "yAxis": [
+            {"type": "value", "scale": True, "axisLabel": {"formatter": "{value}%"}},
+            {"type": "value", "gridIndex": 1, "splitNumber": 2, "axisLabel": {"show": False}},
+        ],
+        "series": series,
+    }
+
+
+def render_slot_compare(ctx, cfg, base_name, day, option_key, height):
+    fetch_index_min_list = ctx["fetch_index_min_list"]
+    while day.weekday() >= 5:
+        day = day - timedelta(days=1)
+    try:
+        profile, version = update_slot_profile(
+            fetch_index_min_list, cfg["exponentId"], day, expected_code=cfg.get("code")
+        )
+        bars = load_minute_bars(fetch_index_min_list, cfg["exponentId"], day, day, expected_code=cfg.get("code"))
+    except Exception as e:
+        st.caption(f"{base_name} 分时数据获取失败：{e}")
+        return
+    stats = cached_slot_stats(cfg["exponentId"], version, profile, day)
+    today = today_slot_row(profile, bars, day)
+    if stats is None:
+        st.caption(f"{base_name} 缺少历史分时，无法对比")
+        return
+    empty = np.full(SLOT_COUNT, np.nan)
+    cols = [
+        empty if today is None else today["ret"],
+        stats["prev_ret"],
+        stats["avg_ret"],
+        empty if today is None else today["cumvol"] / 1e4,
+        stats["prev_cumvol"] / 1e4,
+        stats["avg_cumvol"] / 1e4,
+    ]
+    digits = [3, 3, 3, 1, 1, 1]
+    rows = [
+        [label] + [compact_float(v, d) for v, d in zip(values, digits)]
+        for label, *values in zip(SLOT_LABELS, *[c.tolist() for c in cols])
+    ]
+    option = cached_option(
+        f"{option_key}_slot",
+        build_slot_compare_option,
+        rows,
+        len(stats["days"]),
+        version=(version, day.isoformat(), data_digest(*cols)),
+    )
+    st.caption(
+        f"{day.isoformat()} 对比 {str(stats['days'][-1])} 及近{len(stats['days'])}个交易日同一时刻（上：涨跌幅，下：累计成交量/万）"
+    )
+    st_echarts_stream(option, height=height, key=f"{option_key}_slot")
+
+
+@st.fragment
 def render_index_card(ctx, title, adjustable=False, height="320px"):
     index_min_map = ctx["INDEX_MIN_MAP"]
     fetch_index_day_list = ctx["fetch_index_day_list"]
@@ -237,17 +359,32 @@ def render_index_card(ctx, title, adjustable=False, height="320px"):
 
     option_key = f"{title}_option" if adjustable else title
     period_key = f"{title}_period"
-    header_left, header_right = st.columns([2.2, 1.3])
+    header_left, header_mid, header_right = st.columns([1.5, 0.9, 1.1])
     period = None
+    years = None
+    slot_compare = False
     if adjustable:
         with header_right:
             period = st.selectbox(
                 "周期",
-                ["1分钟", "5分钟", "30分钟", "60分钟", "日线"],
+                ["1分钟", "5分钟", "30分钟", "60分钟", "日线", "周线", "月线"],
                 index=0,
                 key=period_key,
                 label_visibility="collapsed",
             )
+        if period not in CALENDAR_PERIODS and period != "日线":
+            with header_mid:
+                slot_compare = st.toggle("同时段", key=f"{title}_slot_cmp")
+        if period in CALENDAR_PERIODS:
+            with header_mid:
+                years = st.selectbox(
+                    "区间",
+                    [1, 3, 5, 10, 20],
+                    index=2,
+                    format_func=lambda n: f"近{n}年",
+                    key=f"{title}_years",
+                    label_visibility="collapsed",
+                )
     with header_left:
         st.markdown(f"**{title}**")
     x_data = None
@@ -257,14 +394,19 @@ def render_index_card(ctx, title, adjustable=False, height="320px"):
         cfg = index_min_map.get(base_name)
         start_dt = st.session_state.get("index_min_start_date") or date.today()
         end_dt = st.session_state.get("index_min_end_date") or date.today()
+        if slot_compare and cfg:
+            render_slot_compare(ctx, cfg, base_name, end_dt, option_key, height)
+            return
         if period == "日线":
             if cfg:
                 try:
-                    data_list = fetch_index_day_list(
-                        start_dt.isoformat(),
-                        end_dt.isoformat(),
-                        str(cfg["exponentId"]),
-                        "open,high,low,close,volume",
+                    data_list = load_day_rows(
+                        fetch_index_day_list,
+                        fetch_index_min_list,
+                        cfg["exponentId"],
+                        start_dt,
+                        end_dt,
+                        expected_code=cfg.get("code"),
                     )
                     if not data_list:
                         st.caption(f"{base_name} 日线接口返回为空")
@@ -275,17 +417,41 @@ def render_index_card(ctx, title, adjustable=False, height="320px"):
             else:
                 st.caption(f"{base_name} 缺少指数映射")
                 return
+        elif period in CALENDAR_PERIODS:
+            if not cfg:
+                st.caption(f"{base_name} 缺少指数映射")
+                return
+            end_dt = date.today()
+            start_dt = date(end_dt.year - years, end_dt.month, 1)
+            try:
+                calendar_bars = load_calendar_bars(
+                    fetch_index_day_list,
+                    fetch_index_min_list,
+                    cfg["exponentId"],
+                    CALENDAR_PERIODS[period],
+                    start_dt,
+                    end_dt,
+                    expected_code=cfg.get("code"),
+                )
+            except Exception as e:
+                st.caption(f"{base_name} {period}数据获取失败：{e}")
+                return
+            if not len(calendar_bars["ts"]):
+                st.caption(f"{base_name} {period}暂无数据")
+                return
         else:
             period_int = {"1分钟": 1, "5分钟": 5, "30分钟": 30, "60分钟": 60}.get(period, 1)
             field_list = "time,open,high,low,close,volume"
             if cfg:
                 try:
-                    data_list = fetch_index_min_list(
-                        start_dt.isoformat(),
-                        end_dt.isoformat(),
+                    data_list = fetch_period_rows(
+                        fetch_index_min_list,
                         cfg["exponentId"],
+                        start_dt,
+                        end_dt,
                         period_int,
                         field_list,
+                        expected_code=cfg.get("code"),
                     )
                     x_data, y_data = parse_index_min_series(
                         data_list, start_dt=start_dt, period_minutes=period_int
@@ -373,7 +539,9 @@ def render_index_card(ctx, title, adjustable=False, height="320px"):
                 st.caption(f"{base_name} 日线数据缺少可绘制字段")
                 return
 
-            option = build_price_volume_option(
+            option = cached_option(
+                option_key,
+                build_price_volume_option,
                 x_data,
                 "candlestick",
                 candlestick_series=candlestick_data,
@@ -382,6 +550,14 @@ def render_index_card(ctx, title, adjustable=False, height="320px"):
         except Exception as e:
             st.caption(f"{base_name} 日线绘制失败：{e}")
             return
+    elif adjustable and period in CALENDAR_PERIODS:
+        option = cached_option(
+            option_key,
+            build_calendar_candle_option,
+            calendar_bars,
+            CALENDAR_PERIODS[period],
+            version=(cfg["exponentId"], period, years, data_digest(*[calendar_bars[k] for k in ("ts",) + BAR_FIELDS])),
+        )
     else:
         volume_data = None
         if adjustable and period is not None and period != "日线" and "data_list" in locals():
@@ -393,14 +569,16 @@ def render_index_card(ctx, title, adjustable=False, height="320px"):
                 volume_data = None
         if not volume_data:
             volume_data = build_synthetic_volume(y_data)
-        option = build_price_volume_option(
+        option = cached_option(
+            option_key,
+            build_price_volume_option,
             x_data,
             "line",
             price_series=y_data,
             volume_series=volume_data,
         )
 
-    st_echarts(option, height=height, key=option_key)
+    st_echarts_stream(option, height=height, key=option_key)
 
 
 def render_card(ctx, title, height="320px"):
@@ -408,10 +586,124 @@ def render_card(ctx, title, height="320px"):
     build_line_option = ctx["build_line_option"]
 
     x_data, y_data = generate_random_series(seed_text=title)
-    option = build_line_option(title, x_data, y_data, show_title=True)
+    option = cached_option(title, build_line_option, title, x_data, y_data, show_title=True)
     st_echarts(option, height=height, key=title)
 
 
+@st.cache_data(ttl=600, show_spinner=False)
+def load_yoy_panel(exponent_id, bars_version, _bars):
+    return aligned_panel(_bars)
+
+
+def build_yoy_option(day_count, series):
+    return {
+        "tooltip": {"trigger": "axis", "valueFormatter": YOY_VALUE_FORMATTER},
+        "legend": {"type": "scroll", "top": 0},
+        "grid": {"left": 10, "right": 20, "top": 36, "bottom": 40, "containLabel": True},
+        "xAxis": {
+            "type": "category",
+            "data": [f"第{i + 1}日" for i in range(day_count)],
+            "boundaryGap": False,
+            "axisLabel": {"hideOverlap": True, "fontSize": 10},
+        },
+        "yAxis": {"type": "value", "scale": True, "axisLabel": {"formatter": "{value}%"}},
+        "dataZoom": [{"type": "inside"}, {"type": "slider", "height": 16, "bottom": 8}],
+        "series": [
+            {
+                "name": name,
+                "type": "line",
+                "data": [compact_float(v, 2) for v in values[:day_count]],
+                "showSymbol": False,
+                "lineStyle": {"width": 2.5 if current else 1.2},
+            }
+            for name, values, current in series
+        ],
+    }
+
+
+@st.fragment
+def render_index_yoy(ctx):
+    index_min_map = ctx["INDEX_MIN_MAP"]
+    fetch_index_day_list = ctx["fetch_index_day_list"]
+    get_refresh_token = ctx["get_refresh_token"]
+
+    this_year = date.today().year
+    with st.container(border=True):
+        header = st.columns([1.4, 2.6, 2.6, 1.2])
+        with header[0]:
+            render_panel_title("指数同比")
+        with header[1]:
+            names = st.multiselect(
+                "指数",
+                list(index_min_map.keys()),
+                default=list(index_min_map.keys())[:1],
+                key="yoy_indices",
+                label_visibility="collapsed",
+            )
+        with header[2]:
+            years = st.multiselect(
+                "年份",
+                list(range(this_year, this_year - 20, -1)),
+                default=list(range(this_year, this_year - 3, -1)),
+                key="yoy_years",
+                label_visibility="collapsed",
+            )
+        with header[3]:
+            metric_label = st.selectbox(
+                "指标", list(YOY_METRICS.keys()), key="yoy_metric", label_visibility="collapsed"
+            )
+        if not names or not years:
+            st.caption("请选择指数和年份")
+            return
+        if not get_refresh_token():
+            st.caption("未配置refresh-token，无法获取指数日线")
+            return
+
+        # the volume ratio needs the year before the earliest selected one
+        start_dt = date(min(years) - 1, 1, 1)
+
+        def load(name):
+            cfg = index_min_map[name]
+            bars = sync_bars(
+                fetch_index_day_list, cfg["exponentId"], "day", start_dt, date.today(), expected_code=cfg.get("code")
+            )
+            bars = slice_bars(bars, start_dt, date.today())
+            bars = {k: bars[k] for k in ("ts", "close", "volume")}
+            version = data_digest(bars["ts"], bars["close"], bars["volume"])
+            return load_yoy_panel(cfg["exponentId"], version, bars)
+
+        panels, errors = map_limited(load, names, max_workers=3)
+        failed = [n for n, e in zip(names, errors) if e is not None]
+        if failed:
+            st.caption(f"{'、'.join(failed)} 日线同步失败")
+
+        metric = YOY_METRICS[metric_label]
+        series = []
+        day_count = 0
+        for name, panel in zip(names, panels):
+            if panel is None:
+                continue
+            rows = panel_rows(panel, metric, years)
+            for y in sorted(rows, reverse=True):
+                values = rows[y]
+                filled = np.flatnonzero(~np.isnan(values))
+                if not len(filled):
+                    continue
+                day_count = max(day_count, int(filled[-1]) + 1)
+                series.append((f"{name} {y}", values, y == this_year))
+        if not series:
+            st.caption("所选年份暂无日线数据")
+            return
+        option = cached_option(
+            "yoy_chart",
+            build_yoy_option,
+            day_count,
+            series,
+            version=(metric, day_count, tuple(n for n, _, _ in series), data_digest(*[v for _, v, _ in series])),
+        )
+        st_echarts(option, height="360px", key="yoy_chart")
+
+
 def render_index_compare(ctx):
     apply_index_date_preset = ctx["apply_index_date_preset"]
     get_refresh_token = ctx["get_refresh_token"]
@@ -475,5 +767,7 @@ def render_index_compare(ctx):
                 with st.container(border=True):
                     render_index_card(ctx, title, adjustable="分时" in title)
 
+        st.write("")
+        render_index_yoy(ctx)
         st.write("")
         render_volume_tun_panel(ctx)
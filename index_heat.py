@@ -0,0 +1,173 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+from streamlit_echarts import st_echarts
+
+from chart_cache import cached_option
+from index_monitor import render_panel_title
+from index_registry import (
+    INDEX_CACHE_BYTES,
+    REGISTRY_PATH,
+    append_partial_day,
+    heat_rows,
+    index_cache_stats,
+    lacks_day,
+    load_index_registry,
+    registry_groups,
+    resident_minute_bars,
+    search_registry,
+    sync_registry_day_bars,
+    sync_registry_minute_bars,
+)
+from market_map import MAP_REFRESH_SECONDS, build_market_map_option, index_map_snapshot, refresh_cycle
+
+HEAT_HORIZONS = [("涨跌幅(%)", 1), ("5日(%)", 5), ("20日(%)", 20), ("60日(%)", 60), ("年初至今", None)]
+HEAT_SORT_OPTIONS = ["涨跌幅(%)", "5日(%)", "20日(%)", "60日(%)", "年初至今", "量比"]
+HEAT_INTRADAY_LIMIT = 40
+
+_minute_cycles = {}
+
+
+@st.cache_data(ttl=MAP_REFRESH_SECONDS, show_spinner="同步指数日线")
+def load_heat_day_bars(cycle, registry_ids, _fetch_index_day_list):
+    # one registry-wide sync per refresh cycle; search, group filter and sort only reshape its rows
+    entries = load_index_registry()
+    today = date.today()
+    start_dt = min(date(today.year, 1, 1) - timedelta(days=14), today - timedelta(days=120))
+    return sync_registry_day_bars(_fetch_index_day_list, entries, start_dt, today)
+
+
+def load_heat_minute_bars(fetch_index_min_list, live, cycle, on_progress=None):
+    # each index's minute bars are fetched at most once per refresh cycle, however the visible rows change
+    today = date.today()
+    todo = [
+        e
+        for e in live
+        if _minute_cycles.get(e["exponentId"]) != cycle or resident_minute_bars(e["exponentId"], today, today) is None
+    ]
+    failed = []
+    if todo:
+        _, failed = sync_registry_minute_bars(fetch_index_min_list, todo, today, today, on_progress=on_progress)
+        for e in todo:
+            if e["name"] not in failed:
+                _minute_cycles[e["exponentId"]] = cycle
+    out = {}
+    for e in live:
+        bars = resident_minute_bars(e["exponentId"], today, today)
+        if bars is not None:
+            out[e["exponentId"]] = bars
+    return out, failed
+
+
+@st.fragment
+def render_index_heat(ctx):
+    fetch_index_day_list = ctx["fetch_index_day_list"]
+    fetch_index_min_list = ctx["fetch_index_min_list"]
+    get_refresh_token = ctx["get_refresh_token"]
+
+    entries = load_index_registry()
+    with st.container(border=True):
+        header = st.columns([2, 2, 2, 1.2, 1])
+        with header[0]:
+            render_panel_title("指数热力表", f"登记 {len(entries)} 个指数")
+        with header[1]:
+            query = st.text_input(
+                "搜索", key="index_heat_query", placeholder="名称或代码", label_visibility="collapsed"
+            )
+        with header[2]:
+            groups = st.multiselect(
+                "分类", registry_groups(entries), key="index_heat_groups", label_visibility="collapsed", placeholder="全部分类"
+            )
+        with header[3]:
+            sort_label = st.selectbox("排序", HEAT_SORT_OPTIONS, key="index_heat_sort", label_visibility="collapsed")
+        with header[4]:
+            intraday = st.toggle("盘中", value=True, key="index_heat_intraday", help="用当日1分钟线补出今日涨跌")
+
+        if not entries:
+            st.caption(f"未找到指数登记表（{REGISTRY_PATH}，列为 name,code,exponentId,group,core）")
+            return
+        if not get_refresh_token():
+            st.caption("未配置refresh-token，无法获取指数日线")
+            return
+        shown = search_registry(entries, query, groups)
+        if not shown:
+            st.caption("没有匹配的指数")
+            return
+
+        today = date.today()
+        cycle = refresh_cycle()
+        bars_by_id, failed = load_heat_day_bars(cycle, tuple(e["exponentId"] for e in entries), fetch_index_day_list)
+        if intraday and today.weekday() < 5:
+            # the day list only gains today's candle after the close, so only those rows need minute bars
+            live = [e for e in shown if lacks_day(bars_by_id[e["exponentId"]], today)][:HEAT_INTRADAY_LIMIT]
+            progress = st.empty()
+
+            def on_min_progress(done, total):
+                progress.progress(done / total, text=f"同步当日分时（{done}/{total}）")
+
+            minute_by_id, min_failed = load_heat_minute_bars(fetch_index_min_list, live, cycle, on_min_progress)
+            progress.empty()
+            failed = failed + [n for n in min_failed if n not in failed]
+            bars_by_id = dict(bars_by_id)
+            for eid, minute_bars in minute_by_id.items():
+                bars_by_id[eid] = append_partial_day(bars_by_id[eid], minute_bars, today)
+
+        df = pd.DataFrame(heat_rows(shown, bars_by_id, HEAT_HORIZONS))
+        df = df.sort_values(sort_label, ascending=False, na_position="last")
+        stats = index_cache_stats()
+        up = int((df["涨跌幅(%)"] > 0).sum())
+        down = int((df["涨跌幅(%)"] < 0).sum())
+        st.caption(
+            f"共{len(df)}个指数 · 上涨 {up} · 下跌 {down}"
+            f" · 常驻序列 {stats['entries']} 条 {stats['bytes'] / 1048576:.1f}MB / {INDEX_CACHE_BYTES / 1048576:.0f}MB"
+        )
+        if failed:
+            st.caption(f"{'、'.join(failed[:5])} 等 {len(failed)} 个指数同步失败")
+        st.dataframe(
+            df,
+            hide_index=True,
+            use_container_width=True,
+            height=min(36 * len(df) + 40, 640),
+            column_config={
+                "最新": st.column_config.NumberColumn(format="%.2f"),
+                **{label: st.column_config.NumberColumn(format="%.2f") for label, _ in HEAT_HORIZONS},
+                "量比": st.column_config.NumberColumn(format="%.2f"),
+            },
+        )
+
+
+@st.cache_data(ttl=MAP_REFRESH_SECONDS, show_spinner=False)
+def load_index_map_snapshot(cycle, registry_ids, _fetch_index_day_list):
+    # one snapshot per refresh cycle: batched day sync plus whatever minute bars the heat table left resident
+    entries = load_index_registry()
+    today = date.today()
+    bars_by_id, failed = sync_registry_day_bars(_fetch_index_day_list, entries, today - timedelta(days=14), today)
+    for e in entries:
+        minute_bars = resident_minute_bars(e["exponentId"], today, today)
+        if minute_bars is not None and lacks_day(bars_by_id[e["exponentId"]], today):
+            bars_by_id[e["exponentId"]] = append_partial_day(bars_by_id[e["exponentId"]], minute_bars, today)
+    return index_map_snapshot(entries, bars_by_id), failed
+
+
+@st.fragment(run_every=MAP_REFRESH_SECONDS)
+def render_index_market_map(ctx):
+    entries = load_index_registry()
+    with st.container(border=True):
+        render_panel_title("指数市场地图", "面积为成交量，颜色为涨跌幅")
+        if not entries or not ctx["get_refresh_token"]():
+            st.caption("未配置refresh-token或指数登记表为空")
+            return
+        registry_ids = tuple(e["exponentId"] for e in entries)
+        cycle = refresh_cycle()
+        snapshot, failed = load_index_map_snapshot(cycle, registry_ids, ctx["fetch_index_day_list"])
+        if failed:
+            st.caption(f"{'、'.join(failed[:5])} 等 {len(failed)} 个指数同步失败")
+        option = cached_option("index_market_map", build_market_map_option, snapshot, version=(cycle, registry_ids))
+        st_echarts(option, height="420px", key="index_market_map")
+
+
+def render_index_overview(ctx):
+    render_index_heat(ctx)
+    st.write("")
+    render_index_market_map(ctx)
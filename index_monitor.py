@@ -1,11 +1,60 @@
 import random
+import numpy as np
 import pandas as pd
 
 from datetime import date, datetime, timedelta
 
 import streamlit as st
 from streamlit_echarts import JsCode, st_echarts
-from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+
+from bar_resample import fetch_period_rows, load_day_rows, load_minute_bars, resample_minute_bars
+from bar_store import slice_bars, sync_bars
+from breadth_engine import BREADTH_CATEGORIES, DOWN_BUCKETS, FLAT_BUCKET, UP_BUCKETS, bucket_colors, compute_breadth
+from breadth_history import (
+    backfill_breadth_history,
+    breadth_record,
+    breadth_series,
+    list_weekdays,
+    load_breadth_history,
+    missing_dates,
+    upsert_breadth_record,
+)
+from breadth_poller import BREADTH_POLL_SECONDS, get_breadth_poller, intraday_curve_series, is_trading_time, poll_breadth
+from chart_cache import cached_option, data_digest
+from chart_stream import st_echarts_stream
+from correlation_engine import CORR_LOOKBACK_DAYS, CORR_METRICS, CORR_WINDOWS, rolling_matrices
+from dataflow import define, evaluate, graph_stats, session_graph, set_input
+from divergence_backtest import (
+    build_param_grid,
+    list_backtest_runs,
+    load_backtest_result,
+    run_backtest,
+    save_backtest_result,
+    summarize_backtest,
+)
+from downsample import CHART_POINT_BUDGET, compact_float, lttb_indices, take
+from fetch_pool import map_limited, prefetch_later
+from signal_store import load_signal_state, save_signal_state, add_signals
+from slot_profile import SLOT_LABELS, cached_slot_stats, is_previous_session, today_slot_row, update_slot_profile
+from style_engine import (
+    STYLE_PAIRS,
+    STYLE_THRESHOLD,
+    aligned_close_matrix,
+    compute_style_spreads,
+    decide_pair_style,
+    last_valid,
+    pair_members,
+    style_window,
+)
+from trend_tracker import FORECAST_MINUTES, feed_bars, get_trend_tracker
+
+DIVERGENCE_TOOLTIP = JsCode(
+    "function (params) { if (!params || !params.length) { return ''; } var axisLabel = params[0].axisValueLabel || params[0].axisValue || ''; var signal = '无'; var close = null; var lines = [axisLabel]; for (var i = 0; i < params.length; i++) { var p = params[i]; if (!p) continue; if (p.seriesName === '背离信号') { if (p.data && p.data.signal) { signal = p.data.signal; } continue; } if (p.seriesName === '价格') { close = p.value; } } lines.push('背离信号：' + (signal || '无')); function fmt(v) { var n = Number(Array.isArray(v) ? v[1] : v); return isFinite(n) ? n.toFixed(2) : String(v); } if (close !== null && close !== undefined && close !== '') { lines.push('价格 ' + fmt(close)); } for (var i = 0; i < params.length; i++) { var p = params[i]; if (!p) continue; if (p.seriesName === '价格' || p.seriesName === '背离信号') continue; if (p.value === null || typeof p.value === 'undefined') continue; lines.push(p.seriesName + ' ' + fmt(p.value)); } return lines.join('<br/>'); }"
+).js_code
+STYLE_PERIOD_MINUTES = {"1分钟": 1, "5分钟": 5, "30分钟": 30, "60分钟": 60}
+VOLUME_ENERGY_SHORT_DAYS = 5
+VOLUME_ENERGY_LONG_DAYS = 20
+VOLUME_TUN_FIELD_LIST = "volume,amount,turnoverRate,tun,turnoverRatio,turnover"
 
 
 def render_panel_title(title, subtitle=None):
@@ -92,52 +141,6 @@ def generate_stock_distribution_stats(seed_text):
     return u, d, flat, halt, limit_up, limit_down
 
 
-def calc_step_return_series(prices):
-    values = []
-    prev = None
-    for p in prices or []:
-        try:
-            v = float(p)
-        except Exception:
-            v = None
-        if v is None:
-            values.append(None)
-            continue
-        if prev is None or not prev:
-            values.append(None)
-            prev = v
-            continue
-        values.append((v / prev - 1) * 100)
-        prev = v
-    return values
-
-
-def rolling_sum_series(values, window):
-    try:
-        window = int(window or 1)
-    except Exception:
-        window = 1
-    window = max(1, window)
-
-    out = []
-    seq = values or []
-    for i in range(len(seq)):
-        s = 0.0
-        count = 0
-        start = max(0, i - window + 1)
-        for j in range(start, i + 1):
-            v = seq[j]
-            if v is None:
-                continue
-            try:
-                s += float(v)
-                count += 1
-            except Exception:
-                continue
-        out.append(s if count else None)
-    return out
-
-
 def format_day_label(x, start_dt=None):
     if x is None:
         return None
@@ -165,41 +168,6 @@ def format_day_label(x, start_dt=None):
     return text
 
 
-def normalize_minute_key(x, start_dt=None):
-    if x is None:
-        return None
-    if isinstance(x, int):
-        return str(x)
-    text = str(x).strip()
-    if "\n" in text:
-        parts = text.split("\n")
-        if len(parts) >= 2 and "-" in parts[0] and ":" in parts[1]:
-            return f"{parts[0]} {parts[1][:5]}"
-    if " " in text and "-" in text and ":" in text:
-        parts = text.split(" ", 1)
-        if len(parts) == 2:
-            return f"{parts[0]} {parts[1][:5]}"
-    if "T" in text and "-" in text and ":" in text:
-        parts = text.split("T", 1)
-        if len(parts) == 2:
-            time_part = parts[1].split(".", 1)[0]
-            return f"{parts[0]} {time_part[:5]}"
-    if ":" in text and start_dt is not None:
-        return f"{start_dt.isoformat()} {text[:5]}"
-    return text
-
-
-def format_minute_label(key_text):
-    if key_text is None:
-        return None
-    text = str(key_text)
-    if " " in text and "-" in text and ":" in text:
-        parts = text.split(" ", 1)
-        if len(parts) == 2:
-            return f"{parts[0]}\n{parts[1]}"
-    return text
-
-
 def extract_label_date(x):
     if x is None:
         return None
@@ -235,84 +203,43 @@ def build_trading_dates(start_dt, end_dt):
     return out
 
 
-def align_series_by_x(x1, y1, x2, y2, key_func=None, label_func=None):
-    m2 = {}
-    for x, v in zip(x2 or [], y2 or []):
-        k = key_func(x) if key_func else x
-        if k is None:
-            continue
-        if k not in m2:
-            m2[k] = v
-    aligned_x = []
-    aligned_y1 = []
-    aligned_y2 = []
-    for x, v1 in zip(x1 or [], y1 or []):
-        k = key_func(x) if key_func else x
-        if k is None:
-            continue
-        if k in m2:
-            aligned_x.append(label_func(k) if label_func else x)
-            aligned_y1.append(v1)
-            aligned_y2.append(m2[k])
-    return aligned_x, aligned_y1, aligned_y2
-
-
-def decide_size_style(diff_series, threshold=0.3):
-    if not diff_series:
-        return "未知"
-    last = None
-    for v in reversed(diff_series):
-        if v is not None:
-            last = v
-            break
-    if last is None:
-        return "未知"
-    if last >= threshold:
-        return "小盘风格"
-    if last <= -threshold:
-        return "大盘风格"
-    return "均衡"
-
-
-def build_size_style_option(x_data, diff_ret, threshold):
-    threshold_up_color = "#EF4444"
-    threshold_mid_color = "#6B7280"
-    threshold_down_color = "#22C55E"
+def build_style_rotation_option(x_data, names, series, threshold, max_points=CHART_POINT_BUDGET):
+    if max_points and series and len(x_data or []) > max_points:
+        idx = lttb_indices(series[0], max_points)
+        x_data = take(x_data, idx)
+        series = [take(values, idx) for values in series]
+    colors = ["#10B981", "#3B82F6", "#F59E0B", "#8B5CF6", "#EC4899", "#6B7280"]
+    option_series = []
+    for i, (name, values) in enumerate(zip(names, series)):
+        color = colors[i % len(colors)]
+        item = {
+            "name": name,
+            "type": "line",
+            "data": values,
+            "smooth": True,
+            "connectNulls": True,
+            "showSymbol": False,
+            "lineStyle": {"width": 2 if i == 0 else 1.2, "color": color},
+            "itemStyle": {"color": color},
+        }
+        if i == 0:
+            item["markLine"] = {
+                "symbol": "none",
+                "label": {"show": False},
+                "data": [
+                    {"yAxis": float(threshold), "lineStyle": {"type": "dashed", "width": 1, "color": "#EF4444"}},
+                    {"yAxis": 0, "lineStyle": {"type": "dashed", "width": 1, "color": "#6B7280"}},
+                    {"yAxis": float(-threshold), "lineStyle": {"type": "dashed", "width": 1, "color": "#22C55E"}},
+                ],
+            }
+        option_series.append(item)
     return {
         "tooltip": {"trigger": "axis"},
-        "legend": {"show": False},
-        "grid": {"left": 48, "right": 44, "top": 20, "bottom": 34},
+        "legend": {"type": "scroll", "top": 0, "textStyle": {"fontSize": 10}},
+        "grid": {"left": 48, "right": 44, "top": 28, "bottom": 34},
         "xAxis": {"type": "category", "data": x_data, "boundaryGap": False},
         "yAxis": {"type": "value", "axisLabel": {"formatter": "{value}%"}},
-        "series": [
-            {
-                "name": "强度",
-                "type": "line",
-                "data": diff_ret,
-                "smooth": True,
-                "connectNulls": True,
-                "showSymbol": False,
-                "lineStyle": {"width": 2, "color": "#10B981"},
-                "markLine": {
-                    "symbol": "none",
-                    "label": {"show": False},
-                    "data": [
-                        {
-                            "yAxis": float(threshold),
-                            "lineStyle": {"type": "dashed", "width": 1, "color": threshold_up_color},
-                        },
-                        {
-                            "yAxis": 0,
-                            "lineStyle": {"type": "dashed", "width": 1, "color": threshold_mid_color},
-                        },
-                        {
-                            "yAxis": float(-threshold),
-                            "lineStyle": {"type": "dashed", "width": 1, "color": threshold_down_color},
-                        },
-                    ],
-                },
-            },
-        ],
+        "series": option_series,
     }
 
 
@@ -338,16 +265,96 @@ def render_size_style_legend(threshold):
     )
 
 
-def render_size_style_trend(ctx):
+def bars_to_series(period, bars):
+    if period == "日线":
+        keys = np.datetime_as_string(bars["ts"].astype("datetime64[D]"), unit="D")
+    else:
+        bars = resample_minute_bars(bars, STYLE_PERIOD_MINUTES.get(period, 5))
+        keys = np.char.replace(np.datetime_as_string(bars["ts"].astype("datetime64[m]"), unit="m"), "T", "\n")
+    return keys, bars["close"]
+
+
+def load_style_bars(ctx, names, period, start_dt, end_dt):
     fetch_index_day_list = ctx["fetch_index_day_list"]
     fetch_index_min_list = ctx["fetch_index_min_list"]
+    index_min_map = ctx["INDEX_MIN_MAP"]
+
+    def load(name):
+        cfg = index_min_map[name]
+        if period == "日线":
+            bars = sync_bars(fetch_index_day_list, cfg["exponentId"], "day", start_dt, end_dt, expected_code=cfg.get("code"))
+            return slice_bars(bars, start_dt, end_dt)
+        return load_minute_bars(fetch_index_min_list, cfg["exponentId"], start_dt, end_dt, expected_code=cfg.get("code"))
+
+    loaded, errors = map_limited(load, names, max_workers=3)
+    return {n: v for n, v, e in zip(names, loaded, errors) if e is None and v is not None}
+
+
+def style_series_nodes(graph, ctx, names, period, start_dt, end_dt):
+    # raw bars enter the graph versioned by content, so a new bar only re-resamples the index it belongs to
+    span = f"{start_dt.isoformat()}:{end_dt.isoformat()}"
+    freq = "day" if period == "日线" else "1m"
+    nodes = {}
+    for name, bars in load_style_bars(ctx, names, period, start_dt, end_dt).items():
+        src = set_input(graph, f"raw:{name}:{freq}:{span}", bars, data_digest(bars["ts"], bars["close"]))
+        nodes[name] = define(graph, f"bars:{name}:{period}:{span}", lambda b: bars_to_series(period, b), [src])
+    return nodes
+
+
+def synthetic_series_nodes(graph, ctx, names, period, start_dt, end_dt):
+    span = f"{start_dt.isoformat()}:{end_dt.isoformat()}"
+    series_by_name = generate_style_series(ctx, names, period, start_dt, end_dt)
+    return {n: set_input(graph, f"synthetic:{n}:{period}:{span}", v, span) for n, v in series_by_name.items()}
+
+
+def generate_style_series(ctx, names, period, start_dt, end_dt):
     generate_period_series = ctx["generate_period_series"]
+    out = {}
+    for i, name in enumerate(names):
+        x, y = generate_period_series(
+            "60分钟" if period == "日线" else period,
+            start_dt=start_dt,
+            base=3000 + 800 * i,
+            fluctuation=15 + 3 * i,
+            seed_text=f"style|{name}|{period}|{start_dt.isoformat()}|{end_dt.isoformat()}",
+        )
+        if period == "日线":
+            first = {}
+            for k, v in zip((extract_label_date(v) for v in x), y):
+                first.setdefault(k, v)
+            x, y = list(first.keys()), list(first.values())
+        out[name] = (np.array(x), y)
+    return out
+
+
+def style_view(result, period, start_dt, end_dt):
+    keys, pair_names, spreads = result
+    x_data = keys.tolist()
+    start_key = start_dt.isoformat()
+    end_key = end_dt.isoformat()
+    dates = np.array([x[:10] for x in x_data])
+    keep = (dates >= start_key) & (dates <= end_key) if len(dates) else np.zeros(0, dtype=bool)
+    if keep.any() and not keep.all():
+        x_data = [x for x, k in zip(x_data, keep.tolist()) if k]
+        spreads = spreads[keep]
+
+    if period == "日线":
+        expected_dates = build_trading_dates(start_dt, end_dt)
+        if expected_dates:
+            pos = {d: i for i, d in enumerate(x_data)}
+            rows = np.array([pos.get(d, -1) for d in expected_dates], dtype=np.int64)
+            filled = np.full((len(expected_dates), spreads.shape[1]), np.nan)
+            filled[rows >= 0] = spreads[rows[rows >= 0]]
+            x_data, spreads = expected_dates, filled
+    return x_data, pair_names, spreads
+
+
+@st.fragment
+def render_size_style_trend(ctx):
     get_refresh_token = ctx["get_refresh_token"]
-    parse_indicator_day_series = ctx["parse_indicator_day_series"]
-    parse_index_min_series = ctx["parse_index_min_series"]
 
     st.markdown(
-        '<div style="text-align:center;font-size:22px;font-weight:800;color:#111827;line-height:22px;">大小风格趋势</div>',
+        '<div style="text-align:center;font-size:22px;font-weight:800;color:#111827;line-height:22px;">风格轮动趋势</div>',
         unsafe_allow_html=True,
     )
 
@@ -376,184 +383,265 @@ def render_size_style_trend(ctx):
         )
     prefetch_start_dt = start_dt - timedelta(days=7)
 
-    large_exponent_id = 3
-    small_exponent_id = 12
+    members = [n for n in pair_members(STYLE_PAIRS) if n in ctx["INDEX_MIN_MAP"]]
+    graph = session_graph("index_monitor")
+    nodes = {}
+    if get_refresh_token():
+        try:
+            nodes = style_series_nodes(graph, ctx, members, period, prefetch_start_dt, end_dt)
+        except Exception:
+            nodes = {}
+    if not nodes:
+        nodes = synthetic_series_nodes(graph, ctx, members, period, start_dt, end_dt)
+    names = [n for n in members if n in nodes]
+    window = style_window(period)
+    start_key = start_dt.isoformat()
+    end_key = end_dt.isoformat()
+    span = f"{start_key}:{end_key}"
+    spread_node = define(
+        graph,
+        f"style:{period}:{window}:{','.join(nodes[n] for n in names)}",
+        lambda *series: compute_style_spreads(dict(zip(names, series)), STYLE_PAIRS, window),
+        [nodes[n] for n in names],
+    )
+    view_node = define(
+        graph,
+        f"style_view:{spread_node}:{span}",
+        lambda result: style_view(result, period, start_dt, end_dt),
+        [spread_node],
+    )
+    x_data, pair_names, spreads = evaluate(graph, view_node)
+
+    pairs = {p["name"]: p for p in STYLE_PAIRS}
+    latest = [last_valid(spreads[:, i]) for i in range(len(pair_names))]
+    if pair_names:
+        first = pairs[pair_names[0]]
+        style = decide_pair_style(first, latest[0], threshold=STYLE_THRESHOLD)
+        diff_text = "--" if latest[0] is None else f"{latest[0]:+.4f}%"
+        st.markdown(
+            f'<div style="color:#111827;font-size:12px;margin-top:2px;">当前风格：{pair_names[0]} {style}（滚动{window}期 强度：{diff_text}）</div>',
+            unsafe_allow_html=True,
+        )
+        others = [
+            f"{name} {decide_pair_style(pairs[name], v)}"
+            for name, v in zip(pair_names[1:], latest[1:])
+            if v is not None
+        ]
+        if others:
+            st.caption(" · ".join(others))
+
+    render_size_style_legend(STYLE_THRESHOLD)
+    option_node = define(
+        graph,
+        f"style_option:{view_node}",
+        lambda view: build_style_rotation_option(
+            view[0],
+            view[1],
+            [[compact_float(v, 4) for v in view[2][:, i].tolist()] for i in range(len(view[1]))],
+            STYLE_THRESHOLD,
+        ),
+        [view_node],
+    )
+    option = evaluate(graph, option_node)
+    st_echarts(option, height="190px", key="size_style_chart")
+
+
+def build_price_tracking_option(rows):
+    names = ["价格", "VWAP", "卡尔曼趋势", "日内高", "日内低"]
+    styles = [
+        {"width": 2, "color": "#111827"},
+        {"width": 1.5, "color": "#F59E0B"},
+        {"width": 1.5, "color": "#8B5CF6", "type": "dashed"},
+        {"width": 1, "color": "#EF4444", "type": "dotted"},
+        {"width": 1, "color": "#2EBD85", "type": "dotted"},
+    ]
+    return {
+        "animation": False,
+        "dataset": {"source": rows, "sourceHeader": False},
+        "tooltip": {"trigger": "axis"},
+        "legend": {"top": 0, "data": names[:3], "textStyle": {"fontSize": 10}},
+        "grid": {"left": 10, "right": 14, "top": 26, "bottom": 6, "containLabel": True},
+        "xAxis": {"type": "category", "boundaryGap": False, "axisLabel": {"hideOverlap": True, "fontSize": 10}},
+        "yAxis": {"type": "value", "scale": True, "axisLabel": {"fontSize": 10}},
+        "series": [
+            {
+                "name": name,
+                "type": "line",
+                "encode": {"x": 0, "y": i + 1},
+                "showSymbol": False,
+                "lineStyle": style,
+                "itemStyle": {"color": style["color"]},
+            }
+            for i, (name, style) in enumerate(zip(names, styles))
+        ],
+    }
 
-    x_large = []
-    y_large = []
-    x_small = []
-    y_small = []
 
-    has_token = bool(get_refresh_token())
-    try:
-        if period == "日线":
-            if has_token:
-                large_list = fetch_index_day_list(
-                    prefetch_start_dt.isoformat(), end_dt.isoformat(), str(large_exponent_id), "close"
-                )
-                small_list = fetch_index_day_list(
-                    prefetch_start_dt.isoformat(), end_dt.isoformat(), str(small_exponent_id), "close"
-                )
-                x_large, y_large = parse_indicator_day_series(
-                    large_list, ["close", "closePrice", "price"], start_dt=prefetch_start_dt
-                )
-                x_small, y_small = parse_indicator_day_series(
-                    small_list, ["close", "closePrice", "price"], start_dt=prefetch_start_dt
-                )
-            else:
-                x_large, y_large = generate_period_series(
-                    "60分钟",
-                    start_dt=start_dt,
-                    base=4200,
-                    fluctuation=20,
-                    seed_text=f"size_style|large|60|{start_dt.isoformat()}|{end_dt.isoformat()}",
-                )
-                x_small, y_small = generate_period_series(
-                    "60分钟",
-                    start_dt=start_dt,
-                    base=6200,
-                    fluctuation=25,
-                    seed_text=f"size_style|small|60|{start_dt.isoformat()}|{end_dt.isoformat()}",
-                )
-        else:
-            period_int = {"1分钟": 1, "5分钟": 5, "30分钟": 30, "60分钟": 60}.get(period, 5)
-            if has_token:
-                field_list = "time,close"
-                large_list = fetch_index_min_list(
-                    prefetch_start_dt.isoformat(), end_dt.isoformat(), large_exponent_id, period_int, field_list
-                )
-                small_list = fetch_index_min_list(
-                    prefetch_start_dt.isoformat(), end_dt.isoformat(), small_exponent_id, period_int, field_list
-                )
-                x_large, y_large = parse_index_min_series(
-                    large_list, start_dt=prefetch_start_dt, period_minutes=period_int
-                )
-                x_small, y_small = parse_index_min_series(
-                    small_list, start_dt=prefetch_start_dt, period_minutes=period_int
-                )
-            else:
-                x_large, y_large = generate_period_series(
-                    period,
-                    start_dt=start_dt,
-                    base=4200,
-                    fluctuation=20,
-                    seed_text=f"size_style|large|{period}|{start_dt.isoformat()}|{end_dt.isoformat()}",
-                )
-                x_small, y_small = generate_period_series(
-                    period,
-                    start_dt=start_dt,
-                    base=6200,
-                    fluctuation=25,
-                    seed_text=f"size_style|small|{period}|{start_dt.isoformat()}|{end_dt.isoformat()}",
-                )
-    except Exception:
-        x_large, y_large = generate_period_series(
-            "5分钟",
-            start_dt=start_dt,
-            base=4200,
-            fluctuation=20,
-            seed_text=f"size_style|large|5|{start_dt.isoformat()}|{end_dt.isoformat()}",
+@st.fragment(run_every=BREADTH_POLL_SECONDS)
+def render_price_tracking(ctx):
+    index_min_map = ctx["INDEX_MIN_MAP"]
+    fetch_index_min_list = ctx["fetch_index_min_list"]
+    get_refresh_token = ctx["get_refresh_token"]
+
+    names = list(index_min_map.keys())
+    header = st.columns([1.6, 1])
+    with header[0]:
+        render_panel_title("价格追踪与当日趋势预测", f"{FORECAST_MINUTES}分钟预测")
+    with header[1]:
+        selected = st.selectbox("指数", names, key="price_tracking_index", label_visibility="collapsed")
+    if not get_refresh_token():
+        st.caption("未配置refresh-token，无法获取分时行情")
+        return
+    day = date.today()
+    while day.weekday() >= 5:
+        day = day - timedelta(days=1)
+    provisional = day == date.today() and is_trading_time()
+
+    def track(name):
+        cfg = index_min_map[name]
+        bars = load_minute_bars(fetch_index_min_list, cfg["exponentId"], day, day, expected_code=cfg.get("code"))
+        state = get_trend_tracker(day.isoformat(), cfg["exponentId"])
+        return state, feed_bars(state, bars, provisional_last=provisional)
+
+    results, errors = map_limited(track, names, max_workers=3)
+    table = []
+    for name, result in zip(names, results):
+        snap = result[1] if result else None
+        if not snap or snap["close"] is None:
+            continue
+        rng = (snap["high"] or 0) - (snap["low"] or 0)
+        table.append(
+            {
+                "指数": name,
+                "最新": round(snap["close"], 2),
+                "偏离VWAP(%)": None if not snap["vwap"] else round((snap["close"] / snap["vwap"] - 1.0) * 100.0, 2),
+                "区间位置(%)": round((snap["close"] - snap["low"]) / rng * 100.0, 1) if rng > 0 else None,
+                "斜率(点/分)": None if snap["slope"] is None else round(snap["slope"], 3),
+                "预测": None if snap["forecast"] is None else f"{snap['forecast']:.2f}±{snap['forecast_sd']:.2f}",
+            }
         )
-        x_small, y_small = generate_period_series(
-            "5分钟",
-            start_dt=start_dt,
-            base=6200,
-            fluctuation=25,
-            seed_text=f"size_style|small|5|{start_dt.isoformat()}|{end_dt.isoformat()}",
+    if not table:
+        st.caption(f"{day.isoformat()} 暂无分时行情" + ("（获取失败）" if any(errors) else ""))
+        return
+
+    state = results[names.index(selected)][0] if results[names.index(selected)] else None
+    history = list(state["history"]) if state else []
+    if history:
+        rows = [
+            [str(ts)[11:16]] + [compact_float(v, 2) for v in values]
+            for ts, *values in history
+        ]
+        option = cached_option(
+            "price_tracking_chart",
+            build_price_tracking_option,
+            rows,
+            version=(selected, day.isoformat(), len(rows)),
         )
+        st_echarts_stream(option, height="150px", key="price_tracking_chart")
+    st.dataframe(pd.DataFrame(table), hide_index=True, use_container_width=True, height=248)
 
-    if period == "日线":
-        x_large = [format_day_label(v, start_dt=prefetch_start_dt) for v in (x_large or [])]
-        x_small = [format_day_label(v, start_dt=prefetch_start_dt) for v in (x_small or [])]
 
-    if period == "日线":
-        x_data, large_price, small_price = align_series_by_x(
-            x_large,
-            y_large,
-            x_small,
-            y_small,
-            key_func=lambda v: format_day_label(v, start_dt=prefetch_start_dt),
-            label_func=lambda k: k,
-        )
-    else:
-        x_data, large_price, small_price = align_series_by_x(
-            x_large,
-            y_large,
-            x_small,
-            y_small,
-            key_func=normalize_minute_key,
-            label_func=format_minute_label,
-        )
-    if not x_data and x_large and x_small and y_large and y_small:
-        n = min(len(x_large), len(x_small), len(y_large), len(y_small))
-        if n > 0:
-            x_data = x_large[:n]
-            large_price = y_large[:n]
-            small_price = y_small[:n]
-    large_step = calc_step_return_series(large_price)
-    small_step = calc_step_return_series(small_price)
-    diff_step = []
-    for a, b in zip(small_step, large_step):
-        if a is None or b is None:
-            diff_step.append(None)
-        else:
-            diff_step.append(a - b)
-    if period == "日线":
-        window = 3
-    elif period == "30分钟" or period == "60分钟":
-        window = 5
-    else:
-        window = 10
-    diff_ret = rolling_sum_series(diff_step, window)
- 
-    threshold = 0.3
-    start_key = start_dt.isoformat()
-    end_key = end_dt.isoformat()
-    keep_idx = []
-    for i, x in enumerate(x_data or []):
-        d = extract_label_date(x)
-        if d is None or (d >= start_key and d <= end_key):
-            keep_idx.append(i)
-    if keep_idx and len(keep_idx) != len(x_data or []):
-        x_data = [x_data[i] for i in keep_idx]
-        diff_ret = [diff_ret[i] for i in keep_idx]
+def build_volume_energy_option(labels, ratio_short, ratio_long, short_days, long_days):
+    return {
+        "animation": False,
+        "tooltip": {"trigger": "axis"},
+        "legend": {"top": 0, "data": [f"对比{short_days}日", f"对比{long_days}日"], "textStyle": {"fontSize": 10}},
+        "grid": {"left": 10, "right": 14, "top": 26, "bottom": 6, "containLabel": True},
+        "xAxis": {"type": "category", "data": labels, "boundaryGap": False, "axisLabel": {"hideOverlap": True, "fontSize": 10}},
+        "yAxis": {"type": "value", "scale": True, "axisLabel": {"formatter": "{value}%", "fontSize": 10}},
+        "series": [
+            {
+                "name": f"对比{short_days}日",
+                "type": "line",
+                "data": [compact_float(v, 1) for v in ratio_short],
+                "showSymbol": False,
+                "lineStyle": {"width": 2, "color": "#EF4444"},
+                "itemStyle": {"color": "#EF4444"},
+                "markLine": {"symbol": "none", "silent": True, "data": [{"yAxis": 100}], "lineStyle": {"color": "#9CA3AF", "type": "dashed"}, "label": {"show": False}},
+            },
+            {
+                "name": f"对比{long_days}日",
+                "type": "line",
+                "data": [compact_float(v, 1) for v in ratio_long],
+                "showSymbol": False,
+                "lineStyle": {"width": 1.5, "color": "#2563EB"},
+                "itemStyle": {"color": "#2563EB"},
+            },
+        ],
+    }
 
-    if period == "日线":
-        expected_dates = build_trading_dates(start_dt, end_dt)
-        if expected_dates:
-            m = {}
-            for x, v in zip(x_data or [], diff_ret or []):
-                d = extract_label_date(x)
-                if d is not None and d not in m:
-                    m[d] = v
-            x_data = expected_dates
-            diff_ret = [m.get(d) for d in expected_dates]
-
-    style = decide_size_style(diff_ret, threshold=threshold)
-    last_diff = None
-    for v in reversed(diff_ret):
-        if v is not None:
-            last_diff = v
-            break
-    diff_text = "--" if last_diff is None else f"{last_diff:+.4f}%"
-    st.markdown(
-        f'<div style="color:#111827;font-size:12px;margin-top:2px;">当前风格：{style}（滚动{window}期 强度：{diff_text}）</div>',
-        unsafe_allow_html=True,
-    )
 
-    diff_ret_display = []
-    for v in diff_ret:
-        if v is None:
-            diff_ret_display.append(None)
-        else:
-            try:
-                diff_ret_display.append(f"{float(v):.4f}")
-            except Exception:
-                diff_ret_display.append(None)
+@st.fragment(run_every=BREADTH_POLL_SECONDS)
+def render_volume_energy(ctx):
+    index_min_map = ctx["INDEX_MIN_MAP"]
+    fetch_index_min_list = ctx["fetch_index_min_list"]
+    get_refresh_token = ctx["get_refresh_token"]
 
-    render_size_style_legend(threshold)
-    option = build_size_style_option(x_data, diff_ret_display, threshold)
-    st_echarts(option, height="170px", key="size_style_chart")
+    header = st.columns([1.6, 1])
+    with header[0]:
+        render_panel_title("成交量能变动", "同一时刻累计量")
+    with header[1]:
+        name = st.selectbox(
+            "指数", list(index_min_map.keys()), key="volume_energy_index", label_visibility="collapsed"
+        )
+    if not get_refresh_token():
+        st.caption("未配置refresh-token，无法获取分时成交量")
+        return
+    cfg = index_min_map[name]
+    day = date.today()
+    while day.weekday() >= 5:
+        day = day - timedelta(days=1)
+    try:
+        profile, version = update_slot_profile(
+            fetch_index_min_list, cfg["exponentId"], day, n_days=VOLUME_ENERGY_LONG_DAYS, expected_code=cfg.get("code")
+        )
+        bars = load_minute_bars(fetch_index_min_list, cfg["exponentId"], day, day, expected_code=cfg.get("code"))
+    except Exception as e:
+        st.caption(f"分时成交量获取失败：{e}")
+        return
+    short = cached_slot_stats(cfg["exponentId"], version, profile, day, VOLUME_ENERGY_SHORT_DAYS)
+    long = cached_slot_stats(cfg["exponentId"], version, profile, day, VOLUME_ENERGY_LONG_DAYS)
+    today = today_slot_row(profile, bars, day)
+    if short is None or long is None:
+        st.caption("缺少历史分时成交量")
+        return
+    if not is_previous_session(profile, short["days"][-1], day):
+        st.caption(f"历史分时成交量只同步到 {short['days'][-1]}，暂不计算量比")
+        return
+    if today is None or np.isnan(today["cumvol"]).all():
+        st.caption(f"{day.isoformat()} 暂无分时成交")
+        return
+
+    cumvol = today["cumvol"]
+    slot = int(np.flatnonzero(~np.isnan(cumvol))[-1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio_short = cumvol / short["avg_cumvol"] * 100.0
+        ratio_long = cumvol / long["avg_cumvol"] * 100.0
+    share = long["avg_share"][slot]
+    projected = cumvol[slot] / share if share and share == share else None
+    full_avg = long["avg_cumvol"][-1]
+
+    metrics = st.columns(3)
+    metrics[0].metric(f"量比·{VOLUME_ENERGY_SHORT_DAYS}日", f"{ratio_short[slot] / 100.0:.2f}")
+    metrics[1].metric(f"量比·{len(long['days'])}日", f"{ratio_long[slot] / 100.0:.2f}")
+    metrics[2].metric(
+        "预计全天(万手)",
+        "--" if projected is None else f"{projected / 1e4:,.0f}",
+        None if projected is None or not full_avg else f"{(projected / full_avg - 1.0) * 100.0:+.1f}%",
+        delta_color="off",
+    )
+    end = slot + 1
+    option = cached_option(
+        "volume_energy_chart",
+        build_volume_energy_option,
+        SLOT_LABELS[:end],
+        ratio_short[:end].tolist(),
+        ratio_long[:end].tolist(),
+        VOLUME_ENERGY_SHORT_DAYS,
+        len(long["days"]),
+    )
+    st.caption(f"截至 {SLOT_LABELS[slot]} 累计 {cumvol[slot] / 1e4:,.0f} 万手")
+    st_echarts(option, height="168px", key="volume_energy_chart")
 
 
 def render_monitor_overview(ctx):
@@ -561,29 +649,11 @@ def render_monitor_overview(ctx):
 
     with row[0]:
         with st.container(border=True):
-            st.markdown(
-                """
-                <div style="height:320px; display:flex; align-items:center; justify-content:center;">
-                  <div style="font-size:22px; font-weight:800; color:#666666; text-align:center;">
-                    价格追踪与当日趋势预测
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+            render_price_tracking(ctx)
 
     with row[1]:
         with st.container(border=True):
-            st.markdown(
-                """
-                <div style="height:320px; display:flex; align-items:center; justify-content:center;">
-                  <div style="font-size:22px; font-weight:800; color:#666666; text-align:center;">
-                    成交量能变动
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+            render_volume_energy(ctx)
 
     with row[2]:
         with st.container(border=True):
@@ -1054,18 +1124,104 @@ def detect_divergence(price, indicator, x_data, pivot_window=3, max_bars=200):
     return signals
 
 
+def detect_divergence_incremental(state, price, indicator, x_data):
+    window = max(1, int(state.get("pivot_window") or 3))
+    max_bars = int(state.get("max_bars") or 200)
+    n = min(len(price or []), len(x_data or []))
+
+    pos = -1
+    scanned_x = state.get("scanned_x")
+    scanned_seq = state.get("scanned_seq")
+    if scanned_x is not None:
+        for i in range(n - 1, -1, -1):
+            if x_data[i] == scanned_x:
+                pos = i
+                break
+    if pos >= 0:
+        seq0 = int(scanned_seq) - pos
+    elif scanned_seq is not None:
+        seq0 = int(scanned_seq) + max_bars + 1
+    else:
+        seq0 = 0
+
+    confirmed_end = n - window
+    if confirmed_end - 1 <= pos:
+        return []
+
+    lo = max(0, pos + 1 - window)
+    segment = list(price[lo:n])
+    signals = []
+    for pivot_kind, kind in (("high", "顶背离"), ("low", "底背离")):
+        pivots = [lo + i for i in find_pivots(segment, window, pivot_kind) if lo + i > pos]
+        prev = (state.get("last_pivot") or {}).get(pivot_kind)
+        for idx in pivots:
+            try:
+                p2 = float(price[idx])
+            except Exception:
+                p2 = None
+            try:
+                i2 = float(indicator[idx]) if idx < len(indicator or []) and indicator[idx] is not None else None
+            except Exception:
+                i2 = None
+            cur = {"x": x_data[idx], "seq": seq0 + idx, "price": p2, "indicator": i2}
+            if (
+                prev is not None
+                and cur["seq"] - prev["seq"] <= max_bars
+                and None not in (prev.get("price"), prev.get("indicator"), p2, i2)
+            ):
+                p1 = prev["price"]
+                i1 = prev["indicator"]
+                if (kind == "顶背离" and p2 > p1 and i2 < i1) or (kind == "底背离" and p2 < p1 and i2 > i1):
+                    signals.append(
+                        {
+                            "kind": kind,
+                            "x": cur["x"],
+                            "price": p2,
+                            "indicator": i2,
+                            "seq": cur["seq"],
+                            "source": state.get("source"),
+                        }
+                    )
+            prev = cur
+        state.setdefault("last_pivot", {})[pivot_kind] = prev
+
+    state["scanned_x"] = x_data[confirmed_end - 1]
+    state["scanned_seq"] = seq0 + confirmed_end - 1
+    signals.sort(key=lambda s: s.get("seq", 0))
+    return add_signals(state, signals)
+
+
+def update_stored_divergence(index_code, period_key, x_data, close, payload):
+    stored = {}
+    for key, source, values in (
+        ("macd", "MACD", payload["macd"]["dif"]),
+        ("kdj", "KDJ", payload["kdj"]["j"]),
+        ("rsi", "RSI", payload["rsi"]["rsi"]),
+    ):
+        state = load_signal_state(index_code, period_key, source)
+        scanned_before = state.get("scanned_x")
+        try:
+            detect_divergence_incremental(state, close, values, x_data)
+            if state.get("scanned_x") != scanned_before:
+                save_signal_state(state)
+        except Exception:
+            pass
+        stored[key] = state.get("signals") or []
+    return stored
+
+
 @st.cache_data(ttl=300)
-def compute_divergence_payload(x_data, close, high, low):
+def compute_divergence_payload(x_data, close, high, low, with_signals=True):
     dif, dea, hist = macd_series(close)
     k, d, j = kdj_series(high, low, close)
     rsi = rsi_series(close)
-    macd_signals = detect_divergence(close, dif, x_data)
+    macd_signals = detect_divergence(close, dif, x_data) if with_signals else []
     for s in macd_signals:
         s["source"] = "MACD"
-    kdj_signals = detect_divergence(close, j, x_data)
+    kdj_signals = detect_divergence(close, j, x_data) if with_signals else []
     for s in kdj_signals:
         s["source"] = "KDJ"
-    rsi_signals = detect_divergence(close, rsi, x_data)
+    rsi_signals = detect_divergence(close, rsi, x_data) if with_signals else []
     for s in rsi_signals:
         s["source"] = "RSI"
     return {
@@ -1076,12 +1232,27 @@ def compute_divergence_payload(x_data, close, high, low):
     }
 
 
-def build_divergence_option(x_data, close, hidden_indicator_series, scatter_series, period_text, legend_items):
-    formatter = JsCode(
-        "function (params) { if (!params || !params.length) { return ''; } var axisLabel = params[0].axisValueLabel || params[0].axisValue || ''; var signal = '无'; var close = null; var lines = [axisLabel]; for (var i = 0; i < params.length; i++) { var p = params[i]; if (!p) continue; if (p.seriesName === '背离信号') { if (p.data && p.data.signal) { signal = p.data.signal; } continue; } if (p.seriesName === '价格') { close = p.value; } } lines.push('背离信号：' + (signal || '无')); if (close !== null && close !== undefined && close !== '') { lines.push('价格 ' + close); } for (var i = 0; i < params.length; i++) { var p = params[i]; if (!p) continue; if (p.seriesName === '价格' || p.seriesName === '背离信号') continue; if (p.value === null || typeof p.value === 'undefined') continue; lines.push(p.seriesName + ' ' + p.value); } return lines.join('<br/>'); }"
-    ).js_code
+def build_divergence_option(
+    x_data, close, hidden_indicator_series, scatter_series, period_text, legend_items, max_points=CHART_POINT_BUDGET
+):
+    if max_points and len(x_data or []) > max_points and len(close or []) == len(x_data):
+        # signal markers sit on category labels, so their bars must survive the downsampling
+        pos = {x: i for i, x in enumerate(x_data)}
+        keep = [
+            pos[p["value"][0]]
+            for series in scatter_series or []
+            for p in series.get("data") or []
+            if p["value"][0] in pos
+        ]
+        idx = lttb_indices(close, max_points, keep=keep)
+        hidden_indicator_series = [
+            dict(series, data=take(series["data"], idx)) if len(series.get("data") or []) == len(x_data) else series
+            for series in hidden_indicator_series or []
+        ]
+        x_data = take(x_data, idx)
+        close = take(close, idx)
     return {
-        "tooltip": {"trigger": "axis", "formatter": formatter},
+        "tooltip": {"trigger": "axis", "formatter": DIVERGENCE_TOOLTIP},
         "legend": {"top": 0, "data": legend_items or [], "selectedMode": False},
         "grid": {"left": 48, "right": 18, "top": 44, "bottom": 30, "containLabel": True},
         "xAxis": {
@@ -1110,6 +1281,7 @@ def build_divergence_option(x_data, close, hidden_indicator_series, scatter_seri
     }
 
 
+@st.fragment
 def render_divergence_signal(ctx):
     with st.container(border=True):
         header = st.columns([2.2, 1.5, 1.5, 1.5, 1.8])
@@ -1190,11 +1362,15 @@ def render_divergence_signal(ctx):
         if has_token:
             try:
                 if day_mode:
-                    data_list = fetch_index_day_list(
-                        prefetch_start_dt.isoformat(),
-                        (day_end_dt or end_dt).isoformat(),
-                        str(cfg["exponentId"]),
-                        "open,high,low,close",
+                    # settled sessions only: a forming candle would keep rewriting stored divergence signals
+                    data_list = load_day_rows(
+                        fetch_index_day_list,
+                        fetch_index_min_list,
+                        cfg["exponentId"],
+                        prefetch_start_dt,
+                        day_end_dt or end_dt,
+                        expected_code=cfg.get("code"),
+                        with_today=False,
                     )
                     date_keys = [
                         "tradeDate",
@@ -1321,12 +1497,14 @@ def render_divergence_signal(ctx):
                         high_full = [high_src.get(k, close_src.get(k)) for k in (x_full or [])]
                         low_full = [low_src.get(k, close_src.get(k)) for k in (x_full or [])]
                 else:
-                    data_list = fetch_index_min_list(
-                        prefetch_start_dt.isoformat(),
-                        end_dt.isoformat(),
+                    data_list = fetch_period_rows(
+                        fetch_index_min_list,
                         cfg["exponentId"],
+                        prefetch_start_dt,
+                        end_dt,
                         period_int,
                         "time,open,high,low,close",
+                        expected_code=cfg.get("code"),
                     )
                     x_full, close_full, high_full, low_full = parse_index_min_ohlc(
                         data_list, start_dt=prefetch_start_dt, period_minutes=period_int
@@ -1402,7 +1580,7 @@ def render_divergence_signal(ctx):
         end_key = end_dt.isoformat()
 
         if day_mode:
-            payload = compute_divergence_payload(x_full, close_full, high_full, low_full)
+            payload = compute_divergence_payload(x_full, close_full, high_full, low_full, not has_token)
 
             x_data = build_trading_dates(start_dt, day_end_dt or end_dt)
             if not x_data:
@@ -1413,17 +1591,11 @@ def render_divergence_signal(ctx):
             close_data = []
             for k in x_data:
                 v = close_map.get(k)
-                if v is None:
-                    close_data.append(None)
-                    continue
-                try:
-                    close_data.append(f"{float(v):.2f}")
-                except Exception:
-                    close_data.append(None)
+                close_data.append(compact_float(v))
 
             keep = None
         else:
-            payload = compute_divergence_payload(x_full, close_full, high_full, low_full)
+            payload = compute_divergence_payload(x_full, close_full, high_full, low_full, not has_token)
             keep = []
             for x in x_full:
                 d = extract_label_date(x)
@@ -1437,18 +1609,22 @@ def render_divergence_signal(ctx):
             for v, ok in zip(payload["close"], keep):
                 if not ok:
                     continue
-                if v is None:
-                    close_data.append(None)
-                    continue
-                try:
-                    close_data.append(f"{float(v):.2f}")
-                except Exception:
-                    close_data.append(None)
+                close_data.append(compact_float(v))
+
+        if has_token:
+            period_key = "day" if day_mode else f"{period_int}m"
+            stored_signals = update_stored_divergence(cfg["code"], period_key, x_full, close_full, payload)
+        else:
+            stored_signals = {
+                "macd": payload["macd"]["signals"],
+                "kdj": payload["kdj"]["signals"],
+                "rsi": payload["rsi"]["signals"],
+            }
 
         indicator_defs = [
-            ("macd", "MACD(DIF)", payload["macd"]["dif"], payload["macd"]["signals"], "#3B82F6", show_macd),
-            ("kdj", "KDJ(J)", payload["kdj"]["j"], payload["kdj"]["signals"], "#F59E0B", show_kdj),
-            ("rsi", "RSI(14)", payload["rsi"]["rsi"], payload["rsi"]["signals"], "#EC4899", show_rsi),
+            ("macd", "MACD(DIF)", payload["macd"]["dif"], stored_signals["macd"], "#3B82F6", show_macd),
+            ("kdj", "KDJ(J)", payload["kdj"]["j"], stored_signals["kdj"], "#F59E0B", show_kdj),
+            ("rsi", "RSI(14)", payload["rsi"]["rsi"], stored_signals["rsi"], "#EC4899", show_rsi),
         ]
         if not (show_macd or show_kdj or show_rsi):
             indicator_defs[0] = (*indicator_defs[0][:5], True)
@@ -1479,24 +1655,12 @@ def render_divergence_signal(ctx):
                         series_map[k] = v
                 for k in x_data:
                     v = series_map.get(k)
-                    if v is None:
-                        series_data.append(None)
-                        continue
-                    try:
-                        series_data.append(f"{float(v):.2f}")
-                    except Exception:
-                        series_data.append(None)
+                    series_data.append(compact_float(v))
             else:
                 for v, ok in zip(series_full, keep):
                     if not ok:
                         continue
-                    if v is None:
-                        series_data.append(None)
-                        continue
-                    try:
-                        series_data.append(f"{float(v):.2f}")
-                    except Exception:
-                        series_data.append(None)
+                    series_data.append(compact_float(v))
 
             indicator_lines.append(
                 {
@@ -1536,7 +1700,7 @@ def render_divergence_signal(ctx):
                 kind = s.get("kind")
                 points.append(
                     {
-                        "value": [d if day_mode else s["x"], s["price"]],
+                        "value": [d if day_mode else s["x"], compact_float(s["price"])],
                         "symbol": "triangle",
                         "symbolRotate": 180 if kind == "顶背离" else 0,
                         "symbolSize": 11,
@@ -1579,8 +1743,7 @@ def render_divergence_signal(ctx):
 
         signal_tag_data = []
         for labels in signal_labels:
-            text = "无" if not labels else "、".join(labels)
-            signal_tag_data.append({"value": 0, "signal": text})
+            signal_tag_data.append({"value": 0, "signal": "、".join(labels)} if labels else None)
 
         signal_tag_series = [
             {
@@ -1593,7 +1756,9 @@ def render_divergence_signal(ctx):
                 "itemStyle": {"opacity": 0},
             }
         ]
-        option = build_divergence_option(
+        option = cached_option(
+            "divergence_chart",
+            build_divergence_option,
             x_data,
             close_data,
             (signal_tag_series + indicator_lines),
@@ -1602,9 +1767,42 @@ def render_divergence_signal(ctx):
             legend_items,
         )
         st_echarts(option, height="353px", key="divergence_chart")
+        if has_token:
+            render_divergence_history(stored_signals)
         st.markdown('</div>', unsafe_allow_html=True)
 
 
+def render_divergence_history(stored_signals, limit=300):
+    rows = []
+    for key, name in (("macd", "MACD背离"), ("kdj", "KDJ背离"), ("rsi", "RSI背离")):
+        for s in stored_signals.get(key) or []:
+            rows.append(
+                {
+                    "时间": str(s.get("x") or "").replace("\n", " "),
+                    "来源": name,
+                    "类型": s.get("kind") or "",
+                    "价格": s.get("price"),
+                    "指标值": s.get("indicator"),
+                }
+            )
+    with st.expander(f"历史背离记录（共{len(rows)}条）", expanded=False):
+        if not rows:
+            st.caption("暂无历史背离记录")
+            return
+        rows.sort(key=lambda r: r["时间"], reverse=True)
+        df = pd.DataFrame(rows[:limit])
+        st.dataframe(
+            df,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "价格": st.column_config.NumberColumn(format="%.2f"),
+                "指标值": st.column_config.NumberColumn(format="%.2f"),
+            },
+        )
+
+
+@st.fragment
 def render_stock_distribution(ctx):
     with st.container(border=True):
         header = st.columns([3, 1.4, 1.4, 1.6])
@@ -1632,68 +1830,10 @@ def render_stock_distribution(ctx):
                 label_visibility="collapsed",
             )
 
-        categories = [
-            ">30%",
-            "30%",
-            "20%",
-            "10%",
-            "7%",
-            "4%",
-            "2%",
-            "0%",
-            "-2%",
-            "-4%",
-            "-7%",
-            "-10%",
-            "-20%",
-            "-30%",
-            "<-30%",
-        ]
-        colors = []
-        for name in categories:
-            if name in {">30%", "30%", "20%", "10%", "7%", "4%", "2%"}:
-                colors.append("#E94B3C")
-            elif name in {"-2%", "-4%", "-7%", "-10%", "-20%", "-30%", "<-30%"}:
-                colors.append("#2EBD85")
-            else:
-                colors.append("#999999")
+        categories = list(BREADTH_CATEGORIES)
+        colors = bucket_colors(categories)
         values = [0 for _ in categories]
 
-        def decide_bucket(pct):
-            try:
-                v = float(pct)
-            except Exception:
-                return None
-            if v > 30.0:
-                return ">30%"
-            if 20.0 < v <= 30.0:
-                return "30%"
-            if 10.0 < v <= 20.0:
-                return "20%"
-            if 7.0 < v <= 10.0:
-                return "10%"
-            if 4.0 < v <= 7.0:
-                return "7%"
-            if 2.0 < v <= 4.0:
-                return "4%"
-            if 0.0 < v <= 2.0:
-                return "2%"
-            if v == 0.0:
-                return "0%"
-            if -2.0 <= v < 0.0:
-                return "-2%"
-            if -4.0 <= v < -2.0:
-                return "-4%"
-            if -7.0 <= v < -4.0:
-                return "-7%"
-            if -10.0 <= v < -7.0:
-                return "-10%"
-            if -20.0 <= v < -10.0:
-                return "-20%"
-            if -30.0 <= v < -20.0:
-                return "-30%"
-            return "<-30%"
-
         fetch_stock_list = ctx.get("fetch_stock_list_by_date_and_fields")
         get_refresh_token = ctx.get("get_refresh_token")
         has_token = bool(get_refresh_token())
@@ -1702,128 +1842,26 @@ def render_stock_distribution(ctx):
             deal_day = deal_day - timedelta(days=1)
         median_val = 0.0
         halt_count_calc = 0
+        limit_up_count = 0
+        limit_down_count = 0
+        actual_date_text = None
+        sample_count = 0
+        bshare_filtered = 0
         if metric == "涨跌幅" and has_token and fetch_stock_list:
             try:
                 field_list = "stockCode,stockName,close,preClose,limitUpPrice,limitDownPrice,volume"
                 data_list = fetch_stock_list(deal_day.isoformat(), field_list, "1")
-                pct_list = []
-                limit_up_count = 0
-                limit_down_count = 0
-                seen_codes = set()
-                actual_date_text = None
-                bshare_filtered = 0
-                for item in data_list or []:
-                    code = get_first_value(item, ["stockCode", "code"])
-                    if code is None:
-                        continue
-                    code_text = str(code).strip()
-                    if not code_text or not code_text.isdigit():
-                        continue
-                    if code_text.startswith("200") or code_text.startswith("900"):
-                        bshare_filtered += 1
-                        continue
-                    if code_text in seen_codes:
-                        continue
-                    seen_codes.add(code_text)
-                    if actual_date_text is None:
-                        actual_date_text = get_first_value(item, ["dealDate", "tradeDate", "date"])
-                    close_val = get_first_value(item, ["close", "closePrice", "price"])
-                    pre_close_val = get_first_value(item, ["preClose", "pre_close", "lastClose", "prevClose"])
-                    lup = get_first_value(item, ["limitUpPrice"])
-                    ldn = get_first_value(item, ["limitDownPrice"])
-                    name_val = get_first_value(item, ["stockName", "name"])
-                    v = get_first_value(item, ["volume", "vol"])
-                    try:
-                        vv = float(v) if v is not None and str(v).strip() != "" else None
-                    except Exception:
-                        vv = None
-                    if vv is None or vv <= 0:
-                        halt_count_calc += 1
-                        continue
-                    pct = None
-                    try:
-                        c = float(close_val) if close_val is not None else None
-                        p = float(pre_close_val) if pre_close_val is not None else None
-                        if pct is None and c is not None and p is not None and p > 0:
-                            raw = (c / p - 1.0) * 100.0
-                            pct = float(Decimal(str(raw)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-                    except Exception:
-                        pct = None
-                    if pct is None:
-                        pct_raw = get_first_value(item, ["changePercent", "pct_chg", "change_percent"])
-                        try:
-                            if pct_raw is not None and str(pct_raw).strip() != "":
-                                pct = float(Decimal(str(pct_raw)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-                        except Exception:
-                            pct = None
-                    try:
-                        if pct is not None:
-                            pct = float(pct)
-                            if pct > 30.0:
-                                pct = 30.0
-                            elif pct < -30.0:
-                                pct = -30.0
-                    except Exception:
-                        pass
-                    bucket_name = decide_bucket(pct)
-                    if bucket_name is not None:
-                        try:
-                            idx = categories.index(bucket_name)
-                            values[idx] += 1
-                        except Exception:
-                            pass
-                        try:
-                            pct_list.append(float(pct))
-                        except Exception:
-                            pass
-                    try:
-                        c = float(close_val) if close_val is not None else None
-                        up = float(lup) if lup is not None else None
-                        dn = float(ldn) if ldn is not None else None
-                        def r2(x):
-                            return float(Decimal(str(x)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-                        def ge_2dp(a, b):
-                            try:
-                                a2 = r2(a)
-                                b2 = r2(b)
-                                return a2 >= b2
-                            except Exception:
-                                return False
-                        def le_2dp(a, b):
-                            try:
-                                a2 = r2(a)
-                                b2 = r2(b)
-                                return a2 <= b2
-                            except Exception:
-                                return False
-                        def eq_2dp(a, b):
-                            try:
-                                return r2(a) == r2(b)
-                            except Exception:
-                                return False
-                        def eq_raw(a, b):
-                            try:
-                                return Decimal(str(a)) == Decimal(str(b))
-                            except Exception:
-                                return False
-                        is_a_share = code_text.startswith(("000", "001", "002", "003", "300", "301", "600", "601", "603", "605", "688")) and not code_text.startswith(("200", "900"))
-                        name_text = str(name_val).strip() if name_val is not None else ""
-                        n_upper = name_text.upper()
-                        is_new = n_upper.startswith("N")
-                        is_star_st = n_upper.startswith("*ST")
-                        if is_a_share and (not is_new) and c is not None and up is not None and eq_2dp(c, up):
-                            limit_up_count += 1
-                        if is_a_share and (not is_new) and c is not None and dn is not None and eq_2dp(c, dn):
-                            limit_down_count += 1
-                    except Exception:
-                        pass
-                if pct_list:
-                    s = sorted(pct_list)
-                    n = len(s)
-                    if n % 2 == 1:
-                        median_val = s[n // 2]
-                    else:
-                        median_val = (s[n // 2 - 1] + s[n // 2]) / 2.0
+                breadth = compute_breadth(data_list, trade_date=deal_day.isoformat())
+                values = breadth["values"]
+                limit_up_count = breadth["limit_up_count"]
+                limit_down_count = breadth["limit_down_count"]
+                halt_count_calc = breadth["halt_count"]
+                median_val = breadth["median"]
+                actual_date_text = breadth["actual_date_text"]
+                sample_count = breadth["sample_count"]
+                bshare_filtered = breadth["bshare_filtered"]
+                if sample_count:
+                    upsert_breadth_record(breadth_record(breadth, deal_day.isoformat()))
             except Exception:
                 categories, values, colors = generate_distribution_data(f"{metric}-{scope}-{deal_day.isoformat()}")
                 halt_count_calc = 0
@@ -1864,22 +1902,17 @@ def render_stock_distribution(ctx):
 ''',
                 unsafe_allow_html=True,
             )
-            if locals().get("actual_date_text"):
+            if actual_date_text:
                 st.markdown(
-                    f'<div style="font-size:12px;color:#6B7280;">数据日期：{str(locals().get("actual_date_text"))}（去重样本：{len(locals().get("seen_codes", set()))}，过滤B股：{locals().get("bshare_filtered",0)}）</div>',
+                    f'<div style="font-size:12px;color:#6B7280;">数据日期：{str(actual_date_text)}（去重样本：{sample_count}，过滤B股：{bshare_filtered}）</div>',
                     unsafe_allow_html=True,
                 )
 
         chart_col, side_col = st.columns([3, 1])
 
-        up_buckets = {">30%", "30%", "20%", "10%", "7%", "4%", "2%"}
-        down_buckets = {"-2%", "-4%", "-7%", "-10%", "-20%", "-30%", "<-30%"}
-        flat_bucket = "0%"
-        up_count = sum(v for c, v in zip(categories, values) if c in up_buckets)
-        down_count = sum(v for c, v in zip(categories, values) if c in down_buckets)
-        flat_count = sum(v for c, v in zip(categories, values) if c == flat_bucket)
-        limit_up_count = locals().get("limit_up_count", 0)
-        limit_down_count = locals().get("limit_down_count", 0)
+        up_count = sum(v for c, v in zip(categories, values) if c in UP_BUCKETS)
+        down_count = sum(v for c, v in zip(categories, values) if c in DOWN_BUCKETS)
+        flat_count = sum(v for c, v in zip(categories, values) if c == FLAT_BUCKET)
 
         halt = halt_count_calc
         total_all = max(up_count + down_count + flat_count + (halt or 0), 1)
@@ -1899,7 +1932,7 @@ def render_stock_distribution(ctx):
             ratio_text = "1:1"
 
         with chart_col:
-            option = build_bar_option("涨跌分布", categories, values, colors, show_title=False)
+            option = cached_option("dist_chart", build_bar_option, "涨跌分布", categories, values, colors, show_title=False)
             st_echarts(option, height="300px", key="dist_chart")
 
         strong_count = up_count
@@ -1988,6 +2021,328 @@ def render_stock_distribution(ctx):
         st.markdown('</div>', unsafe_allow_html=True)
 
 
+def build_breadth_history_option(x_data, records):
+    def col(key):
+        return [r.get(key) for r in records]
+
+    return {
+        "tooltip": {"trigger": "axis"},
+        "legend": {"top": 0, "data": ["上涨", "下跌", "涨停", "跌停", "涨跌中位数", "行情强度"]},
+        "grid": {"left": 48, "right": 48, "top": 36, "bottom": 30, "containLabel": True},
+        "xAxis": {"type": "category", "data": x_data, "boundaryGap": False},
+        "yAxis": [
+            {"type": "value", "name": "家数"},
+            {"type": "value", "name": "%", "axisLabel": {"formatter": "{value}%"}},
+        ],
+        "series": [
+            {"name": "上涨", "type": "line", "data": col("up"), "showSymbol": False, "lineStyle": {"color": "#E94B3C"}, "itemStyle": {"color": "#E94B3C"}},
+            {"name": "下跌", "type": "line", "data": col("down"), "showSymbol": False, "lineStyle": {"color": "#2EBD85"}, "itemStyle": {"color": "#2EBD85"}},
+            {"name": "涨停", "type": "bar", "data": col("limit_up"), "itemStyle": {"color": "#F59E0B"}},
+            {"name": "跌停", "type": "bar", "data": col("limit_down"), "itemStyle": {"color": "#6B7280"}},
+            {"name": "涨跌中位数", "type": "line", "yAxisIndex": 1, "data": col("median"), "showSymbol": False, "lineStyle": {"type": "dashed", "color": "#2563EB"}, "itemStyle": {"color": "#2563EB"}},
+            {"name": "行情强度", "type": "line", "yAxisIndex": 1, "data": col("strength"), "showSymbol": False, "lineStyle": {"color": "#8B5CF6"}, "itemStyle": {"color": "#8B5CF6"}},
+        ],
+    }
+
+
+@st.fragment
+def render_breadth_history(ctx):
+    request_stock_list = ctx.get("request_stock_list_by_date_and_fields")
+    get_refresh_token = ctx["get_refresh_token"]
+
+    with st.container(border=True):
+        header = st.columns([3, 1.2, 1.2])
+        with header[0]:
+            render_panel_title("市场宽度趋势")
+        with header[1]:
+            days = st.selectbox(
+                "区间",
+                [20, 60, 120, 250],
+                index=1,
+                format_func=lambda n: f"近{n}个交易日",
+                key="breadth_history_days",
+                label_visibility="collapsed",
+            )
+        dates = list_weekdays(date.today(), days)
+        payload = load_breadth_history()
+        todo = [d for d in missing_dates(payload, dates) if d < date.today().isoformat()]
+        with header[2]:
+            backfill = st.button(
+                f"回补历史（{len(todo)}天）",
+                key="breadth_history_backfill",
+                disabled=not todo or not request_stock_list or not get_refresh_token(),
+                use_container_width=True,
+            )
+        if backfill:
+            progress = st.progress(0.0, text="回补市场宽度")
+
+            def on_progress(done, total, deal_date_str):
+                progress.progress(done / total, text=f"回补市场宽度 {deal_date_str}（{done}/{total}）")
+
+            payload, failed = backfill_breadth_history(request_stock_list, todo, on_progress=on_progress)
+            progress.empty()
+            if failed:
+                st.caption(f"{len(failed)}天回补失败：{'、'.join(d for d, _ in failed[:5])}")
+
+        x_data, records = breadth_series(payload, dates[0], dates[-1])
+        if not records:
+            st.caption("暂无市场宽度记录，请先回补历史")
+            return
+        option = cached_option("breadth_history_chart", build_breadth_history_option, x_data, records)
+        st_echarts(option, height="300px", key="breadth_history_chart")
+
+
+@st.fragment(run_every=BREADTH_POLL_SECONDS)
+def render_intraday_breadth(ctx):
+    request_stock_list = ctx.get("request_stock_list_by_date_and_fields")
+    get_refresh_token = ctx["get_refresh_token"]
+    poller = get_breadth_poller(date.today().isoformat())
+
+    with st.container(border=True):
+        header = st.columns([3, 1.2])
+        with header[0]:
+            render_panel_title("盘中市场宽度", f"交易时段每{BREADTH_POLL_SECONDS}秒轮询，仅重算变动个股")
+        with header[1]:
+            refresh = st.button(
+                "立即刷新",
+                key="intraday_breadth_refresh",
+                disabled=not request_stock_list or not get_refresh_token(),
+                use_container_width=True,
+            )
+        if request_stock_list and get_refresh_token() and (refresh or is_trading_time()):
+            try:
+                poll_breadth(poller, request_stock_list, force=refresh)
+            except Exception as e:
+                st.caption(f"轮询失败：{e}")
+
+        x_data, records = intraday_curve_series(poller)
+        if not records:
+            st.caption("暂无盘中宽度记录")
+            return
+        last = records[-1]
+        caption = (
+            f"上涨 {last.get('up')} · 下跌 {last.get('down')} · 涨停 {last.get('limit_up')}"
+            f" · 跌停 {last.get('limit_down')} · 中位数 {last.get('median')}%"
+        )
+        if poller.get("last_poll_text"):
+            caption += f" · 最近轮询 {poller['last_poll_text']}（变动 {poller.get('last_changed', 0)} 只）"
+        st.caption(caption)
+        option = cached_option("intraday_breadth_chart", build_breadth_history_option, x_data, records)
+        st_echarts(option, height="280px", key="intraday_breadth_chart")
+
+
+@st.fragment
+def render_divergence_backtest(ctx):
+    index_min_map = ctx["INDEX_MIN_MAP"]
+    fetch_index_min_list = ctx["fetch_index_min_list"]
+    fetch_index_day_list = ctx["fetch_index_day_list"]
+    get_refresh_token = ctx["get_refresh_token"]
+
+    with st.expander("背离信号回测", expanded=False):
+        row1 = st.columns([1.2, 1.4, 1.4, 2.4])
+        with row1[0]:
+            period = st.selectbox("周期", ["1分钟", "日线"], key="bt_period")
+        with row1[1]:
+            bt_start = st.date_input(
+                "开始日期",
+                value=st.session_state.get("bt_start") or (date.today() - timedelta(days=365)),
+                key="bt_start",
+            )
+        with row1[2]:
+            bt_end = st.date_input(
+                "结束日期",
+                value=st.session_state.get("bt_end") or date.today(),
+                key="bt_end",
+            )
+        with row1[3]:
+            horizons = st.multiselect(
+                "持有周期(K线数)", [5, 15, 30, 60, 120, 240], default=[15, 60, 240], key="bt_horizons"
+            )
+
+        row2 = st.columns(5)
+        with row2[0]:
+            pivot_windows = st.multiselect("拐点窗口", [2, 3, 5, 8], default=[3, 5], key="bt_pivot_windows")
+        with row2[1]:
+            max_bars_list = st.multiselect("最大间隔", [50, 100, 200, 400], default=[200], key="bt_max_bars")
+        with row2[2]:
+            macd_texts = st.multiselect(
+                "MACD快慢线", ["12-26", "6-13", "24-52"], default=["12-26"], key="bt_macd"
+            )
+        with row2[3]:
+            kdj_periods = st.multiselect("KDJ周期", [9, 14, 21], default=[9], key="bt_kdj")
+        with row2[4]:
+            rsi_periods = st.multiselect("RSI周期", [6, 14, 24], default=[14], key="bt_rsi")
+
+        macd_params = [tuple(int(v) for v in t.split("-")) for t in macd_texts]
+        grid = build_param_grid(pivot_windows, max_bars_list, macd_params, kdj_periods, rsi_periods)
+        st.caption(f"参数组合：{len(grid)}组 × {len(index_min_map)}个指数")
+
+        if st.button("同步数据并回测", key="bt_run", disabled=not grid or not horizons):
+            if not get_refresh_token():
+                st.warning("未配置DJ_REFRESH_TOKEN/REFRESH_TOKEN，无法回测")
+            else:
+                freq = "day" if period == "日线" else "1m"
+                fetch_func = fetch_index_day_list if freq == "day" else fetch_index_min_list
+                data_by_index = {}
+                progress = st.progress(0.0, text="同步K线数据")
+                names = list(index_min_map.keys())
+                for i, name in enumerate(names):
+                    cfg = index_min_map[name]
+                    try:
+                        bars = sync_bars(
+                            fetch_func,
+                            cfg["exponentId"],
+                            freq,
+                            bt_start,
+                            bt_end,
+                            expected_code=cfg.get("code"),
+                        )
+                        data_by_index[name] = slice_bars(bars, bt_start, bt_end)
+                    except Exception as e:
+                        st.caption(f"{name} 数据同步失败：{e}")
+                    progress.progress((i + 1) / len(names), text=f"同步K线数据 {name}")
+                progress.progress(1.0, text="回测计算中")
+                results = run_backtest(data_by_index, grid, sorted(horizons))
+                run_id = save_backtest_result(
+                    {
+                        "period": period,
+                        "start": bt_start.isoformat(),
+                        "end": bt_end.isoformat(),
+                        "horizons": sorted(horizons),
+                        "bars": {k: int(len(v["close"])) for k, v in data_by_index.items()},
+                    },
+                    results,
+                )
+                progress.empty()
+                st.session_state["bt_run_id"] = run_id
+
+        runs = list_backtest_runs()
+        if not runs:
+            st.caption("暂无回测结果")
+            return
+        current = st.session_state.get("bt_run_id")
+        cols = st.columns([2, 2])
+        with cols[0]:
+            run_id = st.selectbox(
+                "回测记录", runs, index=runs.index(current) if current in runs else 0, key="bt_view_run"
+            )
+        with cols[1]:
+            index_filter = st.selectbox("指数", ["全部"] + list(index_min_map.keys()), key="bt_view_index")
+        payload = load_backtest_result(run_id)
+        if not payload:
+            st.caption("回测结果读取失败")
+            return
+        st.caption(
+            f"{payload.get('period')} {payload.get('start')} ~ {payload.get('end')}，"
+            f"K线数：{sum((payload.get('bars') or {}).values())}"
+        )
+        rows = summarize_backtest(payload, None if index_filter == "全部" else index_filter)
+        if not rows:
+            st.caption("回测区间内无背离信号")
+            return
+        df = pd.DataFrame(rows).sort_values(["持有周期", "胜率(%)"], ascending=[True, False])
+        st.dataframe(df, hide_index=True, use_container_width=True)
+
+
+def build_corr_heatmap_option(names, matrix, metric):
+    data = []
+    for i in range(len(names)):
+        for j in range(len(names)):
+            data.append([j, i, compact_float(matrix[i, j], 2)])
+    if metric == "corr":
+        visual = {"min": -1, "max": 1, "inRange": {"color": ["#2EBD85", "#F9FAFB", "#E94B3C"]}}
+    else:
+        visual = {"min": 0, "max": 2, "inRange": {"color": ["#2563EB", "#F9FAFB", "#E94B3C"]}}
+    return {
+        "animation": False,
+        "tooltip": {"position": "top"},
+        "grid": {"left": 10, "right": 10, "top": 10, "bottom": 50, "containLabel": True},
+        "xAxis": {"type": "category", "data": names, "splitArea": {"show": True}, "axisLabel": {"fontSize": 10}},
+        "yAxis": {"type": "category", "data": names, "inverse": True, "splitArea": {"show": True}, "axisLabel": {"fontSize": 10}},
+        "visualMap": dict(visual, calculable=True, orient="horizontal", left="center", bottom=0, itemHeight=120),
+        "series": [
+            {
+                "type": "heatmap",
+                "data": data,
+                "label": {"show": True, "fontSize": 10},
+                "emphasis": {"itemStyle": {"shadowBlur": 6, "shadowColor": "rgba(0,0,0,0.3)"}},
+            }
+        ],
+    }
+
+
+@st.fragment(run_every=BREADTH_POLL_SECONDS)
+def render_correlation_matrix(ctx):
+    names = list(ctx["INDEX_MIN_MAP"].keys())
+
+    with st.container(border=True):
+        header = st.columns([3, 1.2, 1.2])
+        with header[1]:
+            period = st.selectbox(
+                "周期",
+                list(CORR_WINDOWS.keys()),
+                index=1,
+                key="corr_period",
+                label_visibility="collapsed",
+            )
+        with header[2]:
+            metric_label = st.selectbox(
+                "指标", list(CORR_METRICS.keys()), key="corr_metric", label_visibility="collapsed"
+            )
+        window = CORR_WINDOWS[period]
+        with header[0]:
+            render_panel_title("指数相关性与贝塔矩阵", f"滚动{window}期")
+
+        end_dt = date.today()
+        start_dt = end_dt - timedelta(days=CORR_LOOKBACK_DAYS[period])
+        graph = session_graph("index_monitor")
+        nodes = {}
+        if ctx["get_refresh_token"]():
+            try:
+                nodes = style_series_nodes(graph, ctx, names, period, start_dt, end_dt)
+            except Exception:
+                nodes = {}
+        if not nodes:
+            nodes = synthetic_series_nodes(graph, ctx, names, period, start_dt, end_dt)
+        names = [n for n in names if n in nodes]
+        close_node = define(
+            graph,
+            f"corr_close:{','.join(nodes[n] for n in names)}",
+            lambda *series: aligned_close_matrix(list(series)),
+            [nodes[n] for n in names],
+        )
+        matrix_node = define(
+            graph,
+            f"corr:{window}:{close_node}",
+            lambda aligned: rolling_matrices((period, tuple(names)), window, *aligned),
+            [close_node],
+        )
+        keys, close = evaluate(graph, close_node)
+        corr, beta = evaluate(graph, matrix_node)
+        metric = CORR_METRICS[metric_label]
+        values = corr if metric == "corr" else beta
+
+        valid = np.flatnonzero(np.isfinite(values).any(axis=(1, 2))) if len(values) else values[:0]
+        if not len(valid):
+            st.caption("数据不足，无法计算滚动矩阵")
+            return
+        span = len(values) - 1 - int(valid[0])
+        if st.session_state.get("corr_offset", 0) > span:
+            st.session_state["corr_offset"] = span
+        offset = st.slider(
+            "回看（根）",
+            0,
+            max(span, 1),
+            key="corr_offset",
+            disabled=span == 0,
+            help="0 为最新一根K线，向右拖动查看历史时刻的矩阵",
+        )
+        row = len(values) - 1 - min(offset, span)
+        st.caption(f"时刻 {str(keys[row]).replace(chr(10), ' ')}　·　贝塔为行指数相对列指数")
+        option = build_corr_heatmap_option(names, values[row], metric)
+        st_echarts(option, height="300px", key="corr_matrix_chart")
+
+
 def render_index_monitor(ctx):
     render_monitor_overview(ctx)
     st.write("")
@@ -1997,8 +2352,33 @@ def render_index_monitor(ctx):
     with right:
         render_stock_distribution(ctx)
     st.write("")
+    render_correlation_matrix(ctx)
+    render_intraday_breadth(ctx)
+    render_breadth_history(ctx)
+    render_divergence_backtest(ctx)
+    with st.expander("计算图节点耗时", expanded=False):
+        rows = graph_stats(session_graph("index_monitor"))
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        else:
+            st.caption("暂无计算记录")
+
+
+def volume_tun_ranges(date_opt):
+    end_dt = date.today()
+    while end_dt.weekday() >= 5:
+        end_dt = end_dt - timedelta(days=1)
+
+    if date_opt == "昨日":
+        end_dt = end_dt - timedelta(days=1)
+        while end_dt.weekday() >= 5:
+            end_dt = end_dt - timedelta(days=1)
+
+    # 监测表格只需要最近几天的数据（今日、昨日、前日），取7天缓冲以涵盖周末和节假日
+    return end_dt - timedelta(days=14), end_dt - timedelta(days=7), end_dt
 
 
+@st.fragment
 def render_volume_tun_panel(ctx):
     fetch_index_day_list = ctx["fetch_index_day_list"]
     parse_indicator_day_series = ctx["parse_indicator_day_series"]
@@ -2015,7 +2395,7 @@ def render_volume_tun_panel(ctx):
         st.session_state["volume_tun_selected_index"] = current_selected
 
     with st.container(border=True):
-        h1, h2, h3 = st.columns([3, 0.8, 1.2])
+        h1, h0, h2, h3 = st.columns([2.3, 0.7, 0.8, 1.2])
         with h1:
             st.markdown(
                 '<div style="text-align:left;font-size:16px;font-weight:800;color:#111827;display:flex;align-items:center;height:100%;">成交量与换手率监测</div>',
@@ -2037,24 +2417,21 @@ def render_volume_tun_panel(ctx):
                 label_visibility="collapsed",
             )
             st.session_state["volume_tun_selected_index"] = selected
+        with h0:
+            opened = st.toggle("展开", key="vol_tun_open")
 
-        today = date.today()
-        end_dt = today
-        while end_dt.weekday() >= 5:
-            end_dt = end_dt - timedelta(days=1)
-        
-        if date_opt == "昨日":
-            end_dt = end_dt - timedelta(days=1)
-            while end_dt.weekday() >= 5:
-                end_dt = end_dt - timedelta(days=1)
-        
-        start_dt = end_dt - timedelta(days=14)
-        # 监测表格只需要最近几天的数据（今日、昨日、前日），取7天缓冲以涵盖周末和节假日
-        start_dt_table = end_dt - timedelta(days=7)
+        start_dt, start_dt_table, end_dt = volume_tun_ranges(date_opt)
+        ids = [index_min_map[n]["exponentId"] for n in names]
+        if not opened:
+            todo = [(start_dt_table, eid) for eid in ids] + [(start_dt, index_min_map[selected]["exponentId"])]
+            for start, eid in todo:
+                args = (start.isoformat(), end_dt.isoformat(), str(eid), VOLUME_TUN_FIELD_LIST)
+                prefetch_later(("index_day",) + args, fetch_index_day_list, *args)
+            st.caption("展开后加载成交量与换手率明细（数据已在后台预取）")
+            return
 
         st.divider()
 
-        ids = [index_min_map[n]["exponentId"] for n in names]
         table_rows = []
         t_label = "今日"
         prev_label = "昨日"
@@ -2065,7 +2442,7 @@ def render_volume_tun_panel(ctx):
                     start_dt_table.isoformat(),
                     end_dt.isoformat(),
                     str(eid),
-                    "volume,amount,turnoverRate,tun,turnoverRatio,turnover",
+                    VOLUME_TUN_FIELD_LIST,
                 )
                 x_vol_tmp, y_vol_tmp = parse_indicator_day_series(all_list, ["volume", "vol"], start_dt=start_dt_table)
                 x_tun_tmp, y_tun_tmp = parse_indicator_day_series(
@@ -2163,7 +2540,7 @@ def render_volume_tun_panel(ctx):
                 start_dt.isoformat(),
                 end_dt.isoformat(),
                 str(eid),
-                "volume,amount,turnoverRate,tun,turnoverRatio,turnover",
+                VOLUME_TUN_FIELD_LIST,
             )
             x_vol, y_vol = parse_indicator_day_series(all_list, ["volume", "vol"], start_dt=start_dt)
             x_tun, y_tun = parse_indicator_day_series(
@@ -2193,8 +2570,12 @@ def render_volume_tun_panel(ctx):
             x_tun = expected_dates
             y_tun = [m_tun.get(d) for d in expected_dates]
 
-        vol_option = build_line_option(f"{selected} - 成交量", x_vol, y_vol, show_title=True)
-        tun_option = build_line_option(f"{selected} - 换手率(%)", x_tun, y_tun, show_title=True)
+        vol_option = cached_option(
+            "vol_trend_chart", build_line_option, f"{selected} - 成交量", x_vol, y_vol, show_title=True
+        )
+        tun_option = cached_option(
+            "tun_trend_chart", build_line_option, f"{selected} - 换手率(%)", x_tun, y_tun, show_title=True
+        )
 
         charts = st.columns(2)
         with charts[0]:
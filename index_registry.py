@@ -0,0 +1,290 @@
+import csv
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from bar_cache import bar_cache_get, bar_cache_pin, bar_cache_put, bar_cache_stats, new_bar_cache
+from bar_resample import resample_daily_bars
+from bar_store import (
+    BAR_FIELDS,
+    bar_store_path,
+    get_first_value,
+    iter_missing_ranges,
+    load_bars,
+    parse_bar_rows,
+    save_bars,
+    slice_bars,
+    sync_bars,
+)
+from fetch_pool import map_limited
+
+REGISTRY_PATH = os.getenv(
+    "DJ_INDEX_REGISTRY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "index_registry.csv")
+).strip()
+DAY_BATCH_SIZE = int(os.getenv("DJ_INDEX_DAY_BATCH", "40"))
+DAY_FETCH_WORKERS = 2
+MINUTE_FETCH_WORKERS = 6
+MINUTE_FETCH_RATE_PER_SEC = 8.0
+INDEX_CACHE_BYTES = int(float(os.getenv("DJ_INDEX_CACHE_MB", "128")) * 1024 * 1024)
+DAY_FIELD_LIST = "exponentId,code,open,high,low,close,volume"
+BUILTIN_CORE_INDICES = {
+    "上证指数": {"code": "000001", "exponentId": 1},
+    "深证综指": {"code": "399101", "exponentId": 6},
+    "沪深300": {"code": "000300", "exponentId": 3},
+    "创业板指": {"code": "399006", "exponentId": 11},
+    "科创50": {"code": "000688", "exponentId": 10},
+    "中证1000": {"code": "000852", "exponentId": 12},
+}
+
+_registry_cache = {}
+_registry_lock = threading.Lock()
+_index_cache = new_bar_cache(INDEX_CACHE_BYTES)
+_resident_versions = {}
+
+
+def parse_registry_rows(rows):
+    entries = []
+    seen = set()
+    for row in rows:
+        name = (row.get("name") or "").strip()
+        code = (row.get("code") or "").strip()
+        try:
+            exponent_id = int(str(row.get("exponentId") or "").strip())
+        except ValueError:
+            continue
+        if not name or exponent_id in seen:
+            continue
+        seen.add(exponent_id)
+        entries.append(
+            {
+                "name": name,
+                "code": code,
+                "exponentId": exponent_id,
+                "group": (row.get("group") or "").strip() or "其他",
+                "core": str(row.get("core") or "").strip() in ("1", "true", "True", "是"),
+            }
+        )
+    return entries
+
+
+def load_index_registry(path=REGISTRY_PATH):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return []
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _registry_lock:
+        cached = _registry_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            entries = parse_registry_rows(csv.DictReader(f))
+    except Exception:
+        return []
+    with _registry_lock:
+        _registry_cache[path] = (version, entries)
+    for entry in entries:
+        if entry["core"]:
+            bar_cache_pin(_index_cache, entry["exponentId"])
+    return entries
+
+
+def core_index_map(entries):
+    return {e["name"]: {"code": e["code"], "exponentId": e["exponentId"]} for e in entries if e["core"]}
+
+
+def resolve_index_min_map(entries):
+    # a missing or core-less registry falls back to the built-in indices instead of emptying every panel
+    core = core_index_map(entries)
+    if core:
+        return core, None
+    return dict(BUILTIN_CORE_INDICES), f"指数登记表（{REGISTRY_PATH}）缺失或没有核心指数，已使用内置的{len(BUILTIN_CORE_INDICES)}个指数"
+
+
+def registry_groups(entries):
+    groups = []
+    for e in entries:
+        if e["group"] not in groups:
+            groups.append(e["group"])
+    return groups
+
+
+def search_registry(entries, query=None, groups=None):
+    query = (query or "").strip().lower()
+    out = []
+    for e in entries:
+        if groups and e["group"] not in groups:
+            continue
+        if query and query not in e["name"].lower() and query not in e["code"]:
+            continue
+        out.append(e)
+    return out
+
+
+def store_version(exponent_id, freq):
+    try:
+        stat = os.stat(bar_store_path(exponent_id, freq))
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def resident_bars(exponent_id, freq):
+    # other panels sync the same store files, so a resident copy is reused only while its file is unchanged
+    version = store_version(exponent_id, freq)
+    bars = bar_cache_get(_index_cache, (exponent_id, freq))
+    if bars is None or _resident_versions.get((exponent_id, freq)) != version:
+        bars = bar_cache_put(_index_cache, (exponent_id, freq), load_bars(exponent_id, freq))
+        _resident_versions[(exponent_id, freq)] = version
+    return bars
+
+
+def index_cache_stats():
+    return bar_cache_stats(_index_cache)
+
+
+def split_batch_rows(data_list, batch):
+    by_id = {e["exponentId"]: [] for e in batch}
+    by_code = {e["code"]: e["exponentId"] for e in batch if e["code"]}
+    unmatched = 0
+    for item in data_list or []:
+        if not isinstance(item, dict):
+            continue
+        eid = get_first_value(item, ["exponentId", "exponent_id", "indexId"])
+        try:
+            eid = int(eid) if eid is not None else by_code.get(str(item.get("code") or ""))
+        except (TypeError, ValueError):
+            eid = None
+        if eid is None and len(batch) == 1:
+            eid = batch[0]["exponentId"]
+        if eid in by_id:
+            by_id[eid].append(item)
+        else:
+            unmatched += 1
+    return by_id, unmatched
+
+
+def sync_registry_day_bars(fetch_index_day_list, entries, start_dt, end_dt, batch_size=DAY_BATCH_SIZE, on_progress=None):
+    # one getIndexDayList call covers a whole batch of exponentIds over the union of their missing days
+    today = date.today()
+    todo = []
+    for e in entries:
+        bars = resident_bars(e["exponentId"], "day")
+        ranges = list(iter_missing_ranges(bars["checked"], start_dt, end_dt, 100000))
+        if ranges:
+            todo.append((e, ranges[0][0], ranges[-1][1]))
+    # entries with similar gaps share a batch so a long backfill does not widen every request
+    todo.sort(key=lambda t: (t[1], t[2]))
+    batches = [todo[i : i + batch_size] for i in range(0, len(todo), max(1, int(batch_size)))]
+
+    def store_day_bars(e, bars):
+        bar_cache_put(_index_cache, (e["exponentId"], "day"), bars)
+        _resident_versions[(e["exponentId"], "day")] = store_version(e["exponentId"], "day")
+
+    def fetch_batch(batch):
+        a = min(r[1] for r in batch)
+        b = max(r[2] for r in batch)
+        ids = ",".join(str(e["exponentId"]) for e, _, _ in batch)
+        data_list = fetch_index_day_list(a.isoformat(), b.isoformat(), ids, DAY_FIELD_LIST)
+        rows, unmatched = split_batch_rows(data_list, [e for e, _, _ in batch])
+        done = []
+        d = a
+        while d <= b and d < today:
+            done.append(d.isoformat())
+            d = d + timedelta(days=1)
+        checked = np.array(done, dtype="datetime64[D]")
+        # a day only counts as checked for an index whose rows came back attributed to it; an empty answer for
+        # the whole batch is a span without sessions, anything else falls back to one request per index
+        empty = not any(rows.values()) and not unmatched
+        failed = []
+        for e, lo, hi in batch:
+            if rows[e["exponentId"]] or empty:
+                new = parse_bar_rows(rows[e["exponentId"]], "day", expected_code=e["code"] or None)
+                new["checked"] = checked
+                store_day_bars(e, save_bars(e["exponentId"], "day", new))
+                continue
+            try:
+                bars = sync_bars(fetch_index_day_list, e["exponentId"], "day", lo, hi, expected_code=e["code"] or None)
+            except Exception:
+                failed.append(e["name"])
+                continue
+            store_day_bars(e, bars)
+        return failed
+
+    def on_done(done, total, batch, result, error):
+        if on_progress is not None:
+            on_progress(done, total)
+
+    results, errors = map_limited(fetch_batch, batches, max_workers=DAY_FETCH_WORKERS, on_done=on_done)
+    failed = []
+    for batch, result, error in zip(batches, results, errors):
+        if error is not None:
+            failed.extend(e["name"] for e, _, _ in batch)
+        else:
+            failed.extend(result)
+    return {e["exponentId"]: resident_bars(e["exponentId"], "day") for e in entries}, failed
+
+
+def sync_registry_minute_bars(fetch_index_min_list, entries, start_dt, end_dt, on_progress=None):
+    # minute lists only take one exponentId per call, so they go through a small rate-limited pool
+    def fetch_one(e):
+        bars = sync_bars(fetch_index_min_list, e["exponentId"], "1m", start_dt, end_dt, expected_code=e["code"] or None)
+        key = (e["exponentId"], "1m", start_dt.isoformat(), end_dt.isoformat())
+        return bar_cache_put(_index_cache, key, slice_bars(bars, start_dt, end_dt))
+
+    def on_done(done, total, entry, result, error):
+        if on_progress is not None:
+            on_progress(done, total)
+
+    results, errors = map_limited(
+        fetch_one,
+        entries,
+        max_workers=MINUTE_FETCH_WORKERS,
+        rate_per_sec=MINUTE_FETCH_RATE_PER_SEC,
+        on_done=on_done,
+    )
+    failed = [e["name"] for e, error in zip(entries, errors) if error is not None]
+    return {e["exponentId"]: bars for e, bars in zip(entries, results) if bars is not None}, failed
+
+
+def resident_minute_bars(exponent_id, start_dt, end_dt):
+    return bar_cache_get(_index_cache, (exponent_id, "1m", start_dt.isoformat(), end_dt.isoformat()))
+
+
+def lacks_day(day_bars, day):
+    return not len(day_bars["ts"]) or day_bars["ts"][-1] < np.datetime64(day)
+
+
+def append_partial_day(day_bars, minute_bars, day):
+    partial = resample_daily_bars(slice_bars(minute_bars, day, day))
+    if not len(partial["ts"]) or (len(day_bars["ts"]) and day_bars["ts"][-1] >= partial["ts"][-1]):
+        return day_bars
+    return {k: np.concatenate([day_bars[k], partial[k].astype(day_bars[k].dtype)]) for k in ("ts",) + BAR_FIELDS}
+
+
+def heat_rows(entries, bars_by_id, horizons):
+    rows = []
+    for e in entries:
+        bars = bars_by_id.get(e["exponentId"])
+        close = bars["close"] if bars is not None else np.zeros(0)
+        row = {"名称": e["name"], "代码": e["code"], "分类": e["group"], "最新": None, "日期": None}
+        if len(close):
+            row["最新"] = float(close[-1])
+            row["日期"] = str(bars["ts"][-1])
+        for label, n in horizons:
+            if not len(close):
+                base = None
+            elif n is None:
+                year = bars["ts"].astype("datetime64[Y]")
+                prior = np.flatnonzero(year < year[-1])
+                base = close[prior[-1]] if len(prior) else bars["open"][0]
+            else:
+                base = close[-1 - n] if len(close) > n else None
+            row[label] = float((close[-1] / base - 1.0) * 100.0) if base else None
+        volume = bars["volume"] if bars is not None else np.zeros(0)
+        row["量比"] = float(volume[-1] / volume[-6:-1].mean()) if len(volume) >= 6 and volume[-6:-1].mean() > 0 else None
+        rows.append(row)
+    return rows
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+DATA_DIR = os.getenv("DJ_DATA_DIR", os.path.join(os.path.dirname(__file__), "data")).strip()
+
+_write_lock = threading.Lock()
+_path_locks = {}
+
+
+def get_store_path(*parts):
+    path = os.path.join(DATA_DIR, *[str(p) for p in parts])
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return path
+
+
+def safe_file_key(text):
+    out = []
+    for ch in str(text or ""):
+        if ch.isalnum() or ch in ("-", "_", "."):
+            out.append(ch)
+        else:
+            out.append("_")
+    return "".join(out) or "_"
+
+
+def read_json(path, default=None):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except Exception:
+        return default
+
+
+def write_json(path, payload):
+    tmp_path = f"{path}.tmp"
+    with _write_lock:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def path_lock(path):
+    with _write_lock:
+        return _path_locks.setdefault(os.path.abspath(path), threading.RLock())
+
+
+def write_npz(path, arrays):
+    # a unique temp file per writer, swapped in under the path's lock, so concurrent saves never share a tmp name
+    with path_lock(path):
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -7,7 +7,11 @@ import requests
 import streamlit as st
 
 from index_compare import render_index_compare
+from index_heat import render_index_overview
 from index_monitor import render_index_monitor
+from index_registry import load_index_registry, resolve_index_min_map
+from sector_board import render_sector_board
+from stock_board import render_stock_board
 
 BASE_URL = os.getenv("DJ_BASE_URL", "http://dz.szdjct.com").strip()
 GET_ACCESS_TOKEN_URL = f"{BASE_URL}/djData/access/getAccessToken"
@@ -15,14 +19,7 @@ GET_INDEX_MIN_LIST_URL = f"{BASE_URL}/djData/index/getIndexMinList"
 GET_INDEX_DAY_LIST_URL = f"{BASE_URL}/djData/index/getIndexDayList"
 GET_STOCK_LIST_URL = f"{BASE_URL}/djData/stock/getAllStockListByDateAndFields"
 
-INDEX_MIN_MAP = {
-    "上证指数": {"code": "000001", "exponentId": 1},
-    "深证综指": {"code": "399101", "exponentId": 6},
-    "沪深300": {"code": "000300", "exponentId": 3},
-    "创业板指": {"code": "399006", "exponentId": 11},
-    "科创50": {"code": "000688", "exponentId": 10},
-    "中证1000": {"code": "000852", "exponentId": 12},
-}
+INDEX_MIN_MAP, INDEX_REGISTRY_WARNING = resolve_index_min_map(load_index_registry())
 
 
 def read_simple_config(config_path):
@@ -149,8 +146,7 @@ def fetch_index_min_list(start_date_str, end_date_str, exponent_id, period, fiel
     return []
 
 
-@st.cache_data(ttl=900)
-def fetch_stock_list_by_date_and_fields(deal_date_str, field_list, start_with=None):
+def request_stock_list_by_date_and_fields(deal_date_str, field_list, start_with=None):
     access_token = get_access_token()
     headers = {"Access-Token": access_token, "Accept": "application/json"}
     params = {"dealDate": deal_date_str, "fieldList": field_list}
@@ -185,6 +181,12 @@ def fetch_stock_list_by_date_and_fields(deal_date_str, field_list, start_with=No
             return data.get(key)
     return []
 
+
+@st.cache_data(ttl=900)
+def fetch_stock_list_by_date_and_fields(deal_date_str, field_list, start_with=None):
+    return request_stock_list_by_date_and_fields(deal_date_str, field_list, start_with)
+
+
 @st.cache_data(ttl=300)
 def fetch_index_day_list(start_date_str, end_date_str, exponent_ids_str, field_list):
     access_token = get_access_token()
@@ -526,6 +528,43 @@ def set_active_tab(name):
     st.session_state["tab"] = name
 
 
+@st.fragment
+def render_sidebar_nav(tabs, subtab_map):
+    # collapsed groups carry no buttons; opening one reruns only this fragment
+    for name in tabs:
+        subtabs = subtab_map.get(name, [])
+        expander = st.expander(name, expanded=name == st.session_state["tab"], key=f"nav_{name}", on_change="rerun")
+        with expander:
+            if not subtabs or expander.open is False:
+                continue
+            subtab_key = f"subtab_{name}"
+            for sub in subtabs:
+                if st.button(
+                    sub,
+                    key=f"{subtab_key}_{sub}",
+                    use_container_width=True,
+                ):
+                    st.session_state[subtab_key] = sub
+                    set_active_tab(name)
+                    st.rerun()
+
+
+def render_page_header(title_text, desc_text):
+    st.markdown(
+        f"""
+        <div style="padding: 10px 24px; border-bottom: 1px solid #e5e5e5; background-color: #ffffff;">
+            <div style="font-size: 24px; font-weight: 1000;">{title_text}</div>
+            <div style="font-size: 14px; color: #888888; margin-top: 6px;">
+                {desc_text}
+            </div>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    st.write("")
+
+
 def render_layout():
     st.set_page_config(page_title="指标监控", layout="wide")
 
@@ -577,28 +616,17 @@ def render_layout():
             st.session_state["tab"] = "指数"
 
         subtab_map = {
-            "指数": ["指数同比", "指数监控"],
+            "指数": ["指数同比", "指数监控", "指数全景"],
             "板块": ["行业板块", "概念板块", "地区板块", "主题板块", "风格板块"],
             "个股": ["沪市个股", "深市个股", "创业板个股", "科创板个股", "其他市场"],
             "资金": ["北向资金", "南向资金", "场内资金", "场外资金", "其他资金"],
         }
 
         for name in tabs:
-            subtabs = subtab_map.get(name, [])
-            expanded = name == st.session_state["tab"]
-            with st.expander(name, expanded=expanded):
-                if subtabs:
-                    subtab_key = f"subtab_{name}"
-                    if subtab_key not in st.session_state:
-                        st.session_state[subtab_key] = subtabs[0]
-                    for sub in subtabs:
-                        if st.button(
-                            sub,
-                            key=f"{subtab_key}_{sub}",
-                            use_container_width=True,
-                        ):
-                            st.session_state[subtab_key] = sub
-                            set_active_tab(name)
+            subtab_key = f"subtab_{name}"
+            if subtab_key not in st.session_state and subtab_map.get(name):
+                st.session_state[subtab_key] = subtab_map[name][0]
+        render_sidebar_nav(tabs, subtab_map)
 
     tab = st.session_state["tab"]
     current_subtab = st.session_state.get(f"subtab_{tab}")
@@ -607,25 +635,18 @@ def render_layout():
         if current_subtab == "指数监控":
             title_text = "指数监控"
             desc_text = "结合市场热点对指数信息监控"
+        elif current_subtab == "指数全景":
+            title_text = "指数全景"
+            desc_text = "指数登记表内全部指数的多周期涨跌热力"
         elif current_subtab == "指数同比":
             title_text = "指数同比"
             desc_text = "A股市场复盘系统-指数同比对比"
         else:
             title_text = "大盘指数"
             desc_text = "展示的是指数数据" if not current_subtab else f"展示的是指数 - {current_subtab}"
-        st.markdown(
-            f"""
-            <div style="padding: 10px 24px; border-bottom: 1px solid #e5e5e5; background-color: #ffffff;">
-                <div style="font-size: 24px; font-weight: 1000;">{title_text}</div>
-                <div style="font-size: 14px; color: #888888; margin-top: 6px;">
-                    {desc_text}
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-        st.write("")
+        render_page_header(title_text, desc_text)
+        if INDEX_REGISTRY_WARNING:
+            st.warning(INDEX_REGISTRY_WARNING)
 
         ctx = {
             "INDEX_MIN_MAP": INDEX_MIN_MAP,
@@ -639,12 +660,30 @@ def render_layout():
             "get_refresh_token": get_refresh_token,
             "parse_indicator_day_series": parse_indicator_day_series,
             "parse_index_min_series": parse_index_min_series,
+            "request_stock_list_by_date_and_fields": request_stock_list_by_date_and_fields,
         }
 
         if current_subtab == "指数监控":
             render_index_monitor(ctx)
+        elif current_subtab == "指数全景":
+            render_index_overview(ctx)
         else:
             render_index_compare(ctx)
+    elif tab == "板块":
+        render_page_header(current_subtab or "板块", "按板块映射聚合个股快照的涨跌强弱")
+        ctx = {
+            "fetch_stock_list_by_date_and_fields": fetch_stock_list_by_date_and_fields,
+            "get_refresh_token": get_refresh_token,
+        }
+        render_sector_board(ctx, current_subtab)
+    elif tab == "个股":
+        render_page_header(current_subtab or "个股", "个股日K线与成交量，日线来自本地快照库")
+        ctx = {
+            "fetch_stock_list_by_date_and_fields": fetch_stock_list_by_date_and_fields,
+            "get_refresh_token": get_refresh_token,
+            "request_stock_list_by_date_and_fields": request_stock_list_by_date_and_fields,
+        }
+        render_stock_board(ctx, current_subtab)
     else:
         st.write("")
         subtitle = f"{tab} - {current_subtab}" if current_subtab else tab
@@ -0,0 +1,157 @@
+import time
+
+import numpy as np
+from streamlit_echarts import JsCode
+
+from breadth_engine import BREADTH_INPUT_FIELDS, PCT_CLAMP_CENTS, row_breadth, sample_rows, snapshot_columns
+from sector_breadth import board_type_map, sector_members
+from security_master import build_security_master, get_security_master
+
+MAP_REFRESH_SECONDS = 60
+MAP_COLOR_PCT = 3.0
+MAP_COLORS = np.array([[46, 189, 133], [229, 231, 235], [233, 75, 60]], dtype=np.float64)
+
+# same rows as PRICE_VOLUME_TOOLTIP, read from the tile's precomputed snapshot fields
+MAP_TOOLTIP = JsCode(
+    "function (p) { var d = p.data || {}; if (!d.ohlc) { return p.name || ''; } var unit = d.unit || ''; function fmt(v) { var n = Number(v); return v == null || !isFinite(n) ? '--' : n.toFixed(2) + unit; } function fmtVol(v) { var n = Number(v); return v == null || !isFinite(n) ? '--' : String(Math.round(n)); } function row(label, value) { return '<div style=\"display:flex;justify-content:space-between;gap:12px;white-space:nowrap;\"><span>' + label + '</span><span style=\"font-weight:600;\">' + value + '</span></div>'; } var rows = ['<div style=\"margin:0 0 6px 0;\">' + d.name + (d.date ? ' ' + d.date : '') + '</div>']; rows.push(row('涨跌幅', d.pct == null ? '--' : (d.pct >= 0 ? '+' : '') + Number(d.pct).toFixed(2) + '%')); var labels = ['开盘价', '收盘价', '最高价', '最低价']; var order = [0, 3, 1, 2]; for (var j = 0; j < order.length; j++) { rows.push(row(labels[j], fmt(d.ohlc[order[j]]))); } rows.push(row('成交量', fmtVol(d.volume))); if (d.turnover != null) { rows.push(row('成交额(亿)', (Number(d.turnover) / 1e8).toFixed(2))); } return rows.join(''); }"
+).js_code
+
+
+def refresh_cycle(seconds=MAP_REFRESH_SECONDS):
+    return int(time.time() // seconds)
+
+
+def pct_colors(pct, span=MAP_COLOR_PCT):
+    t = np.clip(np.nan_to_num(pct, nan=0.0) / span, -1.0, 1.0)
+    lo = t < 0
+    w = np.abs(t)[:, None]
+    edge = np.where(lo[:, None], MAP_COLORS[0], MAP_COLORS[2])
+    rgb = MAP_COLORS[1] + (edge - MAP_COLORS[1]) * w
+    rgb = np.rint(rgb).astype(np.int64)
+    return [f"#{r:02X}{g:02X}{b:02X}" for r, g, b in rgb.tolist()]
+
+
+def index_map_snapshot(entries, bars_by_id):
+    n = len(entries)
+    ohlcv = np.full((n, 5), np.nan)
+    prev = np.full(n, np.nan)
+    dates = [""] * n
+    for i, e in enumerate(entries):
+        bars = bars_by_id.get(e["exponentId"])
+        if bars is None or not len(bars["ts"]):
+            continue
+        ohlcv[i] = [bars[k][-1] for k in ("open", "high", "low", "close", "volume")]
+        if len(bars["ts"]) > 1:
+            prev[i] = bars["close"][-2]
+        dates[i] = str(bars["ts"][-1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(prev > 0, (ohlcv[:, 3] / prev - 1.0) * 100.0, np.nan)
+    return {
+        "names": [e["name"] for e in entries],
+        "groups": [e["group"] for e in entries],
+        "dates": dates,
+        "ohlc": ohlcv[:, :4],
+        "volume": ohlcv[:, 4],
+        "turnover": np.full(n, np.nan),
+        "size": ohlcv[:, 4],
+        "pct": pct,
+        "unit": "",
+    }
+
+
+def sector_map_snapshot(data_list, type_map=None, master=None, trade_date=None, group_name="板块"):
+    # equal-weight composite per sector: each price column is the mean member move against its previous close
+    cols = snapshot_columns(data_list, BREADTH_INPUT_FIELDS + ("amount", "open", "high", "low"))
+    if master is None and trade_date is not None:
+        master = get_security_master(trade_date, cols["code"], cols["name"])
+    elif master is None:
+        master = build_security_master(cols["code"], cols["name"])
+    if type_map is None:
+        type_map = board_type_map(master)
+    rows, row_ids, _ = sample_rows(cols, master)
+    attrs = row_breadth(cols, rows, row_ids, master)
+    s, p = sector_members(master, type_map, row_ids)
+    k = len(type_map["sectors"])
+    ok = attrs["has_pct"][p]
+    close_rel = attrs["pct_cents"][p] / 100.0
+    pre = cols["pre_close"][rows][p]
+    counts = np.bincount(s[ok], minlength=k)
+    clamp = PCT_CLAMP_CENTS / 100.0
+    ohlc = np.full((k, 4), np.nan)
+    for j, key in enumerate(("open", "high", "low", "close")):
+        if key == "close":
+            rel = close_rel
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rel = np.clip((cols[key][rows][p] / pre - 1.0) * 100.0, -clamp, clamp)
+            rel = np.where(np.isnan(rel), close_rel, rel)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ohlc[:, j] = np.where(counts > 0, np.bincount(s[ok], weights=rel[ok], minlength=k) / counts, np.nan)
+    volume = np.bincount(s, weights=np.nan_to_num(cols["volume"][rows][p]), minlength=k)
+    amount = np.bincount(s, weights=np.nan_to_num(cols["amount"][rows][p]), minlength=k)
+    keep = np.flatnonzero(np.bincount(s, minlength=k) > 0)
+    return {
+        "names": [str(v) for v in type_map["sectors"][keep].tolist()],
+        "groups": [group_name] * len(keep),
+        "dates": [trade_date or ""] * len(keep),
+        "ohlc": ohlc[keep],
+        "volume": volume[keep],
+        "turnover": amount[keep],
+        "size": amount[keep],
+        "pct": ohlc[keep, 3],
+        "unit": "%",
+    }
+
+
+def build_market_map_option(snapshot):
+    colors = pct_colors(snapshot["pct"])
+    groups = {}
+    for i, name in enumerate(snapshot["names"]):
+        size = snapshot["size"][i]
+        if not size > 0:
+            continue
+        pct = snapshot["pct"][i]
+        label_pct = "--" if pct != pct else f"{pct:+.2f}%"
+        groups.setdefault(snapshot["groups"][i], []).append(
+            {
+                "name": name,
+                "value": float(size),
+                "pct": None if pct != pct else round(float(pct), 2),
+                "ohlc": [None if v != v else round(float(v), 2) for v in snapshot["ohlc"][i].tolist()],
+                "volume": float(snapshot["volume"][i]),
+                "turnover": None if snapshot["turnover"][i] != snapshot["turnover"][i] else float(snapshot["turnover"][i]),
+                "date": snapshot["dates"][i],
+                "unit": snapshot["unit"],
+                "itemStyle": {"color": colors[i]},
+                "label": {"formatter": f"{name}\n{label_pct}"},
+            }
+        )
+    data = [{"name": g, "children": children} for g, children in groups.items()]
+    if len(data) == 1:
+        data = data[0]["children"]
+    return {
+        "animation": False,
+        "tooltip": {
+            "formatter": MAP_TOOLTIP,
+            "backgroundColor": "#ffffff",
+            "borderColor": "#e5e7eb",
+            "textStyle": {"color": "#111827"},
+        },
+        "series": [
+            {
+                "type": "treemap",
+                "data": data,
+                "roam": False,
+                "nodeClick": False,
+                "breadcrumb": {"show": False},
+                "width": "100%",
+                "height": "100%",
+                "label": {"show": True, "fontSize": 11, "color": "#111827"},
+                "upperLabel": {"show": True, "height": 18, "color": "#374151"},
+                "levels": [
+                    {"itemStyle": {"borderColor": "#ffffff", "borderWidth": 2, "gapWidth": 2}},
+                    {"itemStyle": {"borderColor": "#ffffff", "borderWidth": 1, "gapWidth": 1}},
+                ],
+            }
+        ],
+    }
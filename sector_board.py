@@ -0,0 +1,165 @@
+from datetime import date, timedelta
+
+import streamlit as st
+from streamlit_echarts import st_echarts
+
+from chart_cache import cached_option
+from index_monitor import render_panel_title
+from market_map import MAP_REFRESH_SECONDS, build_market_map_option, refresh_cycle, sector_map_snapshot
+from sector_breadth import SECTOR_FIELD_LIST, SECTOR_TYPES, compute_sector_breadth, load_sector_map, sector_map_path
+
+SECTOR_SORT_OPTIONS = {
+    "平均涨幅": "avg_pct",
+    "涨跌中位数": "median_pct",
+    "上涨占比": "up_ratio",
+    "涨停家数": "limit_up",
+    "成交额": "amount",
+}
+SECTOR_TABLE_COLUMNS = {
+    "sector": "板块",
+    "members": "成分股",
+    "up": "上涨",
+    "down": "下跌",
+    "flat": "平盘",
+    "halt": "停牌",
+    "limit_up": "涨停",
+    "limit_down": "跌停",
+    "avg_pct": "平均涨幅(%)",
+    "median_pct": "中位数(%)",
+    "up_ratio": "上涨占比(%)",
+    "amount": "成交额(亿)",
+    "leader": "领涨股",
+    "leader_pct": "领涨幅(%)",
+}
+
+
+@st.cache_data(ttl=900, show_spinner=False)
+def load_sector_table(deal_date_str, group_type, map_version, _fetch_stock_list):
+    data_list = _fetch_stock_list(deal_date_str, SECTOR_FIELD_LIST, "1")
+    mapping, _ = load_sector_map()
+    return compute_sector_breadth(data_list, mapping.get(group_type), trade_date=deal_date_str)
+
+
+def build_sector_bar_option(names, values, value_name):
+    return {
+        "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
+        "grid": {"left": 10, "right": 30, "top": 10, "bottom": 10, "containLabel": True},
+        "xAxis": {"type": "value", "name": value_name},
+        "yAxis": {"type": "category", "data": names, "inverse": True, "axisLabel": {"interval": 0}},
+        "series": [
+            {
+                "type": "bar",
+                "data": [
+                    {"value": v, "itemStyle": {"color": "#E94B3C" if v >= 0 else "#2EBD85"}} for v in values
+                ],
+                "barWidth": "60%",
+                "label": {"show": True, "position": "right", "fontSize": 11},
+            }
+        ],
+    }
+
+
+@st.cache_data(ttl=MAP_REFRESH_SECONDS, show_spinner=False)
+def load_sector_map_snapshot(deal_date_str, group_type, map_version, cycle, _fetch_stock_list):
+    # same cached stock list as the table, aggregated once per refresh cycle
+    data_list = _fetch_stock_list(deal_date_str, SECTOR_FIELD_LIST, "1")
+    mapping, _ = load_sector_map()
+    return sector_map_snapshot(data_list, mapping.get(group_type), trade_date=deal_date_str, group_name=group_type)
+
+
+@st.fragment
+def render_sector_board(ctx, subtab):
+    fetch_stock_list = ctx.get("fetch_stock_list_by_date_and_fields")
+    get_refresh_token = ctx["get_refresh_token"]
+    group_type = SECTOR_TYPES.get(subtab, subtab)
+
+    with st.container(border=True):
+        header = st.columns([3, 1.2, 1.4, 1.2, 1.4])
+        with header[0]:
+            render_panel_title(f"{group_type}板块强弱")
+        with header[1]:
+            view = st.selectbox("视图", ["条形图", "市场地图"], key="sector_view", label_visibility="collapsed")
+        with header[2]:
+            sort_label = st.selectbox(
+                "排序",
+                list(SECTOR_SORT_OPTIONS.keys()),
+                key="sector_sort",
+                label_visibility="collapsed",
+            )
+        with header[3]:
+            top_n = st.selectbox(
+                "数量",
+                [20, 40, 80],
+                format_func=lambda n: f"前{n}",
+                key="sector_top_n",
+                label_visibility="collapsed",
+            )
+        with header[4]:
+            deal_date_input = st.date_input(
+                "日期",
+                value=st.session_state.get("sector_date") or date.today(),
+                key="sector_date",
+                label_visibility="collapsed",
+            )
+
+        deal_day = deal_date_input or date.today()
+        while deal_day.weekday() >= 5:
+            deal_day = deal_day - timedelta(days=1)
+
+        if not fetch_stock_list or not get_refresh_token():
+            st.caption("未配置refresh-token，无法获取个股快照")
+            return
+        try:
+            mapping, map_version = load_sector_map()
+        except Exception as e:
+            st.caption(f"板块映射文件读取失败：{e}")
+            mapping, map_version = {}, None
+        if group_type not in mapping:
+            st.caption(f"未找到{group_type}板块映射（{sector_map_path()}，列为 code,type,sector），暂按交易板块分组")
+        try:
+            df = load_sector_table(deal_day.isoformat(), group_type, map_version, fetch_stock_list)
+        except Exception as e:
+            st.caption(f"板块数据获取失败：{e}")
+            return
+        if df.empty:
+            st.caption("当日无板块数据")
+            return
+
+        sort_key = SECTOR_SORT_OPTIONS[sort_label]
+        df = df.sort_values(sort_key, ascending=False, na_position="last")
+        st.caption(
+            f"{deal_day.isoformat()} · 共{len(df)}个板块 · 上涨板块 {int((df['avg_pct'] > 0).sum())}"
+            f" · 下跌板块 {int((df['avg_pct'] < 0).sum())}"
+        )
+        if view == "市场地图":
+            deal_date_str = deal_day.isoformat()
+            cycle = refresh_cycle() if deal_day >= date.today() else 0
+            snapshot = load_sector_map_snapshot(deal_date_str, group_type, map_version, cycle, fetch_stock_list)
+            option = cached_option(
+                f"sector_map_{group_type}",
+                build_market_map_option,
+                snapshot,
+                version=(deal_date_str, map_version, cycle),
+            )
+            st_echarts(option, height="480px", key=f"sector_map_{group_type}")
+        else:
+            head = df.head(top_n)
+            values = head[sort_key].fillna(0.0)
+            if sort_key == "amount":
+                values = values / 1e8
+            option = build_sector_bar_option(
+                head["sector"].tolist(), [round(float(v), 2) for v in values], sort_label
+            )
+            st_echarts(option, height=f"{max(240, 22 * len(head) + 40)}px", key=f"sector_bar_{group_type}")
+
+        table = df.assign(amount=df["amount"] / 1e8).rename(columns=SECTOR_TABLE_COLUMNS)
+        st.dataframe(
+            table,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "成交额(亿)": st.column_config.NumberColumn(format="%.2f"),
+                "中位数(%)": st.column_config.NumberColumn(format="%.2f"),
+                "领涨幅(%)": st.column_config.NumberColumn(format="%.2f"),
+            },
+        )
@@ -0,0 +1,172 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from breadth_engine import BREADTH_INPUT_FIELDS, row_breadth, sample_rows, snapshot_columns
+from breadth_history import BREADTH_FIELD_LIST
+from local_store import DATA_DIR
+from security_master import BOARD_NAMES, build_security_master, get_security_master, lookup_ids
+
+SECTOR_FIELD_LIST = f"{BREADTH_FIELD_LIST},amount,open,high,low"
+SECTOR_TYPES = {
+    "行业板块": "行业",
+    "概念板块": "概念",
+    "地区板块": "地区",
+    "主题板块": "主题",
+    "风格板块": "风格",
+}
+
+_map_cache = {}
+_map_lock = threading.Lock()
+
+
+def sector_map_path():
+    return os.getenv("DJ_SECTOR_MAP", os.path.join(DATA_DIR, "sector", "sector_map.csv")).strip()
+
+
+def normalize_code(text):
+    t = str(text or "").strip()
+    if "." in t:
+        t = t.split(".")[0]
+    if t.isdigit() and len(t) < 6:
+        t = t.zfill(6)
+    return t
+
+
+def parse_sector_map(path):
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    if not {"code", "type", "sector"} <= set(df.columns):
+        raise ValueError("板块映射文件需包含 code,type,sector 三列")
+    df = pd.DataFrame(
+        {
+            "code": [normalize_code(c) for c in df["code"]],
+            "type": df["type"].str.strip(),
+            "sector": df["sector"].str.strip(),
+        }
+    ).drop_duplicates()
+    codes = df["code"].to_numpy(dtype=object)
+    types = df["type"].to_numpy(dtype=object)
+    sectors = df["sector"].to_numpy(dtype=object)
+    keep = (sectors != "") & np.array([c.isdigit() for c in codes], dtype=bool)
+    out = {}
+    for group_type in pd.unique(types[keep]):
+        sel = keep & (types == group_type)
+        names, sector_idx = np.unique(sectors[sel].astype(str), return_inverse=True)
+        out[str(group_type)] = {
+            "sectors": names.astype(object),
+            "codes": codes[sel].astype(str),
+            "sector_idx": sector_idx.astype(np.int64),
+        }
+    return out
+
+
+def load_sector_map(path=None):
+    path = path or sector_map_path()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}, None
+    version = f"{int(stat.st_mtime)}_{stat.st_size}"
+    with _map_lock:
+        cached = _map_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1], version
+    mapping = parse_sector_map(path)
+    with _map_lock:
+        _map_cache[path] = (version, mapping)
+    return mapping, version
+
+
+def board_type_map(master):
+    boards = sorted(BOARD_NAMES)
+    pos = np.searchsorted(boards, master["board"])
+    return {
+        "sectors": np.array([BOARD_NAMES[b] for b in boards], dtype=object),
+        "codes": master["codes"],
+        "sector_idx": pos.astype(np.int64),
+    }
+
+
+def sector_members(master, type_map, row_ids):
+    # (sector index, snapshot row position) for every mapped member that is in the snapshot
+    pos_of_id = np.full(len(master["codes"]), -1, dtype=np.int64)
+    pos_of_id[row_ids] = np.arange(len(row_ids))
+    member_ids = lookup_ids(master, type_map["codes"])
+    member_pos = np.where(member_ids >= 0, pos_of_id[np.maximum(member_ids, 0)], -1)
+    keep = member_pos >= 0
+    return type_map["sector_idx"][keep], member_pos[keep]
+
+
+def compute_sector_breadth(data_list, type_map=None, master=None, trade_date=None):
+    cols = snapshot_columns(data_list, BREADTH_INPUT_FIELDS + ("amount",))
+    if master is None and trade_date is not None:
+        master = get_security_master(trade_date, cols["code"], cols["name"])
+    elif master is None:
+        master = build_security_master(cols["code"], cols["name"])
+    if type_map is None:
+        type_map = board_type_map(master)
+    rows, row_ids, _ = sample_rows(cols, master)
+    attrs = row_breadth(cols, rows, row_ids, master)
+
+    s, p = sector_members(master, type_map, row_ids)
+    k = len(type_map["sectors"])
+
+    def count(mask=None):
+        return np.bincount(s if mask is None else s[mask], minlength=k)
+
+    has = attrs["has_pct"][p]
+    pct = attrs["pct_cents"][p]
+    members = count()
+    scored = count(has)
+    up = count(has & (pct > 0))
+    down = count(has & (pct < 0))
+    amount = cols["amount"][rows][p]
+    amount_sum = np.bincount(s, weights=np.where(np.isnan(amount), 0.0, amount), minlength=k)
+    pct_sum = np.bincount(s[has], weights=pct[has].astype(np.float64), minlength=k)
+
+    # sort members by (sector, pct) once; medians and leaders are then index lookups per group
+    ss = s[has]
+    pp = pct[has]
+    pos_scored = p[has]
+    order = np.lexsort((pp, ss))
+    pp = pp[order]
+    pos_scored = pos_scored[order]
+    starts = np.cumsum(scored) - scored
+    valid = scored > 0
+    lo = np.where(valid, starts + (scored - 1) // 2, 0)
+    hi = np.where(valid, starts + scored // 2, 0)
+    last = np.where(valid, starts + scored - 1, 0)
+    if len(pp):
+        median = np.where(valid, (pp[lo] + pp[hi]) / 200.0, np.nan)
+        leader_pct = np.where(valid, pp[last] / 100.0, np.nan)
+        leader_name = np.where(valid, cols["name"][rows][pos_scored[last]], "")
+    else:
+        median = np.full(k, np.nan)
+        leader_pct = np.full(k, np.nan)
+        leader_name = np.full(k, "", dtype=object)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg = np.where(valid, pct_sum / scored / 100.0, np.nan)
+        up_ratio = np.where(valid, up * 100.0 / scored, np.nan)
+
+    df = pd.DataFrame(
+        {
+            "sector": type_map["sectors"],
+            "members": members,
+            "up": up,
+            "down": down,
+            "flat": scored - up - down,
+            "halt": count(~attrs["active"][p]),
+            "limit_up": count(attrs["limit_up"][p]),
+            "limit_down": count(attrs["limit_down"][p]),
+            "avg_pct": np.round(avg, 2),
+            "median_pct": median,
+            "up_ratio": np.round(up_ratio, 2),
+            "amount": amount_sum,
+            "leader": leader_name,
+            "leader_pct": leader_pct,
+        }
+    )
+    return df[df["members"] > 0].reset_index(drop=True)
@@ -0,0 +1,135 @@
+import threading
+
+import numpy as np
+
+BOARD_OTHER = 0
+BOARD_SH_MAIN = 1
+BOARD_SZ_MAIN = 2
+BOARD_CHINEXT = 3
+BOARD_STAR = 4
+BOARD_BJ = 5
+BOARD_SH_B = 6
+BOARD_SZ_B = 7
+
+BOARD_NAMES = {
+    BOARD_OTHER: "其他",
+    BOARD_SH_MAIN: "沪市主板",
+    BOARD_SZ_MAIN: "深市主板",
+    BOARD_CHINEXT: "创业板",
+    BOARD_STAR: "科创板",
+    BOARD_BJ: "北交所",
+    BOARD_SH_B: "沪市B股",
+    BOARD_SZ_B: "深市B股",
+}
+
+SHARE_OTHER = 0
+SHARE_A = 1
+SHARE_B = 2
+
+BOARD_PREFIXES = {
+    "600": BOARD_SH_MAIN,
+    "601": BOARD_SH_MAIN,
+    "603": BOARD_SH_MAIN,
+    "605": BOARD_SH_MAIN,
+    "688": BOARD_STAR,
+    "000": BOARD_SZ_MAIN,
+    "001": BOARD_SZ_MAIN,
+    "002": BOARD_SZ_MAIN,
+    "003": BOARD_SZ_MAIN,
+    "300": BOARD_CHINEXT,
+    "301": BOARD_CHINEXT,
+    "900": BOARD_SH_B,
+    "200": BOARD_SZ_B,
+}
+BJ_PREFIXES = ("8", "4", "92")
+
+A_SHARE_BOARDS = (BOARD_SH_MAIN, BOARD_SZ_MAIN, BOARD_CHINEXT, BOARD_STAR)
+B_SHARE_BOARDS = (BOARD_SH_B, BOARD_SZ_B)
+
+_master_cache = {}
+_master_lock = threading.Lock()
+MASTER_CACHE_DAYS = 5
+
+
+def classify_board(code_text):
+    board = BOARD_PREFIXES.get(code_text[:3])
+    if board is not None:
+        return board
+    if len(code_text) == 6 and code_text.startswith(BJ_PREFIXES):
+        return BOARD_BJ
+    return BOARD_OTHER
+
+
+def build_security_master(codes, names):
+    codes = np.asarray(codes, dtype=object)
+    names = np.asarray(names, dtype=object)
+    keep = np.array([isinstance(c, str) and c.isdigit() for c in codes], dtype=bool)
+    codes = codes[keep].astype(str)
+    names = names[keep]
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    first = np.ones(len(sorted_codes), dtype=bool)
+    first[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    order = order[first]
+    codes = codes[order]
+    names = ["" if n is None else str(n).strip() for n in names[order]]
+    upper_names = [n.upper() for n in names]
+
+    board = np.array([classify_board(c) for c in codes], dtype=np.int8)
+    share_class = np.full(len(codes), SHARE_OTHER, dtype=np.int8)
+    share_class[np.isin(board, A_SHARE_BOARDS)] = SHARE_A
+    share_class[np.isin(board, B_SHARE_BOARDS)] = SHARE_B
+    is_new = np.array([n.startswith("N") for n in upper_names], dtype=bool)
+    is_star_st = np.array([n.startswith("*ST") for n in upper_names], dtype=bool)
+    is_st = is_star_st | np.array([n.startswith("ST") for n in upper_names], dtype=bool)
+
+    limit_ratio = np.zeros(len(codes), dtype=np.float32)
+    limit_ratio[np.isin(board, (BOARD_SH_MAIN, BOARD_SZ_MAIN, BOARD_SH_B, BOARD_SZ_B))] = 0.10
+    limit_ratio[np.isin(board, (BOARD_SH_MAIN, BOARD_SZ_MAIN)) & is_st] = 0.05
+    limit_ratio[np.isin(board, (BOARD_CHINEXT, BOARD_STAR))] = 0.20
+    limit_ratio[board == BOARD_BJ] = 0.30
+    limit_ratio[is_new] = 0.0
+
+    return {
+        "codes": codes.astype(str),
+        "names": np.asarray(names, dtype=object),
+        "board": board,
+        "share_class": share_class,
+        "is_a_share": share_class == SHARE_A,
+        "is_b_share": share_class == SHARE_B,
+        "is_st": is_st,
+        "is_star_st": is_star_st,
+        "is_new": is_new,
+        "limit_ratio": limit_ratio,
+    }
+
+
+def lookup_ids(master, codes):
+    codes = np.asarray(codes, dtype=object).astype(str)
+    known = master["codes"]
+    if not len(known) or not len(codes):
+        return np.full(len(codes), -1, dtype=np.int64)
+    pos = np.searchsorted(known, codes)
+    pos = np.minimum(pos, len(known) - 1)
+    return np.where(known[pos] == codes, pos, -1).astype(np.int64)
+
+
+def get_security_master(trade_date, codes, names):
+    key = str(trade_date)
+    with _master_lock:
+        master = _master_cache.get(key)
+    if master is not None:
+        ids = lookup_ids(master, codes)
+        digit = np.array([isinstance(c, str) and c.isdigit() for c in codes], dtype=bool)
+        if not np.any(digit & (ids < 0)):
+            return master
+    master = build_security_master(codes, names)
+    with _master_lock:
+        _master_cache[key] = master
+        for old_key in sorted(_master_cache.keys())[:-MASTER_CACHE_DAYS]:
+            _master_cache.pop(old_key, None)
+    return master
+
+
+def board_ids(master, boards):
+    return np.flatnonzero(np.isin(master["board"], boards))
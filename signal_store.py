@@ -0,0 +1,65 @@
+from local_store import get_store_path, read_json, safe_file_key, write_json
+
+
+def signal_state_path(index_code, period_key, source):
+    name = f"{safe_file_key(index_code)}_{safe_file_key(period_key)}_{safe_file_key(source)}.json"
+    return get_store_path("signals", name)
+
+
+def new_signal_state(index_code, period_key, source, pivot_window=3, max_bars=200):
+    return {
+        "index": str(index_code),
+        "period": str(period_key),
+        "source": str(source),
+        "pivot_window": int(pivot_window),
+        "max_bars": int(max_bars),
+        "scanned_x": None,
+        "scanned_seq": None,
+        "last_pivot": {"high": None, "low": None},
+        "signals": [],
+    }
+
+
+def load_signal_state(index_code, period_key, source, pivot_window=3, max_bars=200):
+    state = read_json(signal_state_path(index_code, period_key, source))
+    if (
+        not isinstance(state, dict)
+        or state.get("pivot_window") != int(pivot_window)
+        or state.get("max_bars") != int(max_bars)
+    ):
+        return new_signal_state(index_code, period_key, source, pivot_window, max_bars)
+    state.setdefault("last_pivot", {"high": None, "low": None})
+    state.setdefault("signals", [])
+    return state
+
+
+def save_signal_state(state):
+    write_json(signal_state_path(state["index"], state["period"], state["source"]), state)
+
+
+def add_signals(state, signals):
+    seen = {(s.get("x"), s.get("kind")) for s in state.get("signals") or []}
+    added = []
+    for s in signals or []:
+        k = (s.get("x"), s.get("kind"))
+        if k in seen:
+            continue
+        seen.add(k)
+        state["signals"].append(s)
+        added.append(s)
+    return added
+
+
+def list_signals(state, start_key=None, end_key=None, date_func=None):
+    out = []
+    for s in state.get("signals") or []:
+        if start_key is not None or end_key is not None:
+            d = date_func(s.get("x")) if date_func else s.get("x")
+            if d is None:
+                continue
+            if start_key is not None and d < start_key:
+                continue
+            if end_key is not None and d > end_key:
+                continue
+        out.append(s)
+    return out
@@ -0,0 +1,199 @@
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from bar_resample import AFTERNOON_CLOSE, AFTERNOON_OPEN, MORNING_CLOSE, MORNING_OPEN
+from bar_store import iter_missing_ranges, slice_bars, sync_bars
+from local_store import get_store_path, write_npz
+
+# the 241 one-minute slots of get_trading_minutes_of_day(1)
+SLOT_MINUTES = np.concatenate(
+    [np.arange(MORNING_OPEN, MORNING_CLOSE + 1), np.arange(AFTERNOON_OPEN + 1, AFTERNOON_CLOSE + 1)]
+)
+SLOT_COUNT = len(SLOT_MINUTES)
+SLOT_LABELS = [f"{m // 60:02d}:{m % 60:02d}" for m in SLOT_MINUTES.tolist()]
+SLOT_OF_MINUTE = np.full(24 * 60, -1, dtype=np.int64)
+SLOT_OF_MINUTE[SLOT_MINUTES] = np.arange(SLOT_COUNT)
+SLOT_AVG_DAYS = 5
+PREV_CLOSE_MAX_GAP_DAYS = 10
+
+STATS_CACHE_SIZE = 64
+
+_profile_cache = {}
+_stats_cache = {}
+_profile_lock = threading.Lock()
+
+
+def slot_profile_path(exponent_id):
+    return get_store_path("profiles", f"{exponent_id}_slots.npz")
+
+
+def empty_profile():
+    return {
+        "days": np.array([], dtype="datetime64[D]"),
+        "open": np.array([], dtype=np.float64),
+        "close": np.zeros((0, SLOT_COUNT)),
+        "cumvol": np.zeros((0, SLOT_COUNT)),
+        "checked": np.array([], dtype="datetime64[D]"),
+    }
+
+
+def forward_fill_rows(values):
+    filled = ~np.isnan(values)
+    idx = np.where(filled, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    out = values[np.arange(values.shape[0])[:, None], idx]
+    # slots after the last observed bar stay empty so a partial session is not extended flat
+    last = values.shape[1] - 1 - np.argmax(filled[:, ::-1], axis=1)
+    out[np.arange(values.shape[1]) > np.where(filled.any(axis=1), last, -1)[:, None]] = np.nan
+    return out
+
+
+def slot_matrix(bars):
+    ts = bars["ts"].astype("datetime64[m]")
+    day = ts.astype("datetime64[D]")
+    slot = SLOT_OF_MINUTE[np.clip((ts - day).astype(np.int64), 0, 24 * 60 - 1)]
+    ok = slot >= 0
+    days, row = np.unique(day[ok], return_inverse=True)
+    slot = slot[ok]
+    close = np.full((len(days), SLOT_COUNT), np.nan)
+    close[row, slot] = bars["close"][ok]
+    vol = np.zeros((len(days), SLOT_COUNT))
+    np.add.at(vol, (row, slot), np.nan_to_num(bars["volume"][ok]))
+    first = np.full(len(days), len(row))
+    np.minimum.at(first, row, np.arange(len(row)))
+    close = forward_fill_rows(close)
+    cumvol = np.where(np.isnan(close), np.nan, np.cumsum(vol, axis=1))
+    return {"days": days, "open": bars["open"][ok][first] if len(days) else np.zeros(0), "close": close, "cumvol": cumvol}
+
+
+def load_slot_profile(exponent_id):
+    path = slot_profile_path(exponent_id)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return empty_profile(), None
+    version = f"{int(stat.st_mtime_ns)}_{stat.st_size}"
+    with _profile_lock:
+        cached = _profile_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1], version
+    try:
+        with np.load(path) as f:
+            profile = {k: f[k] for k in f.files}
+    except Exception:
+        return empty_profile(), None
+    profile.setdefault("checked", empty_profile()["checked"])
+    with _profile_lock:
+        _profile_cache[path] = (version, profile)
+    return profile, version
+
+
+def save_slot_profile(exponent_id, profile):
+    write_npz(slot_profile_path(exponent_id), profile)
+
+
+def merge_profile(profile, new):
+    keep = ~np.isin(new["days"], profile["days"])
+    if not keep.any():
+        return profile
+    days = np.concatenate([profile["days"], new["days"][keep]])
+    order = np.argsort(days, kind="stable")
+    return {k: np.concatenate([profile[k], new[k][keep]])[order] for k in ("days", "open", "close", "cumvol")}
+
+
+def update_slot_profile(fetch_index_min_list, exponent_id, target_day, n_days=SLOT_AVG_DAYS, expected_code=None):
+    # only finished sessions enter the table; a weekday counts as settled once the minute store has checked it,
+    # so holidays are skipped without refetching and a new session is picked up the day after it closes
+    profile, version = load_slot_profile(exponent_id)
+    last_day = min(target_day, date.today()) - timedelta(days=1)
+    start = last_day - timedelta(days=n_days * 2 + 10)
+    if not list(iter_missing_ranges(profile["checked"], start, last_day, 100000)):
+        return profile, version
+    bars = sync_bars(fetch_index_min_list, exponent_id, "1m", start, last_day, expected_code=expected_code)
+    checked = bars["checked"][(bars["checked"] >= np.datetime64(start)) & (bars["checked"] <= np.datetime64(last_day))]
+    checked = np.union1d(profile["checked"], checked)
+    merged = merge_profile(profile, slot_matrix(slice_bars(bars, start, last_day)))
+    if merged is profile and np.array_equal(checked, profile["checked"]):
+        return profile, version
+    save_slot_profile(exponent_id, dict(merged, checked=checked))
+    return load_slot_profile(exponent_id)
+
+
+def is_previous_session(profile, session_day, target_day):
+    # true when every weekday between the session and target_day was checked and had no bars, i.e. was a holiday
+    after = session_day.astype("datetime64[D]").astype(object) + timedelta(days=1)
+    last_day = min(target_day, date.today()) - timedelta(days=1)
+    return not list(iter_missing_ranges(profile["checked"], after, last_day, 100000))
+
+
+def prev_close_for(profile, day):
+    pos = int(np.searchsorted(profile["days"], np.datetime64(day)))
+    if pos == 0:
+        return None
+    prev_day = profile["days"][pos - 1]
+    if (np.datetime64(day) - prev_day).astype(int) > PREV_CLOSE_MAX_GAP_DAYS:
+        return None
+    row = profile["close"][pos - 1]
+    filled = row[~np.isnan(row)]
+    return float(filled[-1]) if len(filled) else None
+
+
+def session_rows(profile, target_day, n_days):
+    pos = int(np.searchsorted(profile["days"], np.datetime64(target_day)))
+    return np.arange(max(0, pos - n_days), pos)
+
+
+def row_returns(profile, rows):
+    out = np.full((len(rows), SLOT_COUNT), np.nan)
+    for i, r in enumerate(rows.tolist()):
+        base = prev_close_for(profile, profile["days"][r].astype(object))
+        base = profile["open"][r] if base is None else base
+        if base:
+            out[i] = (profile["close"][r] / base - 1.0) * 100.0
+    return out
+
+
+def same_slot_stats(profile, target_day, n_days=SLOT_AVG_DAYS):
+    rows = session_rows(profile, target_day, n_days)
+    if not len(rows):
+        return None
+    ret = row_returns(profile, rows)
+    cumvol = profile["cumvol"][rows]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = cumvol / cumvol[:, -1:]
+        return {
+            "days": profile["days"][rows],
+            "prev_ret": ret[-1],
+            "avg_ret": np.nanmean(ret, axis=0) if len(rows) > 1 else ret[-1],
+            "prev_cumvol": cumvol[-1],
+            "avg_cumvol": np.nanmean(cumvol, axis=0) if len(rows) > 1 else cumvol[-1],
+            "avg_share": np.nanmean(share, axis=0) if len(rows) > 1 else share[-1],
+        }
+
+
+def cached_slot_stats(exponent_id, version, profile, target_day, n_days=SLOT_AVG_DAYS):
+    # the table only changes once per session, so per-slot aggregates are reused for every live bar
+    key = (exponent_id, version, str(target_day), int(n_days))
+    with _profile_lock:
+        if key in _stats_cache:
+            return _stats_cache[key]
+    stats = same_slot_stats(profile, target_day, n_days)
+    with _profile_lock:
+        _stats_cache[key] = stats
+        while len(_stats_cache) > STATS_CACHE_SIZE:
+            _stats_cache.pop(next(iter(_stats_cache)))
+    return stats
+
+
+def today_slot_row(profile, bars, day):
+    matrix = slot_matrix(bars)
+    pos = np.flatnonzero(matrix["days"] == np.datetime64(day))
+    if not len(pos):
+        return None
+    close = matrix["close"][pos[0]]
+    base = prev_close_for(profile, day)
+    base = matrix["open"][pos[0]] if base is None else base
+    return {"ret": (close / base - 1.0) * 100.0 if base else close * np.nan, "cumvol": matrix["cumvol"][pos[0]]}
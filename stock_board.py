@@ -0,0 +1,167 @@
+from datetime import date, timedelta
+
+import numpy as np
+import streamlit as st
+from streamlit_echarts import st_echarts
+
+from bar_cache import bar_cache_fetch, bar_cache_pin, bar_cache_stats, get_default_bar_cache
+from breadth_engine import snapshot_columns
+from breadth_history import list_weekdays
+from chart_cache import cached_option
+from index_compare import build_price_volume_option
+from index_monitor import render_panel_title
+from local_store import get_store_path, read_json, write_json
+from security_master import (
+    BOARD_BJ,
+    BOARD_CHINEXT,
+    BOARD_OTHER,
+    BOARD_SH_B,
+    BOARD_SH_MAIN,
+    BOARD_STAR,
+    BOARD_SZ_B,
+    BOARD_SZ_MAIN,
+    board_ids,
+    get_security_master,
+)
+from stock_day_store import (
+    STOCK_DAY_FIELD_LIST,
+    gather_stock_bars,
+    load_stock_day_index,
+    missing_stock_days,
+    stock_day_version,
+    sync_stock_days,
+)
+
+STOCK_SUBTAB_BOARDS = {
+    "沪市个股": (BOARD_SH_MAIN,),
+    "深市个股": (BOARD_SZ_MAIN,),
+    "创业板个股": (BOARD_CHINEXT,),
+    "科创板个股": (BOARD_STAR,),
+    "其他市场": (BOARD_BJ, BOARD_SH_B, BOARD_SZ_B, BOARD_OTHER),
+}
+
+
+def pinned_symbols_path():
+    return get_store_path("stock", "pinned.json")
+
+
+def load_pinned_symbols():
+    return [str(c) for c in read_json(pinned_symbols_path(), default=[]) or []]
+
+
+def save_pinned_symbols(symbols):
+    write_json(pinned_symbols_path(), sorted(set(symbols)))
+
+
+def latest_weekday(day=None):
+    day = day or date.today()
+    while day.weekday() >= 5:
+        day = day - timedelta(days=1)
+    return day
+
+
+def load_stock_choices(fetch_stock_list, deal_date_str, boards):
+    data_list = fetch_stock_list(deal_date_str, STOCK_DAY_FIELD_LIST, "1")
+    cols = snapshot_columns(data_list, ())
+    master = get_security_master(deal_date_str, cols["code"], cols["name"])
+    ids = board_ids(master, boards)
+    return [f"{master['codes'][i]} {master['names'][i]}" for i in ids]
+
+
+def build_stock_kline_option(bars):
+    x_data = [str(d) for d in bars["ts"]]
+    close = bars["close"]
+    open_ = np.where(np.isnan(bars["open"]), close, bars["open"])
+    high = np.fmax(np.fmax(bars["high"], open_), close)
+    low = np.fmin(np.fmin(bars["low"], open_), close)
+    candles = np.column_stack([open_, close, low, high]).tolist()
+    return build_price_volume_option(
+        x_data, "candlestick", candlestick_series=candles, volume_series=np.nan_to_num(bars["volume"]).tolist()
+    )
+
+
+@st.fragment
+def render_stock_board(ctx, subtab):
+    fetch_stock_list = ctx.get("fetch_stock_list_by_date_and_fields")
+    request_stock_list = ctx.get("request_stock_list_by_date_and_fields")
+    get_refresh_token = ctx["get_refresh_token"]
+    boards = STOCK_SUBTAB_BOARDS.get(subtab, (BOARD_OTHER,))
+    cache = get_default_bar_cache()
+    pinned = load_pinned_symbols()
+    for code in pinned:
+        bar_cache_pin(cache, code)
+
+    with st.container(border=True):
+        header = st.columns([2.2, 2.4, 1.3, 1.4])
+        with header[0]:
+            render_panel_title("个股K线")
+        if not fetch_stock_list or not get_refresh_token():
+            st.caption("未配置refresh-token，无法获取个股数据")
+            return
+        try:
+            choices = load_stock_choices(fetch_stock_list, latest_weekday().isoformat(), boards)
+        except Exception as e:
+            st.caption(f"个股列表获取失败：{e}")
+            return
+        if not choices:
+            st.caption("该市场暂无个股")
+            return
+        pinned_choices = [c for c in choices if c.split(" ", 1)[0] in set(pinned)]
+        with header[1]:
+            picked = st.selectbox(
+                "个股",
+                pinned_choices + [c for c in choices if c not in pinned_choices],
+                key=f"stock_pick_{subtab}",
+                label_visibility="collapsed",
+            )
+        with header[2]:
+            days = st.selectbox(
+                "区间",
+                [60, 120, 250],
+                format_func=lambda n: f"近{n}日",
+                key="stock_bar_days",
+                label_visibility="collapsed",
+            )
+        code = picked.split(" ", 1)[0]
+        dates = list_weekdays(date.today(), days)
+        index = load_stock_day_index()
+        todo = missing_stock_days(index, dates)
+        with header[3]:
+            sync = st.button(
+                f"同步日线（{len(todo)}天）",
+                key="stock_day_sync",
+                disabled=not todo or not request_stock_list,
+                use_container_width=True,
+            )
+        if sync:
+            progress = st.progress(0.0, text="同步个股日线")
+
+            def on_progress(done, total, deal_date_str):
+                progress.progress(done / total, text=f"同步个股日线 {deal_date_str}（{done}/{total}）")
+
+            index, failed = sync_stock_days(request_stock_list, todo, on_progress=on_progress)
+            progress.empty()
+            if failed:
+                st.caption(f"{len(failed)}天同步失败：{'、'.join(d for d, _ in failed[:5])}")
+
+        is_pinned = st.checkbox("固定到常用（不被缓存淘汰）", value=code in pinned, key=f"stock_pin_{code}")
+        if is_pinned != (code in pinned):
+            pinned = [c for c in pinned if c != code] + ([code] if is_pinned else [])
+            save_pinned_symbols(pinned)
+            bar_cache_pin(cache, code, is_pinned)
+
+        stored = [d for d in index["dates"] if dates[0] <= d <= dates[-1]]
+        key = (code, dates[0], dates[-1], len(stored), stock_day_version())
+        bars = bar_cache_fetch(cache, key, lambda: gather_stock_bars(code, stored))
+        if not len(bars["ts"]):
+            st.caption("本地暂无该股日线，请先同步")
+        else:
+            option = cached_option(f"stock_kline_{subtab}", build_stock_kline_option, bars, version=key)
+            st_echarts(option, height="420px", key=f"stock_kline_{subtab}")
+
+        stats = bar_cache_stats(cache)
+        st.caption(
+            f"K线缓存：{stats['entries']}只 · {stats['bytes'] / 1024:.0f}KB/{stats['max_bytes'] / 1024 / 1024:.0f}MB"
+            f" · 命中率 {stats['hit_rate']}%（{stats['hits']}/{stats['hits'] + stats['misses']}）"
+            f" · 淘汰 {stats['evictions']} · 常用 {stats['pinned']}只"
+        )
@@ -0,0 +1,139 @@
+import threading
+from datetime import date
+
+import numpy as np
+
+from breadth_engine import get_first_value, snapshot_columns
+from breadth_history import normalize_record_date
+from fetch_pool import map_limited
+from local_store import get_store_path, read_json, write_json, write_npz
+
+STOCK_DAY_FIELD_LIST = "stockCode,stockName,open,high,low,close,volume,amount"
+STOCK_DAY_FIELDS = ("open", "high", "low", "close", "volume", "amount")
+
+_store_lock = threading.Lock()
+_store_state = {"version": 0}
+
+
+def stock_day_path(deal_date_str):
+    return get_store_path("stock_day", f"{deal_date_str}.npz")
+
+
+def stock_day_index_path():
+    return get_store_path("stock_day", "index.json")
+
+
+def load_stock_day_index():
+    payload = read_json(stock_day_index_path(), default=None)
+    if not isinstance(payload, dict):
+        payload = {}
+    payload.setdefault("dates", [])
+    payload.setdefault("checked", [])
+    return payload
+
+
+def stock_day_version():
+    return _store_state["version"]
+
+
+def snapshot_to_day(data_list):
+    cols = snapshot_columns(data_list, STOCK_DAY_FIELDS)
+    keep = cols["valid_code"] & ~np.isnan(cols["close"])
+    codes = cols["code"][keep].astype(str)
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = codes[1:] != codes[:-1]
+    idx = np.flatnonzero(keep)[order][first]
+    day = {"codes": codes[first], "names": cols["name"][idx].astype(str)}
+    for k in STOCK_DAY_FIELDS:
+        day[k] = cols[k][idx]
+    return day
+
+
+def save_stock_day(deal_date_str, day):
+    write_npz(stock_day_path(deal_date_str), day)
+
+
+def load_stock_day(deal_date_str):
+    try:
+        with np.load(stock_day_path(deal_date_str)) as f:
+            return {k: f[k] for k in f.files}
+    except Exception:
+        return None
+
+
+def missing_stock_days(payload, dates):
+    today = date.today().isoformat()
+    checked = set(payload.get("checked") or [])
+    return [d for d in dates if d >= today or d not in checked]
+
+
+def sync_stock_days(request_stock_list, dates, max_workers=4, rate_per_sec=2.0, on_progress=None):
+    payload = load_stock_day_index()
+    todo = missing_stock_days(payload, dates)
+    if not todo:
+        return payload, []
+
+    def fetch_one(deal_date_str):
+        data_list = request_stock_list(deal_date_str, STOCK_DAY_FIELD_LIST, "1")
+        if not data_list:
+            return None
+        actual = None
+        for item in data_list:
+            actual = get_first_value(item, ["dealDate", "tradeDate", "date"])
+            if actual is not None:
+                break
+        actual = normalize_record_date(actual, deal_date_str)
+        if actual > deal_date_str:
+            return None
+        day = snapshot_to_day(data_list)
+        if not len(day["codes"]):
+            return None
+        save_stock_day(actual, day)
+        return actual
+
+    def on_done(done, total, deal_date_str, actual, error):
+        if on_progress is not None:
+            on_progress(done, total, deal_date_str)
+
+    results, errors = map_limited(fetch_one, todo, max_workers=max_workers, rate_per_sec=rate_per_sec, on_done=on_done)
+    today = date.today().isoformat()
+    failed = []
+    with _store_lock:
+        payload = load_stock_day_index()
+        stored = set(payload["dates"])
+        checked = set(payload["checked"])
+        for deal_date_str, actual, error in zip(todo, results, errors):
+            if error is not None:
+                failed.append((deal_date_str, error))
+                continue
+            if actual is not None:
+                stored.add(actual)
+            if deal_date_str < today:
+                checked.add(deal_date_str)
+        payload["dates"] = sorted(stored)
+        payload["checked"] = sorted(checked)
+        write_json(stock_day_index_path(), payload)
+        _store_state["version"] += 1
+    return payload, failed
+
+
+def gather_stock_bars(code, dates):
+    code = str(code)
+    out_dates = []
+    rows = {k: [] for k in STOCK_DAY_FIELDS}
+    for d in dates:
+        day = load_stock_day(d)
+        if day is None or not len(day["codes"]):
+            continue
+        pos = int(np.searchsorted(day["codes"], code))
+        if pos >= len(day["codes"]) or day["codes"][pos] != code:
+            continue
+        out_dates.append(d)
+        for k in STOCK_DAY_FIELDS:
+            rows[k].append(day[k][pos])
+    bars = {"ts": np.array(out_dates, dtype="datetime64[D]")}
+    for k in STOCK_DAY_FIELDS:
+        bars[k] = np.array(rows[k], dtype=np.float64)
+    return bars
@@ -0,0 +1,89 @@
+import numpy as np
+
+# positive spread means the lead index outperformed the base index over the window
+STYLE_PAIRS = [
+    {"name": "小盘/大盘", "lead": "中证1000", "base": "沪深300"},
+    {"name": "创业板/上证", "lead": "创业板指", "base": "上证指数"},
+    {"name": "科创50/沪深300", "lead": "科创50", "base": "沪深300"},
+    {"name": "深证/上证", "lead": "深证综指", "base": "上证指数"},
+]
+STYLE_WINDOWS = {"日线": 3, "30分钟": 5, "60分钟": 5}
+STYLE_DEFAULT_WINDOW = 10
+STYLE_THRESHOLD = 0.3
+
+
+def style_window(period):
+    return STYLE_WINDOWS.get(period, STYLE_DEFAULT_WINDOW)
+
+
+def pair_members(pairs):
+    names = []
+    for pair in pairs:
+        for name in (pair["lead"], pair["base"]):
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def forward_fill_columns(values):
+    filled = ~np.isnan(values)
+    idx = np.where(filled, np.arange(values.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    out = values[idx, np.arange(values.shape[1])]
+    out[~np.maximum.accumulate(filled, axis=0)] = np.nan
+    return out
+
+
+def aligned_close_matrix(series):
+    # one row per key seen by any index; a missing bar repeats that index's last close
+    present = [np.asarray(k) for k, _ in series if len(k)]
+    if not present:
+        return np.array([]), np.zeros((0, len(series)))
+    keys = np.unique(np.concatenate(present))
+    close = np.full((len(keys), len(series)), np.nan)
+    for j, (k, v) in enumerate(series):
+        if len(k):
+            close[np.searchsorted(keys, np.asarray(k)), j] = np.asarray(v, dtype=np.float64)
+    return keys, forward_fill_columns(close)
+
+
+def rolling_spreads(close, lead, base, window):
+    window = max(1, int(window or 1))
+    n = close.shape[0]
+    step = np.full(close.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        step[1:] = (close[1:] / close[:-1] - 1.0) * 100.0
+    diff = step[:, lead] - step[:, base]
+    ok = ~np.isnan(diff)
+    sums = np.vstack([np.zeros((1, diff.shape[1])), np.cumsum(np.where(ok, diff, 0.0), axis=0)])
+    counts = np.vstack([np.zeros((1, diff.shape[1]), dtype=np.int64), np.cumsum(ok, axis=0)])
+    lo = np.maximum(np.arange(1, n + 1) - window, 0)
+    total = sums[1:] - sums[lo]
+    return np.where(counts[1:] - counts[lo] > 0, total, np.nan)
+
+
+def compute_style_spreads(series_by_name, pairs, window):
+    names = [n for n in pair_members(pairs) if n in series_by_name]
+    keys, close = aligned_close_matrix([series_by_name[n] for n in names])
+    column = {n: i for i, n in enumerate(names)}
+    usable = [p for p in pairs if p["lead"] in column and p["base"] in column]
+    if not usable or not len(keys):
+        return keys, [], np.zeros((len(keys), 0))
+    lead = np.array([column[p["lead"]] for p in usable])
+    base = np.array([column[p["base"]] for p in usable])
+    return keys, [p["name"] for p in usable], rolling_spreads(close, lead, base, window)
+
+
+def last_valid(values):
+    filled = np.flatnonzero(~np.isnan(values))
+    return float(values[filled[-1]]) if len(filled) else None
+
+
+def decide_pair_style(pair, value, threshold=STYLE_THRESHOLD):
+    if value is None:
+        return "未知"
+    if value >= threshold:
+        return f"{pair['lead']}占优"
+    if value <= -threshold:
+        return f"{pair['base']}占优"
+    return "均衡"
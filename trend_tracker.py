@@ -0,0 +1,158 @@
+import math
+import threading
+from collections import deque
+
+import numpy as np
+
+TREND_WINDOW = 20
+FORECAST_MINUTES = 30
+KALMAN_OBS_NOISE = 5e-4
+KALMAN_LEVEL_NOISE = 1e-4
+KALMAN_SLOPE_NOISE = 1e-5
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def new_tracker_state():
+    return {
+        "last_ts": None,
+        "n": 0,
+        "sum_v": 0.0,
+        "sum_pv": 0.0,
+        "sum_ppv": 0.0,
+        "high": None,
+        "low": None,
+        "close": None,
+        "window": deque(),
+        "sx": 0.0,
+        "sy": 0.0,
+        "sxx": 0.0,
+        "sxy": 0.0,
+        "kf": None,
+        "history": [],
+        "lock": threading.Lock(),
+    }
+
+
+def get_trend_tracker(day_key, exponent_id):
+    with _trackers_lock:
+        for key in [k for k in _trackers if k[0] != day_key]:
+            del _trackers[key]
+        state = _trackers.get((day_key, exponent_id))
+        if state is None:
+            state = new_tracker_state()
+            _trackers[(day_key, exponent_id)] = state
+    return state
+
+
+def kalman_step(kf, y):
+    # local linear trend: level_t = level + slope, slope_t = slope; noises scale with the price level
+    level, slope, p00, p01, p11 = kf["level"], kf["slope"], kf["p00"], kf["p01"], kf["p11"]
+    scale = y * y
+    level = level + slope
+    p00, p01, p11 = (
+        p00 + 2 * p01 + p11 + KALMAN_LEVEL_NOISE**2 * scale,
+        p01 + p11,
+        p11 + KALMAN_SLOPE_NOISE**2 * scale,
+    )
+    s = p00 + KALMAN_OBS_NOISE**2 * scale
+    k0, k1 = p00 / s, p01 / s
+    resid = y - level
+    kf.update(
+        level=level + k0 * resid,
+        slope=slope + k1 * resid,
+        p00=(1 - k0) * p00,
+        p01=(1 - k0) * p01,
+        p11=p11 - k1 * p01,
+    )
+
+
+def kalman_forecast(kf, horizon):
+    level = kf["level"] + kf["slope"] * horizon
+    var = kf["p00"] + 2 * horizon * kf["p01"] + horizon * horizon * kf["p11"]
+    return level, math.sqrt(max(var, 0.0))
+
+
+def track_bar(state, ts, high, low, close, volume, record=True):
+    if close is None or close != close:
+        return
+    high = close if high is None or high != high else high
+    low = close if low is None or low != low else low
+    volume = 0.0 if volume is None or volume != volume else float(volume)
+    typical = (high + low + close) / 3.0
+    state["sum_v"] += volume
+    state["sum_pv"] += typical * volume
+    state["sum_ppv"] += typical * typical * volume
+    state["high"] = high if state["high"] is None else max(state["high"], high)
+    state["low"] = low if state["low"] is None else min(state["low"], low)
+    state["close"] = close
+
+    x = float(state["n"])
+    window = state["window"]
+    window.append((x, close))
+    state["sx"] += x
+    state["sy"] += close
+    state["sxx"] += x * x
+    state["sxy"] += x * close
+    if len(window) > TREND_WINDOW:
+        ox, oy = window.popleft()
+        state["sx"] -= ox
+        state["sy"] -= oy
+        state["sxx"] -= ox * ox
+        state["sxy"] -= ox * oy
+
+    if state["kf"] is None:
+        state["kf"] = {"level": close, "slope": 0.0, "p00": (KALMAN_OBS_NOISE * close) ** 2, "p01": 0.0, "p11": (KALMAN_SLOPE_NOISE * close * 10) ** 2}
+    else:
+        kalman_step(state["kf"], close)
+    state["n"] += 1
+    state["last_ts"] = ts
+    if record:
+        snap = tracker_snapshot(state)
+        state["history"].append((ts, close, snap["vwap"], snap["high"], snap["low"], snap["kalman"]))
+
+
+def regression_slope(state):
+    n = len(state["window"])
+    denom = n * state["sxx"] - state["sx"] * state["sx"]
+    if n < 2 or denom <= 0:
+        return None
+    return (n * state["sxy"] - state["sx"] * state["sy"]) / denom
+
+
+def tracker_snapshot(state):
+    vwap = state["sum_pv"] / state["sum_v"] if state["sum_v"] > 0 else None
+    band = None
+    if vwap is not None:
+        band = math.sqrt(max(state["sum_ppv"] / state["sum_v"] - vwap * vwap, 0.0))
+    kf = state["kf"]
+    forecast, forecast_sd = kalman_forecast(kf, FORECAST_MINUTES) if kf else (None, None)
+    return {
+        "close": state["close"],
+        "vwap": vwap,
+        "vwap_band": band,
+        "high": state["high"],
+        "low": state["low"],
+        "slope": regression_slope(state),
+        "kalman": kf["level"] if kf else None,
+        "kalman_slope": kf["slope"] if kf else None,
+        "forecast": forecast,
+        "forecast_sd": forecast_sd,
+        "bars": state["n"],
+    }
+
+
+def feed_bars(state, bars, provisional_last=False):
+    # committed state only advances over finished bars; a forming last bar is applied to a throwaway copy
+    ts = bars["ts"]
+    with state["lock"]:
+        start = 0 if state["last_ts"] is None else int(np.searchsorted(ts, state["last_ts"], side="right"))
+        end = len(ts) - 1 if provisional_last and len(ts) else len(ts)
+        for i in range(start, end):
+            track_bar(state, ts[i], bars["high"][i], bars["low"][i], bars["close"][i], bars["volume"][i])
+        if end < len(ts) and end >= start:
+            tmp = dict(state, window=deque(state["window"]), kf=dict(state["kf"]) if state["kf"] else None)
+            track_bar(tmp, ts[end], bars["high"][end], bars["low"][end], bars["close"][end], bars["volume"][end], record=False)
+            return tracker_snapshot(tmp)
+        return tracker_snapshot(state)
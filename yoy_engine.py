@@ -0,0 +1,56 @@
+import numpy as np
+
+YOY_METRICS = {"累计涨幅": "ret", "累计成交量同比": "vol_ratio"}
+
+
+def year_ordinals(ts):
+    day = np.asarray(ts).astype("datetime64[D]")
+    year = day.astype("datetime64[Y]").astype(np.int64) + 1970
+    n = len(day)
+    if not n:
+        return year, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate([[True], year[1:] != year[:-1]]))
+    ordinal = np.arange(n) - np.repeat(starts, np.diff(np.append(starts, n)))
+    return year, ordinal, starts
+
+
+def aligned_panel(bars):
+    # one row per calendar year, one column per trading-day ordinal within the year
+    close = np.asarray(bars["close"], dtype=np.float64)
+    volume = np.nan_to_num(np.asarray(bars["volume"], dtype=np.float64))
+    year, ordinal, starts = year_ordinals(bars["ts"])
+    if not len(year):
+        empty = np.zeros((0, 0))
+        return {"years": np.zeros(0, dtype=np.int64), "ret": empty, "vol_ratio": empty, "days": 0}
+    years = year[starts]
+    row = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(year))))
+    width = int(ordinal.max()) + 1
+    price = np.full((len(years), width), np.nan)
+    price[row, ordinal] = close
+    vol = np.full((len(years), width), np.nan)
+    vol[row, ordinal] = volume
+
+    # base is the previous year's last close when the store has it, otherwise the year's first close
+    prev_close = close[np.maximum(starts - 1, 0)]
+    has_prev = (starts > 0) & (year[np.maximum(starts - 1, 0)] == years - 1)
+    base = np.where(has_prev, prev_close, close[starts])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = (price / base[:, None] - 1.0) * 100.0
+
+    cum_vol = np.where(np.isnan(vol), np.nan, np.nancumsum(vol, axis=1))
+    prev_row = np.searchsorted(years, years - 1)
+    has_prev_year = (prev_row < len(years)) & (years[np.minimum(prev_row, len(years) - 1)] == years - 1)
+    prev_cum = np.full_like(cum_vol, np.nan)
+    prev_cum[has_prev_year] = cum_vol[prev_row[has_prev_year]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol_ratio = np.where(prev_cum > 0, (cum_vol / prev_cum - 1.0) * 100.0, np.nan)
+    return {"years": years, "ret": ret, "vol_ratio": vol_ratio, "days": width}
+
+
+def panel_rows(panel, metric, years):
+    wanted = {int(y) for y in years}
+    rows = {}
+    for i, y in enumerate(panel["years"].tolist()):
+        if y in wanted:
+            rows[y] = panel[metric][i]
+    return rows